@@ -2,6 +2,7 @@
 from fastapi import APIRouter, Body, HTTPException
 from typing import Dict, Any
 from ..services.backtest_service import run_scenario_service
+from ..services.scenario_planner import ScenarioBudgetExceeded
 from ..services.strategy_manager import list_strategies
 
 router = APIRouter(prefix="/api/coinlab", tags=["backtest"])
@@ -10,6 +11,8 @@ router = APIRouter(prefix="/api/coinlab", tags=["backtest"])
 def run_scenario(payload: Dict[str, Any] = Body(...)):
     try:
         return run_scenario_service(payload)
+    except ScenarioBudgetExceeded as e:
+        raise HTTPException(status_code=413, detail={"reason": e.reason, "estimate": e.estimate})
     except HTTPException:
         raise
     except Exception as e:
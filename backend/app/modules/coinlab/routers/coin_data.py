@@ -4,6 +4,12 @@ from pathlib import Path
 import os
 import pandas as pd
 import time
+from datetime import datetime
+from ..services.candle_store import (read_parquet_cached, canonicalize_candles, parquet_footer_summary,
+                                     write_candles_parquet)
+from ..services.hot_tier import refresh_hot
+from ..services.data_catalog import get_catalog, catalog_upsert
+from ..services.latest_snapshot import update_snapshot
 
 BASE_DIR = "/data"
 
@@ -45,9 +51,9 @@ def is_valid_parquet(file_path):
     try:
         if not file_path.exists() or file_path.stat().st_size < 100:  # 최소 크기 체크
             return False
-        df = pd.read_parquet(file_path)
-        # "timestamp" 컬럼 있고, 1행 이상일 때만 정상으로 간주
-        if df.shape[0] == 0 or "timestamp" not in df.columns:
+        # 푸터만 확인: 시간 컬럼(정규 스키마 "time" 또는 구형 "timestamp") 있고, 1행 이상일 때만 정상
+        summary = parquet_footer_summary(file_path)
+        if summary["rows"] == 0 or not summary["hasTime"]:
             return False
         return True
     except Exception:
@@ -55,6 +61,9 @@ def is_valid_parquet(file_path):
 
 def get_coin_data_list(interval: str = "1d", year: str = "2024"):
     interval = normalize_bithumb_interval(interval)
+    cat = get_catalog()
+    if cat is not None:
+        return cat.symbols(interval, year)
     symbols = []
     base = Path(BASE_DIR)
     if not base.exists():
@@ -74,14 +83,23 @@ def download_coin_data(symbol: str, interval: str = "1d", year: str = "2024"):
     return file_path
 
 
-def update_coin_data(symbol: str, interval: str, year: str):
+def update_coin_data(symbol: str, interval: str, year: str, full: bool = False):
     symbol = normalize_bithumb_symbol(symbol)
     interval = normalize_bithumb_interval(interval)
+    # 올해 파일이 이미 있으면 마지막 봉 이후만 받아 붙인다 (full=True면 기존처럼 연도 전체 재수집)
+    if not full and str(year) == str(datetime.utcnow().year):
+        res = update_coin_data_delta(symbol, interval)
+        if res is not None:
+            print(f"[{symbol}][{interval}] 증분 갱신 ({res['appended']} rows, years={res['years']})")
+            return True
     df = fetch_ohlcv_bithumb(symbol, interval, year)
     file_path = Path(BASE_DIR) / symbol / interval / f"{year}.parquet"
     file_path.parent.mkdir(parents=True, exist_ok=True)
     if df is not None and len(df) > 0:
-        df.to_parquet(file_path, index=False)
+        write_candles_parquet(df, file_path, symbol)
+        catalog_upsert(symbol, interval, year, file_path)
+        refresh_hot(symbol, interval)
+        update_snapshot(symbol, interval)
         print(f"[{symbol}][{interval}][{year}] parquet 저장 완료 ({len(df)} rows)")
         return True
     else:
@@ -90,6 +108,65 @@ def update_coin_data(symbol: str, interval: str, year: str):
 
 
 
+def _last_stored_time(symbol: str, interval: str):
+    """저장된 마지막 봉 time(epoch-sec): 카탈로그 → 없으면 최신 연도 파일 푸터"""
+    cat = get_catalog()
+    if cat is not None:
+        last = cat.last_time(symbol, interval)
+        if last is not None:
+            return last
+    files = sorted(p for p in (Path(BASE_DIR) / symbol / interval).glob("*.parquet") if p.stem.isdigit())
+    for p in reversed(files):
+        try:
+            summary = parquet_footer_summary(p)
+        except Exception:
+            continue
+        if summary["rows"] > 0 and summary["maxTime"] is not None:
+            return int(summary["maxTime"])
+    return None
+
+
+def fetch_recent_bithumb(symbol, interval):
+    """최근 캔들 1회 호출 (빗썸 candlestick은 최신 구간만 돌려줌)"""
+    symbol = normalize_bithumb_symbol(symbol)
+    interval = normalize_bithumb_interval(interval)
+    interval_for_api = "24h" if interval == "1d" else interval
+    url = f"https://api.bithumb.com/public/candlestick/{symbol}/{interval_for_api}"
+    r = requests.get(url, timeout=10)
+    data = r.json().get("data", [])
+    if not data or not isinstance(data, list):
+        return None
+    return _bithumb_frame(sorted(data, key=lambda row: int(row[0])), symbol)
+
+
+def update_coin_data_delta(symbol: str, interval: str):
+    """
+    증분 수집: 마지막 저장 봉(진행 중일 수 있어 포함) 이후만 연도 파일에 병합.
+    새해로 넘어간 봉은 새 연도 파일로.
+    저장된 데이터가 없거나, 받은 최근 구간이 마지막 저장 봉 이후에서 시작해 사이가 비면(gap)
+    병합하지 않고 None → 호출부에서 연도 전체 수집.
+    반환: {"appended": 새 봉 수, "years": [갱신 연도]}
+    """
+    symbol = normalize_bithumb_symbol(symbol)
+    interval = normalize_bithumb_interval(interval)
+    last = _last_stored_time(symbol, interval)
+    if last is None:
+        return None
+    raw = fetch_recent_bithumb(symbol, interval)
+    if raw is None or len(raw) == 0:
+        return {"appended": 0, "years": []}
+    new = canonicalize_candles(raw, symbol)
+    if new["time"].iloc[0] > last:
+        return None   # 누락 구간 → 증분으로 메울 수 없음
+    new = new[new["time"] >= last]
+    if new.empty:
+        return {"appended": 0, "years": []}
+    years = pd.to_datetime(new["time"], unit="s").dt.year
+    for y, part in new.groupby(years):
+        save_and_merge(symbol, interval, str(y), part)
+    return {"appended": int((new["time"] > last).sum()), "years": sorted(int(y) for y in years.unique())}
+
+
 def fetch_ohlcv_bithumb(symbol, interval, year):
     symbol = normalize_bithumb_symbol(symbol)
     interval = normalize_bithumb_interval(interval)
@@ -132,7 +209,14 @@ def fetch_ohlcv_bithumb(symbol, interval, year):
         time.sleep(0.3)
     if not all_data:
         return None
-    # 아래부터는 기존 코드와 동일
+    df = _bithumb_frame(all_data, symbol)
+    if df is None:
+        return None
+    return df[df["timestamp"].dt.year == int(year)]
+
+
+def _bithumb_frame(all_data, symbol):
+    """빗썸 candlestick 행 [ts, open, close, high, low, volume(, value)] → 저장용 DataFrame"""
     if len(all_data[0]) == 7:
         columns = ["timestamp", "open", "close", "high", "low", "volume", "value"]
     elif len(all_data[0]) == 6:
@@ -150,7 +234,6 @@ def fetch_ohlcv_bithumb(symbol, interval, year):
     if "value" in df.columns:
         df["value"] = df["value"].astype(float)
     df["symbol"] = symbol
-    df = df[df["timestamp"].dt.year == int(year)]
     main_cols = ["timestamp", "open", "high", "low", "close", "volume", "symbol"]
     if "value" in df.columns:
         main_cols.insert(6, "value")
@@ -165,14 +248,16 @@ def save_and_merge(symbol, interval, year, new_df):
     interval = normalize_bithumb_interval(interval)
     file_path = Path("/data") / symbol / interval / f"{year}.parquet"
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    # 기존 parquet가 있다면 불러오기
+    # 기존 parquet가 있다면 불러오기 (구형/정규 스키마 모두 정규화 후 병합, 같은 봉은 새 값 우선)
     if file_path.exists():
-        old_df = pd.read_parquet(file_path)
-        merged = pd.concat([old_df, new_df])
-        merged = merged.drop_duplicates(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
+        old_df = canonicalize_candles(read_parquet_cached(file_path), symbol)
+        merged = pd.concat([old_df, canonicalize_candles(new_df, symbol)], ignore_index=True)
     else:
         merged = new_df
-    merged.to_parquet(file_path, index=False)
+    write_candles_parquet(merged, file_path, symbol)
+    catalog_upsert(symbol, interval, year, file_path)
+    refresh_hot(symbol, interval)
+    update_snapshot(symbol, interval)
 
 
 def download_all_data(symbol):
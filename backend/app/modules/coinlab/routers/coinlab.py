@@ -1,7 +1,7 @@
 # backend/app/modules/coinlab/routers/coinlab.py
 
 from fastapi import APIRouter, Body, Request, Query, BackgroundTasks, HTTPException, FastAPI
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, JSONResponse, StreamingResponse
 import time,logging
 import json
 import os
@@ -20,8 +20,14 @@ from ..services.utils import save_options, load_options
 from .coin_data import get_coin_data_list, download_coin_data, update_coin_data
 from ..services.coin_data_service import delete_coin_data, bulk_delete, bulk_update, bulk_download
 from ..services.backtest_service import run_scenario_service
+from ..services.scenario_planner import ScenarioBudgetExceeded
 from ..services.strategy_manager import resolve_signals_for_combo
 from ..services.strategy_manager import list_strategies
+from ..services.candle_store import (read_parquet_cached, read_parquet_tail, candle_cache_stats,
+                                     load_candles, resample_source)
+from ..services.hot_tier import hot_tier_stats
+from ..services.data_catalog import get_catalog
+from ..services.latest_snapshot import SNAPSHOT_BARS, latest_frames, latest_summary
 
 
 logger = logging.getLogger(__name__)
@@ -284,10 +290,12 @@ def coin_data_download(symbol: str = Query(...), interval: str = "1d", year: str
 
 # [코인데이터 업데이트]
 @router.post("/coin_data_update")
-def coin_data_update(symbol: str = Query(...), interval: str = Query(...), year: str = Query(...)):
+def coin_data_update(symbol: str = Query(...), interval: str = Query(...), year: str = Query(...),
+                     full: bool = Query(False)):
     from .coin_data import update_coin_data
     try:
-        result = update_coin_data(symbol, interval, year)
+        # 올해 데이터는 기본 증분 갱신, full=true면 연도 전체 재수집
+        result = update_coin_data(symbol, interval, year, full=full)
         if result is True:
             return {"result": True}
         else:
@@ -373,7 +381,9 @@ def coin_data_merged_save(symbol: str = Query(...)):
                     print(f"[autocreate error] {symbol} {interval} {year} | {e}")
             if fpath.exists():
                 try:
-                    df = pd.read_parquet(fpath)
+                    df = read_parquet_cached(fpath)
+                    if "symbol" not in df.columns:   # 최적화 저장(drop_symbol) 파일은 경로로 보충
+                        df["symbol"] = symbol
                     df["interval"] = interval
                     df["year"] = year
                     dfs.append(df)
@@ -393,10 +403,14 @@ def coin_data_total_size():
     import os
     base = Path("/data")
     total_bytes = 0
-    for dirpath, dirnames, filenames in os.walk(base):
-        for fname in filenames:
-            if fname.endswith(".parquet"):
-                total_bytes += (Path(dirpath) / fname).stat().st_size
+    cat = get_catalog()
+    if cat is not None:
+        total_bytes = cat.total_bytes()   # 카탈로그의 연도 파일 바이트 합
+    else:
+        for dirpath, dirnames, filenames in os.walk(base):
+            for fname in filenames:
+                if fname.endswith(".parquet"):
+                    total_bytes += (Path(dirpath) / fname).stat().st_size
     # 자동 단위 변환
     for unit in ['B','KB','MB','GB','TB']:
         if total_bytes < 1024:
@@ -412,6 +426,25 @@ def coin_data_delete_all(symbol: str = Query(...)):
     return {"result": "ok" if ok else "not_found"}
    
 
+@router.get("/candle_cache_stats")
+def get_candle_cache_stats():
+    """parquet LRU 캐시 상태 (hits/misses/evictions, 사용 바이트/상한)"""
+    return candle_cache_stats()
+
+
+@router.get("/latest_snapshot")
+def get_latest_snapshot(interval: str = Query("1d"), symbols: str | None = Query(None)):
+    """유니버스 최신 봉 1행 + return/volume_change_rate (스냅샷 파일 1개에서 응답)"""
+    filt = set(s.strip() for s in symbols.split(",") if s.strip()) if symbols else None
+    return {"interval": interval, "coins": latest_summary(interval, filt)}
+
+
+@router.get("/hot_tier_stats")
+def get_hot_tier_stats():
+    """Arrow IPC hot tier 상태 (워커별 hits/misses, 파일 수/바이트/상한)"""
+    return hot_tier_stats()
+
+
 @router.get("/coin_data_state")
 def coin_data_state():
     """
@@ -421,6 +454,9 @@ def coin_data_state():
       ...
     }
     """
+    cat = get_catalog()
+    if cat is not None:
+        return cat.state()   # 카탈로그(SQLite)에서 응답, 디렉터리 순회 없음
     import os
     from pathlib import Path
     BASE_DIR = "/data"
@@ -535,26 +571,8 @@ async def condition_search_run(request: Request):
         result.sort(key=lambda x: (x.get("return") is None, x.get("return", 0)), reverse=True)
         return {"coins": result}
 
-    for symbol in os.listdir(base_dir):
-        if symbols_filter and symbol not in symbols_filter:
-            continue
-        interval_dir = os.path.join(base_dir, symbol, interval)
-        if not os.path.isdir(interval_dir):
-            continue
-
-        # 연도별 parquet 중 최신 파일 찾기 (파일명 정렬 기준)
-        parquet_files = sorted(
-            [f for f in os.listdir(interval_dir) if f.endswith(".parquet") and f[:-8].isdigit()],
-            reverse=True
-        )
-        if not parquet_files:
-            continue
-        latest_file = parquet_files[0]  # 예: "2024.parquet"
-
-        fpath = os.path.join(interval_dir, latest_file)
+    for symbol, df in _iter_latest_frames(base_dir, interval, symbols_filter, combos):
         try:
-            df = pd.read_parquet(fpath)
-
             last_row = df.iloc[-1].to_dict()
             last_row["symbol"] = symbol
 
@@ -612,6 +630,57 @@ async def condition_search_run(request: Request):
     return {"coins": result}
 
 
+def _ma_bars_needed(combos: list[dict]) -> int:
+    """MA 조건 판정에 필요한 봉 수 (최장 MA + 전일/직전 비교 2봉)"""
+    need = 0
+    for cond in combos or []:
+        if cond.get("key") in ("ma_cross", "ma_gap"):
+            try:
+                v = cond.get("value") or {}
+                need = max(need, int(v.get("ma1")), int(v.get("ma2")))
+            except Exception:
+                continue
+    return need + 2
+
+
+def _iter_latest_frames(base_dir: str, interval: str, symbols_filter, combos: list[dict]):
+    """
+    (symbol, 최신 연도 파일의 봉 DataFrame).
+    최신 봉 스냅샷(파일 1개)에서 우선 제공, MA가 스냅샷 봉 수보다 길거나 스냅샷이 없으면 심볼별 parquet.
+    """
+    if _ma_bars_needed(combos) <= SNAPSHOT_BARS:
+        try:
+            frames = latest_frames(interval, symbols_filter)
+        except Exception:
+            frames = {}
+        if frames:
+            yield from frames.items()
+            return
+
+    for symbol in os.listdir(base_dir):
+        if symbols_filter and symbol not in symbols_filter:
+            continue
+        interval_dir = os.path.join(base_dir, symbol, interval)
+        if not os.path.isdir(interval_dir):
+            continue
+
+        # 연도별 parquet 중 최신 파일 찾기 (파일명 정렬 기준)
+        parquet_files = sorted(
+            [f for f in os.listdir(interval_dir) if f.endswith(".parquet") and f[:-8].isdigit()],
+            reverse=True
+        )
+        if not parquet_files:
+            continue
+        latest_file = parquet_files[0]  # 예: "2024.parquet"
+
+        fpath = os.path.join(interval_dir, latest_file)
+        try:
+            df = read_parquet_cached(fpath)
+        except Exception:
+            continue
+        yield symbol, df
+
+
 def match_combo(item, combos: list[dict], df: pd.DataFrame | None = None, interval: str = "1d", is_condition: bool = False):
     """
     combos: [{ key, op, value, logic?: 'AND'|'OR' }]
@@ -804,7 +873,7 @@ def _latest_parquet_path(symbol: str, interval: str) -> Path:
 @router.get("/candles")
 def get_candles(
     symbol: str = Query(..., description="예: BTC_KRW"),
-    interval: str = Query(..., regex="^(1d|1h|15m|5m)$"),
+    interval: str = Query(..., regex="^(1d|1h|30m|15m|10m|5m|3m|1m)$"),
     limit: int = Query(500, ge=50, le=5000),
 ) -> Dict[str, Any]:
   """
@@ -812,15 +881,19 @@ def get_candles(
   - time: epoch seconds (int)
   - open, high, low, close, volume: float
   """
-  try:
-    p = _latest_parquet_path(symbol, interval)
-  except FileNotFoundError as e:
-    raise HTTPException(status_code=404, detail=str(e))
+  if resample_source(symbol, interval) is not None:
+    # 저장되지 않은 interval: 더 짧은 저장 tf에서 리샘플 (원본이 바뀔 때까지 프로세스 캐시)
+    df = load_candles(symbol, interval).tail(limit)
+  else:
+    try:
+      p = _latest_parquet_path(symbol, interval)
+    except FileNotFoundError as e:
+      raise HTTPException(status_code=404, detail=str(e))
 
-  try:
-    df = pd.read_parquet(p)
-  except Exception as e:
-    raise HTTPException(status_code=500, detail=f"Failed to read parquet: {e}")
+    try:
+      df = read_parquet_tail(p, limit)   # 월 단위 row group 파일은 끝쪽 달만 디코딩
+    except Exception as e:
+      raise HTTPException(status_code=500, detail=f"Failed to read parquet: {e}")
 
   # 컬럼 정규화: time/open/high/low/close/volume
   cols = {c.lower(): c for c in df.columns}
@@ -832,14 +905,18 @@ def get_candles(
   ccol = cols.get("close") or "close"
   vcol = cols.get("volume") or cols.get("vol") or "volume"
 
-  # 시간 처리
-  t = pd.to_datetime(df[tcol], utc=True, errors="coerce")
-  if t.isna().all():
-    raise HTTPException(status_code=500, detail="Invalid time column")
+  # 시간 처리: 정규 스키마는 이미 epoch-sec int
+  if tcol in df.columns and pd.api.types.is_integer_dtype(df[tcol]):
+    tsec = df[tcol].astype("int64")
+  else:
+    t = pd.to_datetime(df[tcol], utc=True, errors="coerce")
+    if t.isna().all():
+      raise HTTPException(status_code=500, detail="Invalid time column")
+    tsec = t.astype("int64") // 10**9  # to epoch seconds (FutureWarning 제거)
 
   # tail(limit) + 필요한 컬럼만
   sdf = pd.DataFrame({
-    "time": (t.astype("int64") // 10**9),  # to epoch seconds (FutureWarning 제거)
+    "time": tsec,
     "open": pd.to_numeric(df[ocol], errors="coerce"),
     "high": pd.to_numeric(df[hcol], errors="coerce"),
     "low":  pd.to_numeric(df[lcol], errors="coerce"),
@@ -937,21 +1014,37 @@ def delete_watchlist(name: str = Query(..., description="삭제할 관심종목
 def run_scenario(payload: Dict[str, Any] = Body(...)):
     """
     백테스트 시나리오 실행 (동시 실행 차단 + 실행시간 로깅)
+    - payload.stream=true: (step, symbol) 완료마다 NDJSON 1줄씩 스트리밍, 마지막 줄은 summary
+    - payload.dryRun=true: 실행 없이 작업량/예상 시간 추정만 반환
+    - 추정 작업량이 예산(maxWorkUnits/maxSeconds, 서버 기본값)을 넘으면 413
     """
     global RUNNING_FLAG
+    from ..services.backtest_service import estimate_scenario, run_scenario_service
+
+    if payload.get("dryRun"):
+        return run_scenario_service(payload)
     if RUNNING_FLAG:
         raise HTTPException(status_code=429, detail="Backtest already running")
 
+    # 추정은 여기서 1회만 → 서비스/스트림에 그대로 넘겨 재추정하지 않음 (preview면 표본 유니버스 기준)
+    estimate = estimate_scenario(payload)
+    if not estimate.get("admitted", True):
+        raise HTTPException(status_code=413, detail={"reason": estimate.get("reason"), "estimate": estimate})
+
+    # preview는 표본 실행 후 층화 추정을 붙여야 하므로 스트리밍하지 않고 단일 응답
+    if payload.get("stream") and not payload.get("preview"):
+        return _run_scenario_stream(payload, estimate)
+
     t0 = time.time()
     logger.info("run_scenario start symbols=%s steps=%s",
                 len(payload.get("symbols", [])), len(payload.get("steps", [])))
     try:
         RUNNING_FLAG = True
         # 실제 서비스 호출
-        from ..services.backtest_service import run_scenario_service
-
-        resp = run_scenario_service(payload)
+        resp = run_scenario_service(payload, estimate=estimate)
         return resp
+    except ScenarioBudgetExceeded as e:
+        raise HTTPException(status_code=413, detail={"reason": e.reason, "estimate": e.estimate})
     except HTTPException:
         raise
     except Exception as e:
@@ -961,6 +1054,84 @@ def run_scenario(payload: Dict[str, Any] = Body(...)):
         RUNNING_FLAG = False
         logger.info("run_scenario end took=%.2fs", time.time() - t0)
 
+
+@router.post("/backtest/run_scenario_batch")
+def run_scenario_batch(payload: Dict[str, Any] = Body(...)):
+    """
+    시나리오 N개 일괄 실행: {"scenarios": [payload, ...], "maxWorkUnits"?, "maxSeconds"?, "deadlineMs"?}
+    - 캔들 로드/신호 계산은 고유 (symbol, tf, 전략, 파라미터)당 1회, 응답은 시나리오별로 독립
+    - 실행 전에 배치 전체(시나리오별 + 합계)를 예산 검사 → 하나라도 초과면 아무것도 실행하지 않고 413
+    - deadlineMs: 배치 전체 마감. 각 시나리오는 남은 시간을 자기 deadlineMs로 받아 실행(넘으면 partial)
+    """
+    global RUNNING_FLAG
+    from ..services.backtest_service import estimate_batch, run_scenario_batch as _run_batch
+    if RUNNING_FLAG:
+        raise HTTPException(status_code=429, detail="Backtest already running")
+    scenarios = payload.get("scenarios")
+    if not isinstance(scenarios, list) or not scenarios:
+        raise HTTPException(status_code=400, detail="scenarios must be a non-empty list")
+
+    estimates = estimate_batch(scenarios, {k: payload[k] for k in ("maxWorkUnits", "maxSeconds", "deadlineMs")
+                                           if k in payload})
+    if not estimates["admitted"]:
+        raise HTTPException(status_code=413, detail={"reason": estimates.get("reason"), "estimate": estimates})
+
+    t0 = time.time()
+    logger.info("run_scenario_batch start scenarios=%s", len(scenarios))
+    try:
+        RUNNING_FLAG = True
+        return _run_batch(scenarios, estimates, payload.get("deadlineMs"))
+    except ScenarioBudgetExceeded as e:
+        raise HTTPException(status_code=413, detail={"reason": e.reason, "estimate": e.estimate})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("run_scenario_batch error: %s", e)
+        raise HTTPException(status_code=500, detail=f"run_scenario_batch failed: {e}")
+    finally:
+        RUNNING_FLAG = False
+        logger.info("run_scenario_batch end took=%.2fs", time.time() - t0)
+
+
+def _run_scenario_stream(payload: Dict[str, Any], estimate: Dict[str, Any] | None = None) -> StreamingResponse:
+    """NDJSON 스트리밍 응답. 실행 플래그는 제너레이터가 끝날 때 해제한다."""
+    global RUNNING_FLAG
+    from ..services.backtest_service import iter_scenario_records
+
+    RUNNING_FLAG = True
+    t0 = time.time()
+    logger.info("run_scenario(stream) start symbols=%s steps=%s",
+                len(payload.get("symbols", [])), len(payload.get("steps", [])))
+
+    def gen():
+        global RUNNING_FLAG
+        try:
+            for rec in iter_scenario_records(payload, estimate=estimate):
+                yield json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            logger.exception("run_scenario(stream) error: %s", e)
+            yield json.dumps({"type": "error", "detail": f"run_scenario failed: {e}"}, ensure_ascii=False) + "\n"
+        finally:
+            RUNNING_FLAG = False
+            logger.info("run_scenario(stream) end took=%.2fs", time.time() - t0)
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+@router.get("/backtest/best_params")
+def get_best_params(symbol: str | None = Query(None), tf: str | None = Query(None),
+                    strategy: str | None = Query(None), feeBps: float | None = Query(None),
+                    slippageBps: float | None = Query(None), limit: int = 500):
+    """
+    저장된 후보 평가에서 (symbol, tf, strategy, 비용 프로파일, 청산 설정)별 최신 train 구간
+    최고 점수 파라미터 (재실행 없음). feeBps/slippageBps로 비용 프로파일 필터.
+    """
+    from ..services.result_store import get_result_store
+    store = get_result_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="result store unavailable")
+    return {"ok": True, "items": store.best_params(symbol=symbol, tf=tf, strategy=strategy,
+                                                    fee_bps=feeBps, slippage_bps=slippageBps, limit=limit)}
+
 @router.get("/backtest/strategies")
 def get_strategies():
     return list_strategies()
\ No newline at end of file
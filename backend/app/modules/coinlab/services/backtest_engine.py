@@ -1,7 +1,8 @@
 # backend/services/backtest_engine.py
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 import math
+import numpy as np
 import pandas as pd
 
 @dataclass
@@ -18,40 +19,96 @@ def _pct(a, b):
     if b == 0: return 0.0
     return (a/b - 1.0) * 100.0
 
-def backtest_single(
+@dataclass
+class EngineState:
+    """
+    구간 분할 실행(run_segment)용 엔진 상태. 다음 구간으로 그대로 이어서 시뮬레이션한다.
+    - pos: 보유 포지션(dict) 또는 None
+    - trades: 지금까지 확정된 거래
+    - pending_entry: 구간 마지막 봉에서 진입 신호 → 다음 구간 첫 봉 시가로 체결
+    - pending_exit: 구간 마지막 봉에서 청산 사유 발생 → 다음 구간 첫 봉 시가로 체결
+    - bars: 지금까지 소비한 봉 수, last_close/last_time: 마지막 봉(강제청산용)
+    """
+    pos: Optional[Dict[str, Any]] = None
+    trades: List[Dict[str, Any]] = field(default_factory=list)
+    pending_entry: bool = False
+    pending_exit: Optional[List[str]] = None
+    bars: int = 0
+    last_close: Optional[float] = None
+    last_time: Optional[int] = None
+
+def _sell_trade(pos: Dict[str, Any], fill: float, exit_time: int, reason: str, fee: float, slip: float) -> Dict[str, Any]:
+    # sell price with slippage+fee (one side)
+    sell = fill * (1 - slip) * (1 - fee/2.0)
+    return {
+        "entryTime": pos["entry_time"],
+        "entryPrice": round(pos["entry_price"], 8),
+        "exitTime": exit_time,
+        "exitPrice": round(sell, 8),
+        "pnlPct": round(_pct(sell, pos["entry_price"]), 4),
+        "bars": pos["age"],
+        "reason": reason
+    }
+
+def _sig_array(sig, index) -> np.ndarray:
+    # Series는 (reset된) df.index 기준 정렬, ndarray는 위치 기준 그대로 사용
+    if isinstance(sig, pd.Series):
+        return sig.reindex(index).fillna(0).astype(int).to_numpy()
+    return np.nan_to_num(np.asarray(sig, dtype=float)).astype(int)
+
+def run_segment(
     df: pd.DataFrame,
-    entry_sig: pd.Series,
-    opp_exit_sig: Optional[pd.Series],
+    entry_sig,
+    opp_exit_sig,
     exit_cfg: ExitConfig,
+    state: EngineState,
     fill_next_bar=True
-) -> Dict[str, Any]:
+) -> EngineState:
     """
-    룩어헤드 금지: 시그널 바 다음 바의 시가로 체결(가능하면).
-    df: columns = [time, open, high, low, close, volume] (time=epoch sec)
-    entry_sig, opp_exit_sig: bool/int Series(1/0)
+    df 구간을 state에 이어서 시뮬레이션(state를 갱신해 반환).
+    구간을 여러 번 나눠 호출해도 한 번에 돌린 결과와 동일하다.
+    entry_sig/opp_exit_sig: df 구간과 같은 길이의 ndarray(위치 기준) 또는 Series
     """
     df = df.reset_index(drop=True)
-    entry_sig = entry_sig.reindex(df.index).fillna(0).astype(int)
-    opp_exit_sig = opp_exit_sig.reindex(df.index).fillna(0).astype(int) if opp_exit_sig is not None else pd.Series(0, index=df.index)
-
-    pos = None
-    trades: List[Dict[str, Any]] = []
+    n = len(df)
+    if n == 0:
+        return state
+    entry = _sig_array(entry_sig, df.index)
+    opp = _sig_array(opp_exit_sig, df.index) if opp_exit_sig is not None else np.zeros(n, dtype=int)
+    op_ = df["open"].to_numpy(dtype=float)
+    hi_ = df["high"].to_numpy(dtype=float)
+    cl_ = df["close"].to_numpy(dtype=float)
+    tm_ = df["time"].to_numpy()
 
     fee = exit_cfg.fee_bps / 10000.0     # bps->rate
     slip = exit_cfg.slippage_bps / 10000.0
 
-    for i in range(len(df)):
-        o,h,l,c,t = df.loc[i, ["open","high","low","close","time"]]
+    pos = state.pos
+    trades = state.trades
+
+    # 이전 구간 마지막 봉에서 넘어온 체결 처리 (다음 봉 시가 체결)
+    if state.pending_entry:
+        buy = float(op_[0]) * (1 + slip) * (1 + fee/2.0)
+        pos = {"entry_idx": state.bars, "entry_time": int(tm_[0]), "entry_price": buy, "age": 0, "peak": buy}
+        state.pending_entry = False
+    elif state.pending_exit:
+        trades.append(_sell_trade(pos, float(op_[0]), int(tm_[0]), state.pending_exit[0], fee, slip))
+        pos = None
+        state.pending_exit = None
+
+    for i in range(n):
+        h, c = hi_[i], cl_[i]
         # 1) 진입
-        if pos is None and entry_sig.iloc[i] == 1:
+        if pos is None and entry[i] == 1:
             j = i+1 if fill_next_bar else i
-            if j >= len(df): break
-            fill = float(df.loc[j, "open"])
+            if j >= n:
+                state.pending_entry = True
+                break
             # buy price with slippage+fee (one side)
-            buy = fill * (1 + slip) * (1 + fee/2.0)
+            buy = float(op_[j]) * (1 + slip) * (1 + fee/2.0)
             pos = {
-                "entry_idx": j,
-                "entry_time": int(df.loc[j, "time"]),
+                "entry_idx": state.bars + j,
+                "entry_time": int(tm_[j]),
                 "entry_price": buy,
                 "age": 0,
                 "peak": buy
@@ -64,7 +121,6 @@ def backtest_single(
             # 롱 포지션 피크는 intrabar 고가 기준이 안전
             pos["peak"] = max(pos["peak"], h)
 
-            # 교체 후
             exit_reasons = []
 
             # 1) 손절 (최우선)
@@ -79,7 +135,7 @@ def backtest_single(
                     exit_reasons.append("trailing_stop")
 
             # 3) 반대신호 청산
-            if exit_cfg.use_opposite and opp_exit_sig.iloc[i] == 1:
+            if exit_cfg.use_opposite and opp[i] == 1:
                 exit_reasons.append("opposite_signal")
 
             # 4) 시간 제한
@@ -93,39 +149,37 @@ def backtest_single(
 
             if exit_reasons:
                 j = i+1 if fill_next_bar else i
-                if j >= len(df):
-                    # 마지막 봉이면 종가로 강제 종료
-                    fill = float(c)
-                else:
-                    fill = float(df.loc[j, "open"])
-                # sell price with slippage+fee (one side)
-                sell = fill * (1 - slip) * (1 - fee/2.0)
-                pnl_pct = _pct(sell, pos["entry_price"])
-                trades.append({
-                    "entryTime": pos["entry_time"],
-                    "entryPrice": round(pos["entry_price"], 8),
-                    "exitTime": int(df.loc[j if j < len(df) else i, "time"]),
-                    "exitPrice": round(sell, 8),
-                    "pnlPct": round(pnl_pct, 4),
-                    "bars": pos["age"],
-                    "reason": exit_reasons[0]
-                })
+                if j >= n:
+                    # 구간 마지막 봉: 다음 구간이 있으면 그 시가, 없으면 finalize에서 종가로 체결
+                    state.pending_exit = exit_reasons
+                    break
+                trades.append(_sell_trade(pos, float(op_[j]), int(tm_[j]), exit_reasons[0], fee, slip))
                 pos = None
 
-    # 포지션 남았으면 마지막 바 종가로 강제 청산
-    if pos is not None:
-        last_o, last_c, last_t = float(df.iloc[-1]["open"]), float(df.iloc[-1]["close"]), int(df.iloc[-1]["time"])
-        sell = last_c * (1 - slip) * (1 - fee/2.0)
-        trades.append({
-            "entryTime": pos["entry_time"],
-            "entryPrice": round(pos["entry_price"], 8),
-            "exitTime": last_t,
-            "exitPrice": round(sell, 8),
-            "pnlPct": round(_pct(sell, pos["entry_price"]), 4),
-            "bars": pos["age"],
-            "reason": "force_close_at_end"
-        })
+    state.pos = pos
+    state.trades = trades
+    state.bars += n
+    state.last_close = float(cl_[-1])
+    state.last_time = int(tm_[-1])
+    return state
 
+def finalize_state(state: EngineState, exit_cfg: ExitConfig) -> Dict[str, Any]:
+    """
+    state를 변경하지 않고 '여기서 데이터가 끝났다'고 보고 결과(trades/stats) 생성.
+    미체결 청산은 마지막 봉 종가, 남은 포지션은 마지막 봉 종가로 강제 청산.
+    """
+    fee = exit_cfg.fee_bps / 10000.0
+    slip = exit_cfg.slippage_bps / 10000.0
+    trades = [dict(t) for t in state.trades]
+    if state.pending_exit and state.pos is not None:
+        # 마지막 봉이면 종가로 강제 종료
+        trades.append(_sell_trade(dict(state.pos), state.last_close, state.last_time, state.pending_exit[0], fee, slip))
+    elif state.pos is not None:
+        # 포지션 남았으면 마지막 바 종가로 강제 청산
+        trades.append(_sell_trade(dict(state.pos), state.last_close, state.last_time, "force_close_at_end", fee, slip))
+    return {"trades": trades, "stats": _trade_stats(trades)}
+
+def _trade_stats(trades: List[Dict[str, Any]]) -> Dict[str, Any]:
     # 통계
     if trades:
         pnl = [t["pnlPct"] for t in trades]
@@ -139,12 +193,26 @@ def backtest_single(
         win_rate = avg_win = avg_loss = profit_factor = 0.0
 
     return {
-        "trades": trades,
-        "stats": {
-            "trades": len(trades),
-            "winRate": round(win_rate, 2),
-            "avgWinPct": round(avg_win, 3),
-            "avgLossPct": round(avg_loss, 3),
-            "profitFactor": round(profit_factor, 3) if profit_factor != math.inf else None
-        }
+        "trades": len(trades),
+        "winRate": round(win_rate, 2),
+        "avgWinPct": round(avg_win, 3),
+        "avgLossPct": round(avg_loss, 3),
+        "profitFactor": round(profit_factor, 3) if profit_factor != math.inf else None
     }
+
+def backtest_single(
+    df: pd.DataFrame,
+    entry_sig: pd.Series,
+    opp_exit_sig: Optional[pd.Series],
+    exit_cfg: ExitConfig,
+    fill_next_bar=True
+) -> Dict[str, Any]:
+    """
+    룩어헤드 금지: 시그널 바 다음 바의 시가로 체결(가능하면).
+    df: columns = [time, open, high, low, close, volume] (time=epoch sec)
+    entry_sig, opp_exit_sig: bool/int Series(1/0)
+    """
+    if len(df) == 0:
+        return {"trades": [], "stats": _trade_stats([])}
+    state = run_segment(df, entry_sig, opp_exit_sig, exit_cfg, EngineState(), fill_next_bar=fill_next_bar)
+    return finalize_state(state, exit_cfg)
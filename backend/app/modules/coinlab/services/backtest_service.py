@@ -1,12 +1,22 @@
 # backend/services/backtest_service.py
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Iterator
 from pathlib import Path
 import numpy as np
-import json, os, time
+import json, os, threading, time, math
+from dataclasses import asdict
 import pandas as pd
 from datetime import datetime, timedelta
-from .backtest_engine import backtest_single, ExitConfig
-from .strategy_manager import resolve_signals_for_combo
+from collections import OrderedDict
+from .backtest_engine import backtest_single, ExitConfig, EngineState, run_segment, finalize_state
+from .strategy_manager import resolve_signals_for_combo, is_causal_strategy
+from .results_table import ResultsTable, explode_theme_map, group_stats, per_symbol_stats, DEFAULT_GROUP_METRICS
+from .candle_store import TF_SECONDS, list_parquets as _list_parquets, load_candles as _load_candles
+from .scenario_context import ScenarioContext, fingerprint
+from .scenario_planner import estimate_work, check_budget, record_throughput, ScenarioBudgetExceeded
+from .scenario_preview import build_strata, merge_strata, stratified_sample, stratified_estimate, PREVIEW_MAX_SAMPLE
+from .result_store import get_result_store
+from .latest_snapshot import latest_frames
+from .hot_tier import source_signature
 
 DATA_DIR = Path("/data")
 WATCHLISTS_DIR = DATA_DIR / "watchlists"
@@ -17,101 +27,64 @@ COND_FILE = MODULE_DATA_DIR / "condition_searches.json"
 # ── 상태 게이팅: 1단계 entry로 '열고', opp_exit 또는 time_limit로 '닫는' 레짐 마스크 생성
 def _build_state_mask(entry_sr, opp_exit_sr=None, time_limit_bars=None):
     # entry_sr, opp_exit_sr: 0/1 Series (df.index와 길이 동일)
-    import numpy as np
+    # 레짐: entry에서 열림(재진입 시 시작점 갱신), 반대신호 봉/시간제한 봉까지 포함 후 닫힘
     idx = entry_sr.index
-    entry = entry_sr.fillna(0).astype(int).to_numpy()
-    oppx = None if opp_exit_sr is None else opp_exit_sr.fillna(0).astype(int).to_numpy()
+    entry = entry_sr.fillna(0).astype(int).to_numpy() > 0
+    n = len(entry)
+    pos = np.arange(n)
+
+    # 각 봉 기준 마지막 entry 위치 (없으면 -1)
+    last_entry = np.maximum.accumulate(np.where(entry, pos, -1)) if n else pos
+    out = last_entry >= 0
+
+    # 반대신호: 마지막 entry 이후 ~ 직전 봉 사이에 반대신호가 있었으면 이미 닫힘
+    if opp_exit_sr is not None and n:
+        oppx = opp_exit_sr.fillna(0).astype(int).to_numpy() > 0
+        last_opp = np.maximum.accumulate(np.where(oppx, pos, -1))
+        last_opp_before = np.concatenate(([-1], last_opp[:-1]))
+        out &= last_opp_before < last_entry
+
+    # 시간제한: entry 봉 포함 tl개 봉까지만 열림
     tl = int(time_limit_bars) if time_limit_bars else None
-
-    open_flag = False
-    start_i = -1
-    out = np.zeros(len(entry), dtype=bool)
-
-    for i in range(len(entry)):
-        if entry[i] > 0:
-            open_flag = True
-            start_i = i
-        if open_flag:
-            out[i] = True
-            # 닫는 조건: 반대신호 or 시간제한
-            if oppx is not None and oppx[i] > 0:
-                open_flag = False
-                start_i = -1
-            elif tl is not None and start_i >= 0 and (i - start_i + 1) >= tl:
-                open_flag = False
-                start_i = -1
+    if tl is not None:
+        out &= (pos - last_entry) < max(tl, 1)
     return pd.Series(out, index=idx)
 
 
-def _list_parquets(symbol: str, interval: str) -> List[Path]:
-    base = DATA_DIR / symbol / interval
-    if not base.exists(): return []
-    return sorted(base.glob("*.parquet"))
+# ── 멀티 TF 정렬: dst 각 봉 → src에서 time <= dst인 마지막 봉 위치(ffill). 없으면 -1
+_ALIGN_CACHE: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_ALIGN_CACHE_MAX = 512
+_ALIGN_LOCK = threading.Lock()   # 스레드풀 워커 간 공유 → 조회/갱신/축출 직렬화
+
+def _times_fingerprint(times: np.ndarray) -> tuple:
+    n = len(times)
+    if n == 0:
+        return (0,)
+    return (n, int(times[0]), int(times[-1]), hash(times.tobytes()))
+
+def _align_index(src_times: np.ndarray, dst_times: np.ndarray) -> np.ndarray:
+    """searchsorted 기반 정렬 인덱스. (src, dst) 데이터 지문으로 캐시."""
+    key = (_times_fingerprint(src_times), _times_fingerprint(dst_times))
+    with _ALIGN_LOCK:
+        hit = _ALIGN_CACHE.get(key)
+        if hit is not None:
+            _ALIGN_CACHE.move_to_end(key)
+            return hit
+    idx = np.searchsorted(src_times, dst_times, side="right") - 1
+    with _ALIGN_LOCK:
+        _ALIGN_CACHE[key] = idx
+        while len(_ALIGN_CACHE) > _ALIGN_CACHE_MAX:
+            _ALIGN_CACHE.popitem(last=False)
+    return idx
+
+def _gather_aligned(src_times: np.ndarray, src_mask: np.ndarray, dst_times: np.ndarray) -> np.ndarray:
+    """src 마스크를 dst 타임라인으로 ffill 정렬 (reindex(method='ffill').fillna(False)와 동일)"""
+    idx = _align_index(src_times, dst_times)
+    out = np.zeros(len(dst_times), dtype=bool)
+    ok = idx >= 0
+    out[ok] = np.asarray(src_mask, dtype=bool)[idx[ok]]
+    return out
 
-def _load_candles(symbol: str, interval: str, start_ts: int = 0, end_ts: int | None = None) -> pd.DataFrame:
-    files = _list_parquets(symbol, interval)
-    if not files:
-        return pd.DataFrame(columns=["time","open","high","low","close","volume"])
-    dfs = []
-    for p in files:
-        try:
-            df = pd.read_parquet(p)
-            # ── PATCH: 'timestamp'도 허용하고, time이 datetime/ms여도 epoch-sec로 정규화 ──
-            if "time" not in df:
-                if "timestamp" in df:
-                    ts = df["timestamp"]
-                    # 1) datetime 타입
-                    if pd.api.types.is_datetime64_any_dtype(ts):
-                        ts_ns = ts.astype("int64", copy=False)
-                        df["time"] = (ts_ns // 1_000_000_000).astype("int64", copy=False)
-                    # 숫자 타입 (us/ms/s 추정)
-                    elif pd.api.types.is_numeric_dtype(ts):
-                        ts_num = ts.astype("int64", copy=False)
-                        if ts_num.max() > 10**14:         # us → s
-                            df["time"] = (ts_num // 1_000_000).astype("int64", copy=False)
-                        elif ts_num.max() > 10**12:       # ms → s
-                            df["time"] = (ts_num // 1_000).astype("int64", copy=False)
-                        else:                              # s
-                            df["time"] = ts_num.astype("int64", copy=False)
-                    # 3) 문자열 등 → 파싱
-                    else:
-                        parsed = pd.to_datetime(ts, errors="coerce", utc=True)
-                        # tz-aware → tz-naive 로 바꾼 뒤 int 변환
-                        if pd.api.types.is_datetime64tz_dtype(parsed.dtype):
-                            parsed = parsed.dt.tz_convert('UTC').dt.tz_localize(None)
-
-                        df["time"] = (parsed.astype("int64", copy=False) // 1_000_000_000).astype("int64", copy=False)
-                else:
-                    continue
-            else:
-                # time이 datetime이면 epoch-sec로 정규화
-                if pd.api.types.is_datetime64_any_dtype(df["time"]):
-                    t = df["time"]
-                    if pd.api.types.is_datetime64tz_dtype(t.dtype):
-                        t = t.dt.tz_convert('UTC').dt.tz_localize(None)
-                    df["time"] = (t.astype("int64", copy=False) // 1_000_000_000).astype("int64", copy=False)
-
-                        # 필수 컬럼 보정: volume 명칭 통일
-            if "volume" not in df and "vol" in df:
-                df = df.rename(columns={"vol": "volume"})
-            if "volume" not in df and "Volume" in df:
-                df = df.rename(columns={"Volume": "volume"})
-            # 필수 컬럼 체크 후 정렬
-            required = ["time","open","high","low","close","volume"]
-            if not all(col in df.columns for col in required):
-                continue
-            dfs.append(df[required])
-
-        except Exception:
-            continue
-    if not dfs:
-        return pd.DataFrame(columns=["time","open","high","low","close","volume"])
-    df = pd.concat(dfs, ignore_index=True).dropna().drop_duplicates(subset=["time"]).sort_values("time")
-    if start_ts:
-        df = df[df["time"] >= start_ts]
-    if end_ts:
-        df = df[df["time"] <= end_ts]
-    return df.reset_index(drop=True)
 
 def _period_key_to_start_ts(period_key: str | None, now_ts: int | None = None) -> int:
     now_ts = now_ts or int(time.time())
@@ -209,59 +182,262 @@ def _score_metric(stats: dict, key: str = "pf") -> float:
         return 0.0
 
 
+def _params_key(params) -> str:
+    """파라미터 dict → 캐시 키(순서 무관)"""
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+
+def _full_series_signals(df: pd.DataFrame, strategy_code: str, params, cache: dict):
+    """
+    전체 시계열에서 후보 파라미터 신호를 1회만 계산해 (entry, opp) ndarray로 캐시.
+    지표가 모두 인과적(과거 봉만 사용)이므로 폴드별로는 위치 슬라이스만 하면 된다.
+    """
+    key = _params_key(params)
+    hit = cache.get(key)
+    if hit is None:
+        e, o = resolve_signals_for_combo(df, strategy_code, params)
+        e_arr = (e.reindex(df.index).fillna(0).astype(int).to_numpy()
+                 if e is not None else np.zeros(len(df), dtype=int))
+        o_arr = o.reindex(df.index).fillna(0).astype(int).to_numpy() if o is not None else None
+        hit = (e_arr, o_arr)
+        cache[key] = hit
+    return hit
+
+
+def _fold_bounds(times: np.ndarray, start_ts: int, end_ts: int) -> Tuple[int, int]:
+    """정렬된 time 배열에서 [start_ts, end_ts] 구간의 위치 범위(lo, hi) 반환"""
+    lo = int(np.searchsorted(times, start_ts, side="left"))
+    hi = int(np.searchsorted(times, end_ts, side="right"))
+    return lo, hi
+
+
+def _eval_candidate(df_train: pd.DataFrame, entry_c, opp_c, exit_cfg_template, include_eot: bool) -> dict:
+    """후보 1개의 신호로 엔진을 돌려 train 지표(stats) 반환"""
+    entry_c = (pd.Series(entry_c, index=df_train.index).fillna(0).astype(int)
+               if entry_c is not None else pd.Series(0, index=df_train.index))
+    opp_c   = (pd.Series(opp_c,   index=df_train.index).fillna(0).astype(int)
+               if opp_c   is not None else None)
+
+    # 엔진 호출
+    r = backtest_single(
+        df_train,
+        entry_c,
+        opp_c,
+        ExitConfig(
+            use_opposite = exit_cfg_template.use_opposite,
+            stop_loss_pct = exit_cfg_template.stop_loss_pct,
+            take_profit_pct = exit_cfg_template.take_profit_pct,
+            time_limit_bars = exit_cfg_template.time_limit_bars,
+            trailing_pct = exit_cfg_template.trailing_pct,
+            fee_bps = exit_cfg_template.fee_bps,
+            slippage_bps = exit_cfg_template.slippage_bps,
+        ),
+        fill_next_bar=True
+    )
+    all_tr = _tag_eot(r.get("trades") or [], int(df_train["time"].iloc[-1]))
+    tr_for = [t for t in all_tr if include_eot or (t.get("reason") != "EOT")]
+    return _calc_metrics_from_trades(tr_for, int(df_train["time"].iloc[0]), int(df_train["time"].iloc[-1]))
+
+
 def _train_select_params(df_train: pd.DataFrame,
                          strategy_code: str,
                          param_grid: list[dict],
                          exit_cfg_template,
                          include_eot: bool,
-                         resolve_signals_func):
+                         resolve_signals_func,
+                         signal_provider=None,
+                         result_store=None,
+                         store_meta=None,
+                         signal_mode: str = "fold"):
     """
     train 구간에서 param_grid를 순회해 최고의 파라미터 하나를 고른다.
+    signal_provider(cand) → (entry ndarray, opp ndarray|None): df_train 길이에 맞춘
+    사전계산 신호(전체 시계열 1회 계산 후 슬라이스). 없으면 df_train에서 재계산.
+    result_store: 후보 평가 영구 저장소. (train 데이터 지문, 전략, 파라미터, 청산/비용, 신호 모드)가
+    같은 평가가 있으면 시뮬레이션 없이 재사용. store_meta = {symbol, tf, signal_fp(전체 시계열 신호일 때)}
+    signal_mode: 키의 신호 모드 — 실제 적용된 signalMode("full" | "fold"). 새 평가는 폴드 끝에 한 번에 기록.
     반환: (best_params or None, train_best_stats)
     """
     if not strategy_code or not param_grid:
         return None, {}
 
     best_params, best_score, best_stats = None, -1e18, {}
+    store_meta = dict(store_meta or {})
+    data_fp = fingerprint(df_train) if result_store is not None else None
+    exit_dict = asdict(exit_cfg_template)
+    pending = []
+
+    for cand in param_grid:
+        stats, key = None, None
+        if result_store is not None:
+            key = fingerprint(data_fp, store_meta.get("signal_fp"), strategy_code, cand, exit_dict,
+                              include_eot, signal_mode)
+            stats = result_store.get(key)
+
+        if stats is None:
+            # cand 파라미터로 신호 재생성 (또는 전체 시계열 신호 슬라이스)
+            if signal_provider is not None:
+                entry_c, opp_c = signal_provider(cand)
+            else:
+                entry_c, opp_c = resolve_signals_func(df_train, strategy_code, cand)
+            stats = _eval_candidate(df_train, entry_c, opp_c, exit_cfg_template, include_eot)
+            if result_store is not None:
+                pending.append((key, {
+                    **store_meta,
+                    "strategy": strategy_code,
+                    "train_start": int(df_train["time"].iloc[0]),
+                    "train_end": int(df_train["time"].iloc[-1]),
+                    "fee_bps": exit_cfg_template.fee_bps,
+                    "slippage_bps": exit_cfg_template.slippage_bps,
+                    "exit": exit_dict,
+                    "data_fp": data_fp,
+                }, cand, _score_metric(stats, "pf"), stats))
+
+        score  = _score_metric(stats, "pf")
+
+        if score > best_score:
+            best_score, best_params, best_stats = score, cand, stats
+
+    if pending:
+        result_store.put_many(pending)
+    return best_params, best_stats
 
-    t_idx = df_train["time"].astype("int64")
+
+def _train_select_params_incremental(df: pd.DataFrame,
+                                     train_hi: int,
+                                     strategy_code: str,
+                                     param_grid: list[dict],
+                                     exit_cfg_template,
+                                     include_eot: bool,
+                                     signal_cache: dict,
+                                     states: dict,
+                                     result_store=None,
+                                     store_meta=None):
+    """
+    anchored 전용: train 구간은 항상 df[0:train_hi]이므로 후보별 엔진 상태(states)를
+    이전 폴드에서 이어받아 새로 늘어난 봉만 시뮬레이션한다(전체 학습 비용 = 총 봉 수에 선형).
+    신호는 전체 시계열 1회 계산본(signal_cache)을 사용 → signalMode="full"과 같은 평가라
+    result_store 키도 "full" 모드로 공유한다. 저장소 적중 후보는 상태를 진행시키지 않고,
+    다음 폴드에서 필요할 때 마지막 상태부터 이어서 따라잡는다.
+    반환: (best_params or None, train_best_stats)
+    """
+    if not strategy_code or not param_grid or train_hi <= 0:
+        return None, {}
+
+    first_ts = int(df["time"].iloc[0])
+    last_ts = int(df["time"].iloc[train_hi - 1])
+    best_params, best_score, best_stats = None, -1e18, {}
+    store_meta = dict(store_meta or {})
+    data_fp = fingerprint(df.iloc[:train_hi].reset_index(drop=True)) if result_store is not None else None
+    exit_dict = asdict(exit_cfg_template)
+    pending = []
 
     for cand in param_grid:
-        # cand 파라미터로 신호 재생성
-        entry_c, opp_c = resolve_signals_func(df_train, strategy_code, cand)
-
-        entry_c = (pd.Series(entry_c, index=df_train.index).fillna(0).astype(int)
-                   if entry_c is not None else pd.Series(0, index=df_train.index))
-        opp_c   = (pd.Series(opp_c,   index=df_train.index).fillna(0).astype(int)
-                   if opp_c   is not None else None)
-
-        # 엔진 호출
-        r = backtest_single(
-            df_train,
-            entry_c,
-            opp_c,
-            ExitConfig(
-                use_opposite = exit_cfg_template.use_opposite,
-                stop_loss_pct = exit_cfg_template.stop_loss_pct,
-                take_profit_pct = exit_cfg_template.take_profit_pct,
-                time_limit_bars = exit_cfg_template.time_limit_bars,
-                trailing_pct = exit_cfg_template.trailing_pct,
-                fee_bps = exit_cfg_template.fee_bps,
-                slippage_bps = exit_cfg_template.slippage_bps,
-            ),
-            fill_next_bar=True
-        )
-        all_tr = _tag_eot(r.get("trades") or [], int(df_train["time"].iloc[-1]))
-        tr_for = [t for t in all_tr if include_eot or (t.get("reason") != "EOT")]
-        stats  = _calc_metrics_from_trades(tr_for, int(df_train["time"].iloc[0]), int(df_train["time"].iloc[-1]))
+        stats, store_key = None, None
+        if result_store is not None:
+            store_key = fingerprint(data_fp, store_meta.get("signal_fp"), strategy_code, cand, exit_dict,
+                                    include_eot, "full")
+            stats = result_store.get(store_key)
+
+        if stats is None:
+            key = _params_key(cand)
+            st = states.get(key)
+            if st is None or st.bars > train_hi:
+                st = EngineState()
+            if st.bars < train_hi:
+                e_arr, o_arr = _full_series_signals(df, strategy_code, cand, signal_cache)
+                lo = st.bars
+                st = run_segment(df.iloc[lo:train_hi], e_arr[lo:train_hi],
+                                 (o_arr[lo:train_hi] if o_arr is not None else None),
+                                 exit_cfg_template, st, fill_next_bar=True)
+                states[key] = st
+
+            r = finalize_state(st, exit_cfg_template)
+            all_tr = _tag_eot(r.get("trades") or [], last_ts)
+            tr_for = [t for t in all_tr if include_eot or (t.get("reason") != "EOT")]
+            stats  = _calc_metrics_from_trades(tr_for, first_ts, last_ts)
+            if result_store is not None:
+                pending.append((store_key, {
+                    **store_meta,
+                    "strategy": strategy_code,
+                    "train_start": first_ts,
+                    "train_end": last_ts,
+                    "fee_bps": exit_cfg_template.fee_bps,
+                    "slippage_bps": exit_cfg_template.slippage_bps,
+                    "exit": exit_dict,
+                    "data_fp": data_fp,
+                }, cand, _score_metric(stats, "pf"), stats))
         score  = _score_metric(stats, "pf")
 
         if score > best_score:
             best_score, best_params, best_stats = score, cand, stats
 
+    if pending:
+        result_store.put_many(pending)
     return best_params, best_stats
 
 
+def _train_select_params_halving(df_train: pd.DataFrame,
+                                 strategy_code: str,
+                                 param_grid: list[dict],
+                                 exit_cfg_template,
+                                 include_eot: bool,
+                                 resolve_signals_func,
+                                 signal_provider=None,
+                                 eta: float = 3.0,
+                                 min_fraction: float = 0.25,
+                                 min_bars: int = 50):
+    """
+    Successive halving: 전 후보를 train 앞부분(min_fraction)으로 평가 → 상위 1/eta만 남기고
+    평가 구간을 eta배로 늘려 재평가, 전체 구간에 도달할 때까지 반복.
+    반환: (best_params or None, train_best_stats, search_info)
+    search_info에는 실제 엔진 실행 수/시뮬레이션 봉 수와 전수 탐색 대비 절감량을 담는다.
+    """
+    n = len(df_train)
+    info = {"mode": "halving", "candidates": len(param_grid or []), "engineRuns": 0,
+            "barsSimulated": 0, "exhaustiveRuns": len(param_grid or []),
+            "exhaustiveBars": len(param_grid or []) * n}
+    if not strategy_code or not param_grid or n == 0:
+        return None, {}, info
+
+    eta = max(float(eta), 2.0)
+    frac = min(max(float(min_fraction), 0.0), 1.0)
+    survivors = list(enumerate(param_grid))
+    scored = []
+    while True:
+        m = n if len(survivors) <= 1 else min(n, max(int(min_bars), int(n * frac)))
+        df_sub = df_train.iloc[:m]
+        scored = []
+        for order, cand in survivors:
+            if signal_provider is not None:
+                e_arr, o_arr = signal_provider(cand)
+                entry_c = e_arr[:m]
+                opp_c = o_arr[:m] if o_arr is not None else None
+            else:
+                entry_c, opp_c = resolve_signals_func(df_sub, strategy_code, cand)
+            stats = _eval_candidate(df_sub, entry_c, opp_c, exit_cfg_template, include_eot)
+            scored.append((_score_metric(stats, "pf"), order, cand, stats))
+            info["engineRuns"] += 1
+            info["barsSimulated"] += m
+        if m >= n:
+            break
+        # 점수 내림차순(동점은 원래 그리드 순서) → 상위 1/eta 생존
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        keep = max(1, int(math.ceil(len(scored) / eta)))
+        survivors = [(order, cand) for _, order, cand, _ in scored[:keep]]
+        frac *= eta
+
+    best_score, best_params, best_stats = -1e18, None, {}
+    for score, _, cand, stats in sorted(scored, key=lambda x: x[1]):
+        if score > best_score:
+            best_score, best_params, best_stats = score, cand, stats
+
+    full_equiv = info["barsSimulated"] / n
+    info["fullRunEquivalents"] = round(full_equiv, 2)
+    info["savedRuns"] = round(info["exhaustiveRuns"] - full_equiv, 2)
+    return best_params, best_stats, info
+
+
 
 
 def _calc_metrics_from_trades(trades: list, first_ts: int, last_ts: int) -> dict:
@@ -467,18 +643,68 @@ def _entry_series_from_saved_combo(df: pd.DataFrame, combo_name: str):
     return None if combined is None else combined.fillna(False).astype(int)
 
 
-def run_scenario_service(payload: Dict[str, Any]) -> Dict[str, Any]:
+def _symbol_liquidity(symbols: List[str], days: int = 30) -> Dict[str, float]:
+    """
+    최근 days일 일평균 거래대금(close×volume). 일봉이 없으면 0.
+    유니버스 전체를 최신 봉 스냅샷(파일 1개)에서 읽고, 스냅샷에 없는 심볼만 최근 구간을 로드한다.
+    """
+    since = int(time.time()) - days * 24 * 3600
+    try:
+        frames = latest_frames("1d", set(symbols))
+    except Exception:
+        frames = {}
+    liq = {}
+    for sym in symbols:
+        d = frames.get(sym)
+        if d is None:
+            d = _load_candles(sym, "1d", since)
+        d = d[d["time"] >= since]
+        liq[sym] = float((d["close"] * d["volume"]).mean()) if len(d) else 0.0
+    return liq
+
+
+def _order_symbols(symbols: List[str], order: str) -> List[str]:
+    """deadline 실행 시 중요한 심볼부터: liquidity = 최근 거래대금 내림차순"""
+    order = (order or "").strip().lower()
+    if order == "alpha":
+        return sorted(symbols)
+    if order != "liquidity":
+        return list(symbols)
+    liq = _symbol_liquidity(symbols)
+    return sorted(symbols, key=lambda s: -liq[s])   # 안정 정렬: 동률은 요청 순서 유지
+
+
+def iter_scenario_records(payload: Dict[str, Any], ctx: ScenarioContext | None = None,
+                          estimate: Dict[str, Any] | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    시나리오 실행을 레코드 스트림으로 생성 (NDJSON 스트리밍/일괄 응답 공용).
+    - {"type": "meta"}    : 시작 즉시 1회 (심볼/체인모드/프로파일)
+    - {"type": "step"}    : 단계 시작 (tf, combo, periodKey, exit, isRegime)
+    - {"type": "run"}     : (step, symbol) 1건 완료마다 (run = {symbol, tf, profiles})
+    - {"type": "summary"} : 마지막 1회 (summary, groups, profilesMeta)
+    완료된 run은 보관하지 않으므로 테마 집계/합계만 누적된다(메모리 = 유니버스 크기와 무관).
+    ctx: 여러 시나리오가 캔들/신호 계산을 공유할 때 전달(run_scenario_batch). 없으면 요청 단위로 생성.
+    estimate: 호출부(라우터/배치)가 이미 추정·예산 검사한 결과. 있으면 다시 추정하지 않는다.
+    """
     # 새 옵션 (기본값)
     wf = payload.get("walkForward") or {}      # 예: {"folds": 4, "scheme": "rolling"}
     folds = int(wf.get("folds", 0) or 0)
     scheme = str(wf.get("scheme") or "rolling")
+    # 신호 계산 범위: "fold"(기본, 폴드 슬라이스마다 재계산) | "full"(전체 시계열 1회 계산 후 슬라이스)
+    signal_mode = str(wf.get("signalMode") or "fold").strip().lower()
+    # anchored: 후보별 엔진 상태를 폴드 간 이어받아 새 구간만 학습 (walkForward.incremental=true로 켬).
+    # 켜면 train 신호가 폴드 슬라이스 재계산이 아닌 전체 시계열 신호(signalMode="full"과 동일)가 된다
+    incremental_train = (scheme.strip().lower() == "anchored" and bool(wf.get("incremental", False)))
 
     profiles = payload.get("costProfiles") or []  # 예: [{"name":"base","fee_bps":10,"slippage_bps":5}, ...]
     if not profiles:
         profiles = [{"name":"base","fee_bps":10.0,"slippage_bps":5.0}]  # 기존 기본값(엔진 전달값)과 동일
     include_eot = bool(payload.get("includeEoTInStats", True))
 
-    group_by = str(payload.get("groupBy") or "").lower()  # "theme" 등
+    group_by = str(payload.get("groupBy") or "").lower()  # "theme" | "tf" | "step" | "symbol"
+    group_profile = payload.get("groupProfile")            # 기본: base(없으면 첫 프로파일), "all": 전 프로파일
+    group_metrics = payload.get("groupMetrics") or None    # 기본: ["pf", "winRate", "mdd"]
+    include_table = bool(payload.get("resultsTable"))      # 평면 결과 테이블(컬럼 dict)을 응답에 포함
 
     limit_trades = payload.get("limitTrades", 200)
     try:
@@ -493,30 +719,79 @@ def run_scenario_service(payload: Dict[str, Any]) -> Dict[str, Any]:
 
     symbols = _resolve_symbols(scope, watchlist_name, client_symbols)
 
+    # 요청 단위 공유 컨텍스트: (symbol, tf) 캔들 1회 로드/리샘플 + 신호 계산 메모
+    # reuse=false: 요청 간 노드 캐시를 쓰지 않음 (이 요청 안에서만 공유)
+    ctx = ctx or ScenarioContext(reuse=bool(payload.get("reuse", True)))
+    candles = ctx.candles
+
+    # 실행 전 작업량 추정(파일 메타데이터만) → 예산 초과 시 ScenarioBudgetExceeded
+    if estimate is None:
+        estimate = estimate_work(steps, symbols,
+                                 [_period_key_to_start_ts(s.get("periodKey") or "12m", ctx.now_ts) for s in steps],
+                                 profiles, wf)
+        check_budget(estimate, payload)
+    t_start = time.time()
+
+    # 후보 평가 영구 저장소 (resultStore=false로 끔)
+    result_store = get_result_store() if payload.get("resultStore", True) else None
+
+    # deadlineMs: 마감 이후엔 새 심볼/폴드를 시작하지 않고 끝난 것만 반환(partial)
+    try:
+        deadline_ms = float(payload.get("deadlineMs") or 0)
+    except (TypeError, ValueError):
+        deadline_ms = 0.0
+    deadline = (t_start + deadline_ms / 1000.0) if deadline_ms > 0 else None
+    skipped: Dict[int, List[str]] = {}
+    partial_runs = 0
+
+    def _past_deadline() -> bool:
+        return deadline is not None and time.time() >= deadline
+
+    # 심볼 처리 순서: "liquidity"(최근 거래대금 큰 순) | "alpha" | 기본(요청 순서)
+    symbols = _order_symbols(symbols, str(payload.get("symbolOrder") or ""))
+
     # 체이닝 모드: 기본은 병렬(parallel), 요청에서 "chainMode": "gated" 이면 바(봉) AND 게이팅
     chain_mode = str((payload.get("chainMode") or "parallel")).strip().lower()
 
     # 이벤트-AND용 누적(이전 답변에서 쓰던 것 유지)
-    gating_prev_masks: Dict[str, pd.Series] = {}
+    gating_prev_masks: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
 
-    # 상태 게이팅용: 1단계 레짐 마스크(심볼별, 'time'을 인덱스로 보관)
-    state_masks_by_symbol: Dict[str, Dict[int, pd.Series]] = {}
+    # 상태 게이팅용: 단계별 레짐 마스크(심볼별, (time 배열, bool 배열)로 보관)
+    state_masks_by_symbol: Dict[str, Dict[int, Tuple[np.ndarray, np.ndarray]]] = {}
     last_index = len(steps) - 1
 
 
-    results = []
     total_trades = 0
+    # 집합 분석용 평면 테이블 (step, tf, symbol, profile, fold, 지표...)
+    table = ResultsTable()
+    # halving 탐색 리포트: 전수 탐색 대비 엔진 실행/봉 수 누적
+    search_totals = {"engineRuns": 0, "barsSimulated": 0, "exhaustiveRuns": 0, "exhaustiveBars": 0,
+                     "fullRunEquivalents": 0.0, "savedRuns": 0.0}
 
     total_steps = len(steps)
 
+    yield {
+        "type": "meta",
+        "used_symbols": symbols,
+        "steps": total_steps,
+        "chainMode": chain_mode,
+        "profilesMeta": [p["name"] for p in profiles],
+        "estimate": estimate,
+    }
+
     for step_index, step in enumerate(steps):
         tf = step.get("tf","1d")
         combo = step.get("comboName") or None
         strategy_code = step.get("strategyCode") or None  # [NEW]
         strategy_params = step.get("strategyParams") or {}
+        # 파라미터 탐색 방식: "grid"(기본, 전수) | "halving"(successive halving, 예산형)
+        search_cfg = step.get("strategyParamsSearch") or {}
+        search_mode = str(search_cfg.get("mode") or "grid").strip().lower()
 
         period_key = step.get("periodKey") or "12m"
-        start_ts = _period_key_to_start_ts(period_key)
+        start_ts = _period_key_to_start_ts(period_key, ctx.now_ts)
+        # 전략 신호 워밍업: "frame"(기본, 구간 프레임만으로 계산) | "history"(저장 시계열 전체에서 계산 후 구간 슬라이스)
+        signal_warmup = "history" if str(step.get("signalWarmup") or "").strip().lower() == "history" else "frame"
 
         exit_cfg_raw = (step.get("exit") or {})
         exit_cfg = ExitConfig(
@@ -531,55 +806,79 @@ def run_scenario_service(payload: Dict[str, Any]) -> Dict[str, Any]:
 
         print("STEP", step_index, "tf", tf, "period", period_key, "combo", combo, "strategy", strategy_code, "symbols", len(symbols))
 
-        step_runs = []
+        yield {
+            "type": "step",
+            "stepIndex": step_index,
+            "tf": tf,
+            "combo": combo,
+            "periodKey": period_key,
+            "exit": exit_cfg_raw,
+            "isRegime": (chain_mode == "state" and step_index < (total_steps - 1)),
+        }
         for sym in symbols:
-            df = _load_candles(sym, tf, start_ts)
+            if _past_deadline():
+                skipped.setdefault(step_index, []).append(sym)
+                continue
+            df = candles.get(sym, tf, start_ts)
             if len(df) < 50:
                 continue
+            # 노드 키의 뿌리: 캔들 데이터 해시 (parquet이 바뀌면 하위 노드 전부 재계산)
+            data_fp = fingerprint(sym, tf, df)
 
-            # ✅ 엔트리/반대신호 생성 (전략/콤보를 각각 계산)
-            entry, opp_exit = None, None
+            # ✅ 엔트리/반대신호 생성 (전략/콤보를 각각 계산) — 같은 입력은 컨텍스트에서 재사용
             require_both = bool(step.get("requireBoth"))
 
-            # 개별 신호 계산
-            strategy_entry, strategy_opp = None, None
-            combo_entry, combo_opp = None, None
-
-            if strategy_code:
-                strategy_entry, strategy_opp = resolve_signals_for_combo(df, strategy_code, strategy_params)
-
-            if combo:
-                combo_entry = _entry_series_from_saved_combo(df, combo)
-                if exit_cfg.use_opposite and combo_entry is not None:
-                    # 콤보 해제 순간(1→0)을 반대신호로 사용 (옵션 켜진 경우)
-                    combo_opp = ((combo_entry.shift(1) == 1) & (combo_entry == 0)).astype(int)
-
-            # 혼합 로직
-            if require_both:
-                # 둘 다 있어야 진입. 하나라도 없으면 0
-                if (strategy_entry is not None) and (combo_entry is not None):
-                    entry = ((strategy_entry.astype(bool)) & (combo_entry.astype(bool))).astype(int)
-                    # 반대신호는 전략 쪽이 있으면 우선 사용, 없으면 콤보 opp 사용
-                    opp_exit = strategy_opp if strategy_opp is not None else combo_opp
-                else:
-                    entry = pd.Series(0, index=df.index)
-                    opp_exit = None
-            else:
-                # 기존 우선순위 유지: 전략 있으면 전략, 없으면 콤보
-                if strategy_entry is not None:
-                    entry, opp_exit = strategy_entry, strategy_opp
-                elif combo_entry is not None:
-                    entry, opp_exit = combo_entry, combo_opp
+            def _step_signals():
+                entry, opp_exit = None, None
+
+                # 개별 신호 계산
+                strategy_entry, strategy_opp = None, None
+                combo_entry, combo_opp = None, None
+
+                if strategy_code:
+                    strategy_entry, strategy_opp = resolve_signals_for_combo(df, strategy_code, strategy_params,
+                                                                             warmup=signal_warmup)
+
+                if combo:
+                    combo_entry = _entry_series_from_saved_combo(df, combo)
+                    if exit_cfg.use_opposite and combo_entry is not None:
+                        # 콤보 해제 순간(1→0)을 반대신호로 사용 (옵션 켜진 경우)
+                        combo_opp = ((combo_entry.shift(1) == 1) & (combo_entry == 0)).astype(int)
+
+                # 혼합 로직
+                if require_both:
+                    # 둘 다 있어야 진입. 하나라도 없으면 0
+                    if (strategy_entry is not None) and (combo_entry is not None):
+                        entry = ((strategy_entry.astype(bool)) & (combo_entry.astype(bool))).astype(int)
+                        # 반대신호는 전략 쪽이 있으면 우선 사용, 없으면 콤보 opp 사용
+                        opp_exit = strategy_opp if strategy_opp is not None else combo_opp
+                    else:
+                        entry = pd.Series(0, index=df.index)
+                        opp_exit = None
                 else:
-                    entry, opp_exit = pd.Series(0, index=df.index), None
+                    # 기존 우선순위 유지: 전략 있으면 전략, 없으면 콤보
+                    if strategy_entry is not None:
+                        entry, opp_exit = strategy_entry, strategy_opp
+                    elif combo_entry is not None:
+                        entry, opp_exit = combo_entry, combo_opp
+                    else:
+                        entry, opp_exit = pd.Series(0, index=df.index), None
 
-            # 3) 둘 다 없거나 인식 불가 → 엔트리 없음(0)
-            if entry is None:
-                entry = pd.Series(0, index=df.index)
-            entry = entry.reindex(df.index).fillna(0).astype(int)
-            
-            if opp_exit is not None:
-                opp_exit = opp_exit.reindex(df.index).fillna(0).astype(int)
+                # 3) 둘 다 없거나 인식 불가 → 엔트리 없음(0)
+                if entry is None:
+                    entry = pd.Series(0, index=df.index)
+                entry = entry.reindex(df.index).fillna(0).astype(int)
+
+                if opp_exit is not None:
+                    opp_exit = opp_exit.reindex(df.index).fillna(0).astype(int)
+                return entry, opp_exit
+
+            # history 워밍업은 프레임 밖 봉에도 의존 → 원본 서명까지 키에 포함
+            sig_key = fingerprint(data_fp, strategy_code, strategy_params, combo,
+                                  (_load_saved_combo_item(combo) if combo else None),
+                                  require_both, exit_cfg.use_opposite, signal_warmup,
+                                  (source_signature(sym, tf) if signal_warmup == "history" and strategy_code else None))
+            entry, opp_exit = ctx.node("signals", sig_key, _step_signals, owner=sym)
             # ✅ 폴드 구간 정렬을 위해 'time' 기준 시그널 시리즈를 준비
             t_idx = df["time"].astype("int64")
             entry_by_time = pd.Series(entry.to_numpy(), index=t_idx)
@@ -587,31 +886,30 @@ def run_scenario_service(payload: Dict[str, Any]) -> Dict[str, Any]:
             if opp_exit is not None:
                 opp_by_time = pd.Series(opp_exit.to_numpy(), index=t_idx)
 
+            # 체인 마스크는 (time 배열, bool 배열)로 보관 → 단계 간 정렬은 정수 gather
+            times_arr = df["time"].to_numpy(dtype="int64")
+
             # gated 모드 초기 시드: 0단계 엔트리를 기준으로 누적 AND 시작
             if chain_mode == "gated" and step_index == 0:
-                gating_prev_masks[sym] = (entry > 0)
+                gating_prev_masks[sym] = (times_arr, (entry > 0).to_numpy())
 
 
             if chain_mode == "state" and step_index < last_index:
                 # ① 레짐 마스크 생성 (반대신호 옵션이 OFF면 opp_exit_sr=None)
-                regime_mask_local = _build_state_mask(
-                    entry_sr=entry,
-                    opp_exit_sr=(opp_exit if exit_cfg.use_opposite else None),
-                    time_limit_bars=exit_cfg.time_limit_bars
-                )
-
-                # ② 멀티 TF 정렬을 위해 'time'(epoch-sec)을 인덱스로 갖는 Series로 변환
-                regime_mask_time = pd.Series(
-                    regime_mask_local.astype(bool).to_numpy(),
-                    index=df["time"].astype("int64")
-                )
-
-                # ③ 심볼별 단계 dict에 저장
+                regime_mask_local = ctx.node(
+                    "mask", fingerprint(sig_key, exit_cfg.use_opposite, exit_cfg.time_limit_bars),
+                    lambda: _build_state_mask(
+                        entry_sr=entry,
+                        opp_exit_sr=(opp_exit if exit_cfg.use_opposite else None),
+                        time_limit_bars=exit_cfg.time_limit_bars
+                    ), owner=sym)
+
+                # ② 심볼별 단계 dict에 (time, mask) 저장 — 멀티 TF 정렬은 마지막 단계에서
                 d = state_masks_by_symbol.get(sym) or {}
-                d[step_index] = regime_mask_time
+                d[step_index] = (times_arr, regime_mask_local.astype(bool).to_numpy())
                 state_masks_by_symbol[sym] = d
 
-                # ④ 레짐 단계는 매매 금지 → 이 단계의 entry는 0
+                # ③ 레짐 단계는 매매 금지 → 이 단계의 entry는 0
                 entry = (entry * 0).astype(int)
 
             if chain_mode == "state" and step_index == last_index:
@@ -619,251 +917,543 @@ def run_scenario_service(payload: Dict[str, Any]) -> Dict[str, Any]:
                 if not prev_masks:
                     entry = (entry * 0).astype(int)
                 else:
-                    t = df["time"].astype("int64")
                     combined = None
-                    for mask in (prev_masks[k] for k in sorted(prev_masks.keys())):
-                        aligned = mask.reindex(t, method="ffill").fillna(False).to_numpy()
+                    for m_times, m_mask in (prev_masks[k] for k in sorted(prev_masks.keys())):
+                        aligned = _gather_aligned(m_times, m_mask, times_arr)
                         combined = aligned if combined is None else (combined & aligned)
                     entry = pd.Series(((entry > 0).to_numpy() & combined).astype(int), index=df.index)
 
-            # ── (B) 이벤트-AND 게이팅: 이전 단계 엔트리와 AND
+            # ── (B) 이벤트-AND 게이팅: 이전 단계 엔트리와 AND (이전 단계 TF → 현재 TF로 정렬)
             if chain_mode == "gated" and step_index > 0:
-                prev_mask = gating_prev_masks.get(sym)
-                if prev_mask is not None:
-                    entry = ((entry > 0) & (prev_mask.astype(bool))).astype(int)
+                prev = gating_prev_masks.get(sym)
+                if prev is not None:
+                    aligned = _gather_aligned(prev[0], prev[1], times_arr)
+                    cur_entry_mask = (entry > 0).to_numpy() & aligned
+                    entry = pd.Series(cur_entry_mask.astype(int), index=df.index)
                     # 누적 갱신(이번 단계 엔트리도 다음 단계 기준이 됨)
-                    cur_entry_mask = (entry > 0)
-                    gating_prev_masks[sym] = (gating_prev_masks[sym] & cur_entry_mask) if sym in gating_prev_masks else cur_entry_mask
-            # 실제 백테스트 실행 (엔진 그대로)
-            # === 비용 시나리오 × 워크포워드 ===
-           # ... 앞부분 동일 (심볼 루프 시작, df 로드, entry/opp 계산 등) ...
-
-            # 폴드 경계 계산
-            first_ts = int(df["time"].iloc[0]); last_ts = int(df["time"].iloc[-1])
-            folds_plan = _split_folds_by_time(first_ts, last_ts, folds, scheme) if folds > 0 else [(None,None,first_ts,last_ts)]
-
-            sym_out = {"symbol": sym, "tf": tf, "profiles": []}
-            for prof in profiles:
-                prof_name = str(prof.get("name") or "base")
-                fee_bps = float(prof.get("fee_bps") or 10.0)
-                slp_bps = float(prof.get("slippage_bps") or 5.0)
-                prof_steps = []
-                prof_total_trades = 0
-
-                for (train_start, train_end, test_start, test_end) in folds_plan:
-                    dff_test  = df[(df["time"] >= test_start) & (df["time"] <= test_end)].reset_index(drop=True)
-
-                    # --- [핵심] 폴드별 튜닝 단계 (strategyParamsGrid가 있을 때만) ---
-                    best_params = None
-                    train_stats = {}
-                    if strategy_code:
-                        param_grid = step.get("strategyParamsGrid") or []
-                        if param_grid and (train_start is not None) and (train_end is not None):
-                            dff_train = df[(df["time"] >= train_start) & (df["time"] <= train_end)].reset_index(drop=True)
-                            if len(dff_train) >= 50:
-                                exit_cfg_local_tmpl = ExitConfig(
-                                    use_opposite = exit_cfg.use_opposite,
-                                    stop_loss_pct = exit_cfg.stop_loss_pct,
-                                    take_profit_pct = exit_cfg.take_profit_pct,
-                                    time_limit_bars = exit_cfg.time_limit_bars,
-                                    trailing_pct = exit_cfg.trailing_pct,
-                                    fee_bps = fee_bps,
-                                    slippage_bps = slp_bps,
-                                )
-                                best_params, train_stats = _train_select_params(
-                                    dff_train,
-                                    strategy_code,
-                                    param_grid,
-                                    exit_cfg_local_tmpl,
-                                    include_eot,
-                                    resolve_signals_for_combo  # 함수 주입
+                    gating_prev_masks[sym] = (times_arr, cur_entry_mask)
+            # ── 엔진/지표 노드: 최종 entry/opp(체인 게이팅 반영) + 청산/비용/WF 설정이 같으면 재사용
+            run_key = fingerprint(data_fp, strategy_code, entry.to_numpy(),
+                                  (opp_exit.to_numpy() if opp_exit is not None else None),
+                                  asdict(exit_cfg), profiles, wf, step.get("strategyParamsGrid"), search_cfg,
+                                  include_eot, limit_trades)
+
+            def _run_symbol():
+                sym_search = {k: 0 for k in search_totals}
+                # 실제 백테스트 실행 (엔진 그대로)
+                # === 비용 시나리오 × 워크포워드 ===
+               # ... 앞부분 동일 (심볼 루프 시작, df 로드, entry/opp 계산 등) ...
+
+                # 폴드 경계 계산
+                first_ts = int(df["time"].iloc[0]); last_ts = int(df["time"].iloc[-1])
+                folds_plan = _split_folds_by_time(first_ts, last_ts, folds, scheme) if folds > 0 else [(None,None,first_ts,last_ts)]
+
+                # signalMode="full": 후보별 신호를 전체 시계열에서 1회 계산(프로파일/폴드 공유)
+                full_signals = (signal_mode == "full" and bool(strategy_code) and is_causal_strategy(strategy_code))
+                use_incremental = (incremental_train and search_mode != "halving"
+                                   and bool(strategy_code) and is_causal_strategy(strategy_code))
+                cand_signal_cache: Dict[str, tuple] = ctx.shared_dict("candSignals", (sym, tf, start_ts, strategy_code))
+
+                sym_out = {"symbol": sym, "tf": tf, "profiles": []}
+                for prof in profiles:
+                    prof_name = str(prof.get("name") or "base")
+                    anchored_states: Dict[str, EngineState] = {}   # 후보별 엔진 상태(프로파일 비용별)
+                    fee_bps = float(prof.get("fee_bps") or 10.0)
+                    slp_bps = float(prof.get("slippage_bps") or 5.0)
+                    prof_steps = []
+                    prof_total_trades = 0
+
+                    for (train_start, train_end, test_start, test_end) in folds_plan:
+                        if _past_deadline():
+                            sym_out["partial"] = True
+                            break
+                        dff_test  = df[(df["time"] >= test_start) & (df["time"] <= test_end)].reset_index(drop=True)
+
+                        # --- [핵심] 폴드별 튜닝 단계 (strategyParamsGrid가 있을 때만) ---
+                        best_params = None
+                        train_stats = {}
+                        search_info = None
+                        if strategy_code:
+                            param_grid = step.get("strategyParamsGrid") or []
+                            if param_grid and (train_start is not None) and (train_end is not None):
+                                dff_train = df[(df["time"] >= train_start) & (df["time"] <= train_end)].reset_index(drop=True)
+                                if len(dff_train) >= 50:
+                                    exit_cfg_local_tmpl = ExitConfig(
+                                        use_opposite = exit_cfg.use_opposite,
+                                        stop_loss_pct = exit_cfg.stop_loss_pct,
+                                        take_profit_pct = exit_cfg.take_profit_pct,
+                                        time_limit_bars = exit_cfg.time_limit_bars,
+                                        trailing_pct = exit_cfg.trailing_pct,
+                                        fee_bps = fee_bps,
+                                        slippage_bps = slp_bps,
+                                    )
+                                    provider = None
+                                    if not full_signals and search_mode != "halving":
+                                        # 폴드 train 신호: 프로파일/시나리오 간 동일 → 메모
+                                        def provider(cand, _df=dff_train, _tr=(train_start, train_end)):
+                                            return ctx.memo("foldSignals", (sym, tf, start_ts, strategy_code, _tr, _params_key(cand)),
+                                                            lambda: resolve_signals_for_combo(_df, strategy_code, cand))
+                                    if full_signals:
+                                        tr_lo, tr_hi = _fold_bounds(times_arr, train_start, train_end)
+                                        def provider(cand, _lo=tr_lo, _hi=tr_hi):
+                                            e_arr, o_arr = _full_series_signals(df, strategy_code, cand, cand_signal_cache)
+                                            return e_arr[_lo:_hi], (o_arr[_lo:_hi] if o_arr is not None else None)
+                                    if use_incremental:
+                                        _, tr_hi = _fold_bounds(times_arr, train_start, train_end)
+                                        best_params, train_stats = _train_select_params_incremental(
+                                            df,
+                                            tr_hi,
+                                            strategy_code,
+                                            param_grid,
+                                            exit_cfg_local_tmpl,
+                                            include_eot,
+                                            cand_signal_cache,
+                                            anchored_states,
+                                            result_store=result_store,
+                                            store_meta={"symbol": sym, "tf": tf, "signal_fp": data_fp}
+                                        )
+                                    elif search_mode == "halving":
+                                        best_params, train_stats, search_info = _train_select_params_halving(
+                                            dff_train,
+                                            strategy_code,
+                                            param_grid,
+                                            exit_cfg_local_tmpl,
+                                            include_eot,
+                                            resolve_signals_for_combo,
+                                            signal_provider=provider,
+                                            eta=float(search_cfg.get("eta", 3) or 3),
+                                            min_fraction=float(search_cfg.get("minFraction", 0.25) or 0.25),
+                                            min_bars=int(search_cfg.get("minBars", 50) or 50),
+                                        )
+                                        for k in sym_search:
+                                            sym_search[k] += search_info.get(k, 0)
+                                    else:
+                                        best_params, train_stats = _train_select_params(
+                                            dff_train,
+                                            strategy_code,
+                                            param_grid,
+                                            exit_cfg_local_tmpl,
+                                            include_eot,
+                                            resolve_signals_for_combo,  # 함수 주입
+                                            signal_provider=provider,
+                                            result_store=result_store,
+                                            store_meta={"symbol": sym, "tf": tf,
+                                                        "signal_fp": (data_fp if full_signals else None)},
+                                            signal_mode=("full" if full_signals else "fold")
+                                        )
+
+                        if len(dff_test) < 50:
+                            prof_steps.append({"fold": [train_start, train_end, test_start, test_end],
+                                            "trades": [], "stats": {}, "opt": {"bestParams": best_params, "trainStats": train_stats, "search": search_info}})
+                            continue
+
+                        # --- [검증] 최종 파라미터로 test 구간 시그널 생성 ---
+                        if strategy_code and best_params is not None and full_signals:
+                            # 전체 시계열 신호를 test 구간 위치로 슬라이스 (폴드 시작 워밍업 NaN 없음)
+                            te_lo, te_hi = _fold_bounds(times_arr, test_start, test_end)
+                            e_arr, o_arr = _full_series_signals(df, strategy_code, best_params, cand_signal_cache)
+                            entry_test = e_arr[te_lo:te_hi]
+                            opp_test = o_arr[te_lo:te_hi] if o_arr is not None else None
+                        elif strategy_code and best_params is not None:
+                            entry_test, opp_test = ctx.memo(
+                                "foldSignals", (sym, tf, start_ts, strategy_code, (test_start, test_end), _params_key(best_params)),
+                                lambda: resolve_signals_for_combo(dff_test, strategy_code, best_params))
+                        else:
+                            # 기존 로직: 이미 계산된 entry_by_time / opp_by_time를 폴드에 맞춰 정렬
+                            t_fold = dff_test["time"].astype("int64")
+                            entry_fold = pd.Series(
+                                entry_by_time.reindex(t_fold).fillna(0).astype(int).to_numpy(),
+                                index=dff_test.index
+                            )
+                            opp_fold = None
+                            if opp_by_time is not None:
+                                opp_fold = pd.Series(
+                                    opp_by_time.reindex(t_fold).fillna(0).astype(int).to_numpy(),
+                                    index=dff_test.index
                                 )
+                            entry_test, opp_test = entry_fold, opp_fold
+
+                        # 엔진 호출
+                        exit_cfg_local = ExitConfig(
+                            use_opposite = exit_cfg.use_opposite,
+                            stop_loss_pct = exit_cfg.stop_loss_pct,
+                            take_profit_pct = exit_cfg.take_profit_pct,
+                            time_limit_bars = exit_cfg.time_limit_bars,
+                            trailing_pct = exit_cfg.trailing_pct,
+                            fee_bps = fee_bps,
+                            slippage_bps = slp_bps,
+                        )
 
-                    if len(dff_test) < 50:
-                        prof_steps.append({"fold": [train_start, train_end, test_start, test_end],
-                                        "trades": [], "stats": {}, "opt": {"bestParams": best_params, "trainStats": train_stats}})
-                        continue
-
-                    # --- [검증] 최종 파라미터로 test 구간 시그널 생성 ---
-                    if strategy_code and best_params is not None:
-                        entry_test, opp_test = resolve_signals_for_combo(dff_test, strategy_code, best_params)
-                    else:
-                        # 기존 로직: 이미 계산된 entry_by_time / opp_by_time를 폴드에 맞춰 정렬
-                        t_fold = dff_test["time"].astype("int64")
+                        # 시리즈 타입 보정(튜닝 분기에서 온 경우)
+                        if isinstance(entry_test, pd.Series) and entry_test.index.equals(dff_test.index):
+                            ef = entry_test
+                        else:
+                            ef = pd.Series(entry_test, index=dff_test.index).fillna(0).astype(int)
+
+                        of = None
+                        if opp_test is not None:
+                            if isinstance(opp_test, pd.Series) and opp_test.index.equals(dff_test.index):
+                                of = opp_test
+                            else:
+                                of = pd.Series(opp_test, index=dff_test.index).fillna(0).astype(int)
+
+                        r = backtest_single(dff_test, ef, of, exit_cfg_local, fill_next_bar=True)
+
+                        # EOT 라벨링 + 통계
+                        all_trades = _tag_eot(r.get("trades") or [], int(dff_test["time"].iloc[-1]))
+                        trades_for_stats = [t for t in all_trades if include_eot or (t.get("reason") != "EOT")]
+                        metrics = _calc_metrics_from_trades(trades_for_stats, int(dff_test["time"].iloc[0]), int(dff_test["time"].iloc[-1]))
+
+                        trades = (all_trades[:limit_trades]
+                                if isinstance(limit_trades, int) and limit_trades > 0 else all_trades)
+
+                        prof_steps.append({
+                            "fold": [train_start, train_end, test_start, test_end],
+                            "trades": trades,
+                            "stats": {**(r.get("stats") or {}), **metrics},
+                            "opt": {"bestParams": best_params, "trainStats": train_stats, "search": search_info}
+                        })
+                        prof_total_trades += metrics["trades"]
+
+                    sym_out["profiles"].append({"name": prof_name, "runs": prof_steps, "totalTrades": prof_total_trades})
+
+
+                    for (_ts, _te, test_start, test_end) in folds_plan:
+                        if _past_deadline():
+                            sym_out["partial"] = True
+                            break
+                        dff = df[(df["time"] >= test_start) & (df["time"] <= test_end)].reset_index(drop=True)
+                        if len(dff) < 50:
+                            prof_steps.append({"fold": [test_start, test_end], "trades": [], "stats": {}})
+                            continue
+
+                        # 엔진 호출: 비용 시나리오를 ExitConfig에 주입
+                        exit_cfg_local = ExitConfig(
+                            use_opposite = exit_cfg.use_opposite,
+                            stop_loss_pct = exit_cfg.stop_loss_pct,
+                            take_profit_pct = exit_cfg.take_profit_pct,
+                            time_limit_bars = exit_cfg.time_limit_bars,
+                            trailing_pct = exit_cfg.trailing_pct,
+                            fee_bps = fee_bps,
+                            slippage_bps = slp_bps,
+                        )
+                        # ✅ 폴드 범위 time으로 정확 정렬
+                        t_fold = dff["time"].astype("int64")
                         entry_fold = pd.Series(
                             entry_by_time.reindex(t_fold).fillna(0).astype(int).to_numpy(),
-                            index=dff_test.index
+                            index=dff.index
                         )
                         opp_fold = None
                         if opp_by_time is not None:
                             opp_fold = pd.Series(
                                 opp_by_time.reindex(t_fold).fillna(0).astype(int).to_numpy(),
-                                index=dff_test.index
+                                index=dff.index
                             )
-                        entry_test, opp_test = entry_fold, opp_fold
-
-                    # 엔진 호출
-                    exit_cfg_local = ExitConfig(
-                        use_opposite = exit_cfg.use_opposite,
-                        stop_loss_pct = exit_cfg.stop_loss_pct,
-                        take_profit_pct = exit_cfg.take_profit_pct,
-                        time_limit_bars = exit_cfg.time_limit_bars,
-                        trailing_pct = exit_cfg.trailing_pct,
-                        fee_bps = fee_bps,
-                        slippage_bps = slp_bps,
-                    )
-
-                    # 시리즈 타입 보정(튜닝 분기에서 온 경우)
-                    if isinstance(entry_test, pd.Series) and entry_test.index.equals(dff_test.index):
-                        ef = entry_test
-                    else:
-                        ef = pd.Series(entry_test, index=dff_test.index).fillna(0).astype(int)
-
-                    of = None
-                    if opp_test is not None:
-                        if isinstance(opp_test, pd.Series) and opp_test.index.equals(dff_test.index):
-                            of = opp_test
-                        else:
-                            of = pd.Series(opp_test, index=dff_test.index).fillna(0).astype(int)
-
-                    r = backtest_single(dff_test, ef, of, exit_cfg_local, fill_next_bar=True)
-
-                    # EOT 라벨링 + 통계
-                    all_trades = _tag_eot(r.get("trades") or [], int(dff_test["time"].iloc[-1]))
-                    trades_for_stats = [t for t in all_trades if include_eot or (t.get("reason") != "EOT")]
-                    metrics = _calc_metrics_from_trades(trades_for_stats, int(dff_test["time"].iloc[0]), int(dff_test["time"].iloc[-1]))
-
-                    trades = (all_trades[:limit_trades]
-                            if isinstance(limit_trades, int) and limit_trades > 0 else all_trades)
-
-                    prof_steps.append({
-                        "fold": [train_start, train_end, test_start, test_end],
-                        "trades": trades,
-                        "stats": {**(r.get("stats") or {}), **metrics},
-                        "opt": {"bestParams": best_params, "trainStats": train_stats}
-                    })
-                    prof_total_trades += metrics["trades"]
-
-                sym_out["profiles"].append({"name": prof_name, "runs": prof_steps, "totalTrades": prof_total_trades})
-
-
-                for (_ts, _te, test_start, test_end) in folds_plan:
-                    dff = df[(df["time"] >= test_start) & (df["time"] <= test_end)].reset_index(drop=True)
-                    if len(dff) < 50:
-                        prof_steps.append({"fold": [test_start, test_end], "trades": [], "stats": {}})
-                        continue
-
-                    # 엔진 호출: 비용 시나리오를 ExitConfig에 주입
-                    exit_cfg_local = ExitConfig(
-                        use_opposite = exit_cfg.use_opposite,
-                        stop_loss_pct = exit_cfg.stop_loss_pct,
-                        take_profit_pct = exit_cfg.take_profit_pct,
-                        time_limit_bars = exit_cfg.time_limit_bars,
-                        trailing_pct = exit_cfg.trailing_pct,
-                        fee_bps = fee_bps,
-                        slippage_bps = slp_bps,
-                    )
-                    # ✅ 폴드 범위 time으로 정확 정렬
-                    t_fold = dff["time"].astype("int64")
-                    entry_fold = pd.Series(
-                        entry_by_time.reindex(t_fold).fillna(0).astype(int).to_numpy(),
-                        index=dff.index
-                    )
-                    opp_fold = None
-                    if opp_by_time is not None:
-                        opp_fold = pd.Series(
-                            opp_by_time.reindex(t_fold).fillna(0).astype(int).to_numpy(),
-                            index=dff.index
+                        r = backtest_single(
+                            dff,
+                            entry_fold,
+                            opp_fold,
+                            exit_cfg_local,
+                            fill_next_bar=True
                         )
-                    r = backtest_single(
-                        dff,
-                        entry_fold,
-                        opp_fold,
-                        exit_cfg_local,
-                        fill_next_bar=True
-                    )
-                    # EoT 라벨링(원본에 없을 수 있음)
-                    all_trades = _tag_eot(r.get("trades") or [], int(dff["time"].iloc[-1]))
-                    # includeEoTInStats가 False면 EOT 제외 후 지표 계산 (← 지표는 '전체'로 계산)
-                    trades_for_stats = [t for t in all_trades if include_eot or (t.get("reason") != "EOT")]
-                    metrics = _calc_metrics_from_trades(trades_for_stats, int(dff["time"].iloc[0]), int(dff["time"].iloc[-1]))
-                    # ✅ 보기엔 가볍게: 응답에 싣는 리스트만 limitTrades로 컷
-                    trades = (all_trades[:limit_trades]
-                              if isinstance(limit_trades, int) and limit_trades > 0 else all_trades)
-
-                    prof_steps.append({
-                        "fold": [test_start, test_end],
-                        "trades": trades,
-                        "stats": {**(r.get("stats") or {}), **metrics}
-                    })
-                    prof_total_trades += metrics["trades"]
-
-                sym_out["profiles"].append({"name": prof_name, "runs": prof_steps, "totalTrades": prof_total_trades})
-
-            step_runs.append(sym_out)
+                        # EoT 라벨링(원본에 없을 수 있음)
+                        all_trades = _tag_eot(r.get("trades") or [], int(dff["time"].iloc[-1]))
+                        # includeEoTInStats가 False면 EOT 제외 후 지표 계산 (← 지표는 '전체'로 계산)
+                        trades_for_stats = [t for t in all_trades if include_eot or (t.get("reason") != "EOT")]
+                        metrics = _calc_metrics_from_trades(trades_for_stats, int(dff["time"].iloc[0]), int(dff["time"].iloc[-1]))
+                        # ✅ 보기엔 가볍게: 응답에 싣는 리스트만 limitTrades로 컷
+                        trades = (all_trades[:limit_trades]
+                                  if isinstance(limit_trades, int) and limit_trades > 0 else all_trades)
+
+                        prof_steps.append({
+                            "fold": [test_start, test_end],
+                            "trades": trades,
+                            "stats": {**(r.get("stats") or {}), **metrics}
+                        })
+                        prof_total_trades += metrics["trades"]
+
+                    sym_out["profiles"].append({"name": prof_name, "runs": prof_steps, "totalTrades": prof_total_trades})
+                return sym_out, sym_search
+
+            sym_out, sym_search = ctx.node("run", run_key, _run_symbol, owner=sym)
+            if sym_out.get("partial"):
+                # 마감으로 잘린 결과는 다음 요청에서 재사용하지 않음
+                ctx.discard("run", run_key)
+                partial_runs += 1
+            for k in search_totals:
+                search_totals[k] += sym_search[k]
+
             # total_trades는 대표 프로파일(base) 합계로 누적
             base_prof = next((p for p in sym_out["profiles"] if p["name"]=="base"), sym_out["profiles"][0])
             total_trades += base_prof["totalTrades"]
-
-        # 단계 결과는 '심볼 루프'가 끝난 후 한 번만 추가
-        results.append({
-            "tf": tf,
-            "combo": combo,
-            "periodKey": period_key,
-            "exit": exit_cfg_raw,
-            "runs": step_runs,   # [{ symbol, tf, profiles:[{name, runs:[{fold, trades, stats}], totalTrades}] }]
-            "isRegime": (chain_mode == "state" and step_index < (total_steps - 1)),
-        })
-
-    resp = {
-        "ok": True,
-        "used_symbols": symbols,
-        "steps": results,
-        "summary": {
-            "symbols": len(symbols),
-            "totalTrades": total_trades,
-            "chainMode": chain_mode,
-        }
+            table.add_run(step_index, sym_out)
+
+            yield {"type": "run", "stepIndex": step_index, "run": sym_out}
+            # 마지막 단계에서 내보낸 심볼은 캔들/신호 메모/요청 전용 노드를 버린다
+            # (앞 단계에서 버리면 같은 (symbol, tf)를 쓰는 다음 단계가 다시 읽고 리샘플함)
+            if step_index == last_index:
+                ctx.release(sym)
+
+    # 마지막 단계에서 건너뛴(봉 부족/마감) 심볼까지 정리
+    for sym in symbols:
+        ctx.release(sym)
+
+    summary = {
+        "symbols": len(symbols),
+        "totalTrades": total_trades,
+        "chainMode": chain_mode,
+        "nodes": {"hits": sum(ctx._node_hits.values()), "runs": sum(ctx._node_runs.values())},
     }
+    if deadline is not None:
+        skipped_syms = list(dict.fromkeys(sym for k in sorted(skipped) for sym in skipped[k]))
+        summary["partial"] = bool(skipped_syms or partial_runs)
+        summary["skippedSymbols"] = skipped_syms
+        summary["skippedByStep"] = {str(k): v for k, v in sorted(skipped.items())}
+        summary["partialRuns"] = partial_runs
+        summary["elapsedMs"] = int((time.time() - t_start) * 1000)
+    if search_totals["exhaustiveRuns"]:
+        saved_bars = search_totals["exhaustiveBars"] - search_totals["barsSimulated"]
+        summary["search"] = {
+            **search_totals,
+            "fullRunEquivalents": round(search_totals["fullRunEquivalents"], 2),
+            "savedRuns": round(search_totals["savedRuns"], 2),
+            "savedBars": saved_bars,
+            "savedBarsPct": round(saved_bars / max(1, search_totals["exhaustiveBars"]) * 100.0, 2),
+        }
 
-    # 집합 분석 (예: theme)
-    if group_by == "theme":
-        # 예시: /data/coin_theme_mapping.json 사용 (형식: { "BTC_KRW": ["AI","Layer1"], ... })
-        themap_path = DATA_DIR / "coin_theme_mapping.json"
-        groups = {}
-        the_map = {}
+    final = {"type": "summary", "summary": summary}
+    if group_by in ("theme", "tf", "step", "symbol"):
+        frame = table.to_frame()
+        theme_pairs = explode_theme_map(_load_theme_map()) if group_by == "theme" else None
+        prof_names = [str(p.get("name") or "base") for p in profiles]
+        base_name = "base" if "base" in prof_names else prof_names[0]
+        final["groups"] = {group_by: group_stats(frame, group_by,
+                                                 profile=(base_name if group_profile in (None, "", "all") else str(group_profile)),
+                                                 metrics=group_metrics, theme_pairs=theme_pairs)}
+        if group_profile == "all":
+            final["groupsByProfile"] = {
+                name: {group_by: group_stats(frame, group_by, profile=name, metrics=group_metrics, theme_pairs=theme_pairs)}
+                for name in dict.fromkeys(prof_names)
+            }
+    if include_table:
+        final["table"] = table.to_columns()
+    final["profilesMeta"] = [p["name"] for p in profiles]
+    # 처리량 보정: 캐시 적중/마감 중단 없이 전부 계산한 실행만 반영
+    if not ctx._node_hits and not summary.get("partial"):
+        record_throughput(estimate["workUnits"], time.time() - t_start)
+    yield final
+
+
+def _load_theme_map() -> Dict[str, List[str]]:
+    # /data/coin_theme_mapping.json 우선 (형식: { "BTC_KRW": ["AI","Layer1"], ... }),
+    # 없으면 모듈 data/coin_theme_mapping.json (형식: { "AI": ["FET_KRW", ...] }) — explode_theme_map이 둘 다 처리
+    for themap_path in (DATA_DIR / "coin_theme_mapping.json", MODULE_DATA_DIR / "coin_theme_mapping.json"):
         try:
             if themap_path.exists():
-                the_map = json.loads(themap_path.read_text("utf-8"))
+                return json.loads(themap_path.read_text("utf-8"))
         except:
-            the_map = {}
-        # base 프로파일만 집계(원하면 전 프로파일 확장 가능)
-        for st in results:
-            for symrow in st["runs"]:
-                sym = symrow["symbol"]
-                base_prof = next((p for p in symrow["profiles"] if p["name"]=="base"), symrow["profiles"][0])
-                # 폴드별 stats 평균 집계
-                pf_vals = [r["stats"].get("pf", 0.0) for r in base_prof["runs"] if r.get("stats")]
-                wr_vals = [r["stats"].get("winRate", 0.0) for r in base_prof["runs"] if r.get("stats")]
-                mdd_vals= [r["stats"].get("mdd", 0.0) for r in base_prof["runs"] if r.get("stats")]
-                agg = {
-                    "pf": (sum(pf_vals)/len(pf_vals)) if pf_vals else 0.0,
-                    "winRate": (sum(wr_vals)/len(wr_vals)) if wr_vals else 0.0,
-                    "mdd": (sum(mdd_vals)/len(mdd_vals)) if mdd_vals else 0.0,
-                }
-                themes = the_map.get(sym, ["(unclassified)"])
-                for th in themes:
-                    if th not in groups: groups[th] = {"count":0, "symbols":[], "avg": {"pf":0.0,"winRate":0.0,"mdd":0.0}}
-                    g = groups[th]
-                    g["count"] += 1
-                    g["symbols"].append(sym)
-                    # 러닝 평균
-                    n = g["count"]
-                    g["avg"]["pf"]      = g["avg"]["pf"]      + (agg["pf"] - g["avg"]["pf"])/n
-                    g["avg"]["winRate"] = g["avg"]["winRate"] + (agg["winRate"] - g["avg"]["winRate"])/n
-                    g["avg"]["mdd"]     = g["avg"]["mdd"]     + (agg["mdd"] - g["avg"]["mdd"])/n
-        resp["groups"] = {"theme": groups}
-
-    resp["profilesMeta"] = [p["name"] for p in profiles]
+            continue
+    return {}
+
+
+def estimate_scenario(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    dryRun/라우터 사전 검사용: 실행 없이 작업량/예상 시간만 (예산 검사 결과 admitted/reason 포함)
+    preview면 실제로 실행할 표본 유니버스(+ 올린 TF) 기준으로 추정한다.
+    """
+    if payload.get("preview"):
+        sub, plan = _preview_plan(payload)
+        return {**estimate_scenario(sub), "preview": {"population": len(plan["symbols"]),
+                                                      "sampleSize": len(sub["symbols"])}}
+    steps = payload.get("steps") or []
+    symbols = _resolve_symbols((payload.get("scope") or "").lower(), payload.get("watchlistName"),
+                               payload.get("symbols") or [])
+    now_ts = int(time.time())
+    profiles = payload.get("costProfiles") or [{"name": "base"}]
+    estimate = estimate_work(steps, symbols,
+                             [_period_key_to_start_ts(s.get("periodKey") or "12m", now_ts) for s in steps],
+                             profiles, payload.get("walkForward") or {})
+    try:
+        check_budget(estimate, payload)
+        estimate["admitted"] = True
+    except ScenarioBudgetExceeded as e:
+        estimate["admitted"] = False
+        estimate["reason"] = e.reason
+    return estimate
+
+
+def _preview_plan(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    preview 표본 설계 → (표본 유니버스로 바꾼 하위 payload, {symbols, strata, sample, picked, cfg}).
+    표본 크기 = sampleSize 또는 ceil(유니버스 × fraction), PREVIEW_MAX_SAMPLE 상한.
+    층 수가 표본 크기보다 많으면 작은 층을 유동성 층별로 합친다(merge_strata).
+    seed가 같으면 같은 표본 → 추정(estimate_scenario)과 실행(_run_preview)이 같은 심볼을 본다.
+    """
+    cfg = payload.get("preview") if isinstance(payload.get("preview"), dict) else {}
+    symbols = _resolve_symbols((payload.get("scope") or "").lower(), payload.get("watchlistName"),
+                               payload.get("symbols") or [])
+    liquidity = _symbol_liquidity(symbols)
+    size = int(cfg.get("sampleSize") or math.ceil(len(symbols) * float(cfg.get("fraction", 0.2) or 0.2)))
+    size = max(1, min(size, PREVIEW_MAX_SAMPLE, len(symbols)))
+    strata = merge_strata(build_strata(symbols, explode_theme_map(_load_theme_map()), liquidity), size)
+    sample = stratified_sample(strata, size, seed=int(cfg.get("seed", 0) or 0))
+    picked = {s for v in sample.values() for s in v}
+
+    sub = dict(payload)
+    sub.pop("preview", None)
+    sub.update({"scope": "watchlist", "watchlistName": None, "resultsTable": True,
+                "symbols": [s for s in symbols if s in picked]})
+    # 더 긴 TF로 근사: 지정 TF보다 짧은 단계만 올린다
+    coarse_tf = cfg.get("tf")
+    if coarse_tf in TF_SECONDS:
+        sub["steps"] = [({**st, "tf": coarse_tf}
+                         if TF_SECONDS.get(st.get("tf", "1d"), 0) < TF_SECONDS[coarse_tf] else st)
+                        for st in (payload.get("steps") or [])]
+    return sub, {"symbols": symbols, "strata": strata, "sample": sample, "picked": picked, "cfg": cfg}
+
+
+def _run_preview(payload: Dict[str, Any], ctx: ScenarioContext | None = None,
+                 estimate: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    preview: 테마×유동성 층화 표본 심볼로만 실행(선택적으로 더 긴 TF) → 유니버스 평균 추정 + 신뢰구간.
+    payload.preview = true | {"sampleSize", "fraction"(기본 0.2), "tf", "confidence"(0.95), "seed", "metrics"}
+    estimate: 표본 기준 estimate_scenario 결과 (있으면 재추정 생략)
+    """
+    ctx = ctx or ScenarioContext(reuse=bool(payload.get("reuse", True)))
+    sub, plan = _preview_plan(payload)
+    cfg, symbols, strata, sample, picked = plan["cfg"], plan["symbols"], plan["strata"], plan["sample"], plan["picked"]
+
+    resp = run_scenario_service(sub, ctx, estimate)
+    frame = pd.DataFrame(resp.get("table") or {})
+    if not payload.get("resultsTable"):
+        resp.pop("table", None)
+
+    metrics = cfg.get("metrics") or DEFAULT_GROUP_METRICS
+    confidence = float(cfg.get("confidence", 0.95) or 0.95)
+    prof_names = resp.get("profilesMeta") or ["base"]
+    base_name = "base" if "base" in prof_names else prof_names[0]
+    estimates = {}
+    if not frame.empty:
+        for m in metrics:
+            if m in frame:
+                frame[m] = frame[m].astype(float)
+        per_sym = per_symbol_stats(frame, base_name, metrics)
+        for step_i, g in per_sym.groupby("step", sort=True):
+            estimates[str(step_i)] = stratified_estimate(g, strata, sample, list(metrics), confidence)
+
+    resp["preview"] = {
+        "population": len(symbols),
+        "sampled": sorted(picked),
+        "strata": {k: {"size": len(strata[k]), "sampled": sample.get(k, [])} for k in strata},
+        "tf": [st.get("tf") for st in (sub.get("steps") or [])],
+        "profile": base_name,
+        "confidence": confidence,
+        "estimates": estimates,   # stepIndex → {metric: {mean, stderr, ci}}
+    }
     return resp
 
+
+def run_scenario_service(payload: Dict[str, Any], ctx: ScenarioContext | None = None,
+                         estimate: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    iter_scenario_records 결과를 기존 단일 응답(dict) 형태로 조립 (dryRun=true면 추정치만).
+    estimate: 미리 계산한 estimate_scenario 결과 (있으면 재추정 생략)
+    """
+    if payload.get("dryRun"):
+        return {"ok": True, "dryRun": True, "estimate": estimate or estimate_scenario(payload)}
+    if payload.get("preview"):
+        return _run_preview(payload, ctx, estimate)
+    results = []
+    resp: Dict[str, Any] = {"ok": True}
+    for rec in iter_scenario_records(payload, ctx, estimate):
+        kind = rec["type"]
+        if kind == "meta":
+            resp["used_symbols"] = rec["used_symbols"]
+            resp["estimate"] = rec["estimate"]
+        elif kind == "step":
+            results.append({
+                "tf": rec["tf"],
+                "combo": rec["combo"],
+                "periodKey": rec["periodKey"],
+                "exit": rec["exit"],
+                "runs": [],   # [{ symbol, tf, profiles:[{name, runs:[{fold, trades, stats}], totalTrades}] }]
+                "isRegime": rec["isRegime"],
+            })
+        elif kind == "run":
+            results[-1]["runs"].append(rec["run"])
+        elif kind == "summary":
+            resp["steps"] = results
+            resp["summary"] = rec["summary"]
+            if "partial" in rec["summary"]:
+                resp["partial"] = rec["summary"]["partial"]
+                resp["skippedSymbols"] = rec["summary"]["skippedSymbols"]
+            for k in ("groups", "groupsByProfile", "table"):
+                if k in rec:
+                    resp[k] = rec[k]
+            resp["profilesMeta"] = rec["profilesMeta"]
+    return resp
+
+
+def estimate_batch(payloads: List[Dict[str, Any]], limits: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    배치 실행 전 전체 예산 검사 (실행 시작 전에 1회).
+    시나리오별 estimate_scenario + 합계(workUnits/estSeconds)를 limits(배치 본문의 maxWorkUnits/
+    maxSeconds/deadlineMs)와 서버 기본 예산으로 검사. 하나라도 초과면 admitted=False.
+    합계는 배치 내 공유(캔들/신호 1회)를 빼지 않은 상한이다.
+    """
+    scenarios = [estimate_scenario(p or {}) for p in (payloads or [])]
+    total = {
+        "workUnits": int(sum(e["workUnits"] for e in scenarios)),
+        "estSeconds": round(sum(e["estSeconds"] for e in scenarios), 2),
+    }
+    out: Dict[str, Any] = {"admitted": True, "total": total, "scenarios": scenarios}
+    rejected = [i for i, e in enumerate(scenarios) if not e.get("admitted", True)]
+    if rejected:
+        out["admitted"] = False
+        out["rejected"] = rejected
+        out["reason"] = f"scenario {rejected[0]}: {scenarios[rejected[0]].get('reason')}"
+        return out
+    try:
+        check_budget(total, limits or {})
+    except ScenarioBudgetExceeded as e:
+        out["admitted"] = False
+        out["reason"] = f"batch total: {e.reason}"
+    return out
+
+
+def run_scenario_batch(payloads: List[Dict[str, Any]], estimates: Dict[str, Any] | None = None,
+                       deadline_ms: float | None = None) -> Dict[str, Any]:
+    """
+    시나리오 N개를 하나의 컨텍스트로 실행 → 캔들 로드/신호 계산은 고유 입력당 1회.
+    estimates: estimate_batch 결과(실행 전 전체 예산 검사). 없으면 여기서 검사하고, 초과면
+    아무것도 실행하지 않고 ScenarioBudgetExceeded.
+    deadline_ms: 배치 전체 마감 (estimate_batch의 limits와 같은 값). 배치 마감이 시간 예산 검사를
+    대신하므로, 각 시나리오는 남은 배치 시간(과 자기 deadlineMs 중 짧은 쪽)을 deadlineMs로 받아 실행.
+    응답: results[i] = run_scenario_service(payloads[i])와 동일 형태, shared = 공유 작업 통계
+    """
+    payloads = [p or {} for p in (payloads or [])]
+    try:
+        deadline_ms = float(deadline_ms or 0)
+    except (TypeError, ValueError):
+        deadline_ms = 0.0
+    estimates = estimates or estimate_batch(payloads, {"deadlineMs": deadline_ms} if deadline_ms > 0 else None)
+    if not estimates.get("admitted", True):
+        raise ScenarioBudgetExceeded(estimates, estimates.get("reason") or "batch over budget")
+    batch_deadline = (time.time() + deadline_ms / 1000.0) if deadline_ms > 0 else None
+    ctx = ScenarioContext()
+    sym_sets = [set(_resolve_symbols((p.get("scope") or "").lower(), p.get("watchlistName"), p.get("symbols") or []))
+                for p in payloads]
+    results = []
+    for i, p in enumerate(payloads):
+        # 뒤 시나리오가 쓰는 심볼만 메모 유지 → 공유는 살리고 나머지는 심볼 단위로 해제
+        ctx.retain_symbols = set().union(*sym_sets[i + 1:])
+        if batch_deadline is not None:
+            # 남은 배치 시간 (이미 지났으면 1ms → 새 심볼을 시작하지 않고 partial로 끝남)
+            remaining_ms = max(1.0, (batch_deadline - time.time()) * 1000.0)
+            try:
+                own_ms = float(p.get("deadlineMs") or 0)
+            except (TypeError, ValueError):
+                own_ms = 0.0
+            p = {**p, "deadlineMs": min(own_ms, remaining_ms) if own_ms > 0 else remaining_ms}
+        results.append(run_scenario_service(p, ctx, estimates["scenarios"][i]))
+    return {"ok": True, "results": results, "shared": ctx.stats()}
@@ -0,0 +1,163 @@
+# backend/app/modules/coinlab/services/candle_maintenance.py
+# 캔들 저장소 점검/변환 명령 모음
+#   python -m app.modules.coinlab.services.candle_maintenance migrate [--symbol BTC_KRW] [--dry-run]
+#   python -m app.modules.coinlab.services.candle_maintenance compact [--symbol BTC_KRW] [--dry-run]
+#   python -m app.modules.coinlab.services.candle_maintenance catalog
+#   python -m app.modules.coinlab.services.candle_maintenance optimize [--compression zstd] [--level 9]
+#       [--drop-symbol] [--float32 1m,5m] [--symbol BTC_KRW] [--dry-run]
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import argparse, json, tempfile, time
+import pandas as pd
+from .candle_store import (DATA_DIR, LAYOUT_VERSION, SCHEMA_VERSION, parquet_layout_version,
+                           parquet_schema_version, save_storage, write_candles_parquet)
+from .data_catalog import catalog_upsert, get_catalog
+
+
+def iter_year_files(symbols: Optional[List[str]] = None, root: Path = DATA_DIR):
+    """/data/{SYMBOL}/{tf}/{year}.parquet → (symbol, tf, path). 연도 이름이 아닌 파일은 제외."""
+    if not root.exists():
+        return
+    for sym_dir in sorted(root.iterdir()):
+        if not sym_dir.is_dir() or (symbols and sym_dir.name not in symbols):
+            continue
+        for tf_dir in sorted(sym_dir.iterdir()):
+            if not tf_dir.is_dir():
+                continue
+            for p in sorted(tf_dir.glob("*.parquet")):
+                if p.stem.isdigit():
+                    yield sym_dir.name, tf_dir.name, p
+
+
+def migrate_schema(symbols: Optional[List[str]] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """구형 파일을 정규 스키마(SCHEMA_VERSION)로 재기록. 이미 정규 스키마면 건너뜀."""
+    report: Dict[str, Any] = {"migrated": 0, "skipped": 0, "failed": []}
+    for sym, tf, p in iter_year_files(symbols):
+        try:
+            if parquet_schema_version(p) == SCHEMA_VERSION:
+                report["skipped"] += 1
+                continue
+            if not dry_run:
+                write_candles_parquet(pd.read_parquet(p), p, sym)
+                catalog_upsert(sym, tf, p.stem, p)
+            report["migrated"] += 1
+        except Exception as e:
+            report["failed"].append({"path": str(p), "error": str(e)})
+    return report
+
+
+def compact_layout(symbols: Optional[List[str]] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    월 단위 row group(LAYOUT_VERSION)으로 재기록. 구형 스키마 파일도 함께 정규화된다.
+    이미 월 단위면 건너뜀. 파일 크기 전/후 합계를 함께 보고.
+    """
+    report: Dict[str, Any] = {"compacted": 0, "skipped": 0, "failed": [], "bytesBefore": 0, "bytesAfter": 0}
+    for sym, tf, p in iter_year_files(symbols):
+        try:
+            if parquet_layout_version(p) == LAYOUT_VERSION:
+                report["skipped"] += 1
+                continue
+            before = p.stat().st_size
+            if not dry_run:
+                write_candles_parquet(pd.read_parquet(p), p, sym)
+                catalog_upsert(sym, tf, p.stem, p)
+            report["bytesBefore"] += before
+            report["bytesAfter"] += p.stat().st_size
+            report["compacted"] += 1
+        except Exception as e:
+            report["failed"].append({"path": str(p), "error": str(e)})
+    return report
+
+
+def _timed_read(p: Path) -> float:
+    t0 = time.perf_counter()
+    pd.read_parquet(p)
+    return time.perf_counter() - t0
+
+
+def optimize_storage(storage: Dict[str, Any], symbols: Optional[List[str]] = None,
+                     dry_run: bool = False) -> Dict[str, Any]:
+    """
+    저장 인코딩(storage: compression/level/drop_symbol/float32)으로 재기록하고
+    interval별 바이트·읽기 처리량(행/초, 캐시 없이 전체 읽기) 전/후를 보고.
+    dry_run이 아니면 storage를 저장 설정(STORAGE_CONFIG)으로 남겨 이후 수집/재기록에도 같은 인코딩을 쓴다.
+    dry_run이면 임시 디렉터리에 써서 측정만 한다.
+    """
+    per_tf: Dict[str, Dict[str, float]] = {}
+    failed = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for sym, tf, p in iter_year_files(symbols):
+            try:
+                src = pd.read_parquet(p)
+                before, t_before = p.stat().st_size, _timed_read(p)
+                dst = Path(tmpdir) / tf / f"{sym}_{p.name}" if dry_run else p
+                rows = write_candles_parquet(src, dst, sym, storage)
+                after, t_after = dst.stat().st_size, _timed_read(dst)
+                if not dry_run:
+                    catalog_upsert(sym, tf, p.stem, p)
+                else:
+                    dst.unlink()
+            except Exception as e:
+                failed.append({"path": str(p), "error": str(e)})
+                continue
+            acc = per_tf.setdefault(tf, {"files": 0, "rows": 0, "bytesBefore": 0, "bytesAfter": 0,
+                                         "readSecBefore": 0.0, "readSecAfter": 0.0})
+            acc["files"] += 1
+            acc["rows"] += rows
+            acc["bytesBefore"] += before
+            acc["bytesAfter"] += after
+            acc["readSecBefore"] += t_before
+            acc["readSecAfter"] += t_after
+
+    def _summary(a: Dict[str, float]) -> Dict[str, Any]:
+        return {**{k: (round(v, 4) if isinstance(v, float) else v) for k, v in a.items()},
+                "ratio": round(a["bytesAfter"] / a["bytesBefore"], 4) if a["bytesBefore"] else None,
+                "rowsPerSecBefore": int(a["rows"] / a["readSecBefore"]) if a["readSecBefore"] else None,
+                "rowsPerSecAfter": int(a["rows"] / a["readSecAfter"]) if a["readSecAfter"] else None}
+
+    saved = None if dry_run else str(save_storage(storage))
+
+    total: Dict[str, float] = {}
+    for a in per_tf.values():
+        for k, v in a.items():
+            total[k] = total.get(k, 0) + v
+    return {"storage": storage, "dryRun": dry_run, "savedTo": saved,
+            "intervals": {tf: _summary(a) for tf, a in sorted(per_tf.items())},
+            "total": _summary(total) if total else None, "failed": failed}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="coinlab 캔들 저장소 점검/변환")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="구형 parquet → 정규 스키마 재기록")
+    m.add_argument("--symbol", action="append", help="대상 심볼 (반복 지정, 생략 시 전체)")
+    m.add_argument("--dry-run", action="store_true")
+    c = sub.add_parser("compact", help="월 단위 row group으로 재기록 (범위/꼬리 읽기 최적화)")
+    c.add_argument("--symbol", action="append", help="대상 심볼 (반복 지정, 생략 시 전체)")
+    c.add_argument("--dry-run", action="store_true")
+    sub.add_parser("catalog", help="카탈로그(SQLite) 전체 재구축 (푸터 스캔)")
+    o = sub.add_parser("optimize", help="저장 인코딩 최적화 재기록 + 바이트/읽기 처리량 보고")
+    o.add_argument("--symbol", action="append", help="대상 심볼 (반복 지정, 생략 시 전체)")
+    o.add_argument("--compression", default="zstd")
+    o.add_argument("--level", type=int, default=9)
+    o.add_argument("--drop-symbol", action="store_true", help="경로와 중복되는 symbol 컬럼 제거")
+    o.add_argument("--float32", default="", help="가격을 float32로 저장할 interval (쉼표 구분, 손실 있음)")
+    o.add_argument("--dry-run", action="store_true", help="임시 디렉터리에 써서 측정만")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "migrate":
+        out = migrate_schema(args.symbol, args.dry_run)
+    elif args.cmd == "compact":
+        out = compact_layout(args.symbol, args.dry_run)
+    elif args.cmd == "catalog":
+        cat = get_catalog()
+        out = cat.rebuild() if cat is not None else {"error": "catalog unavailable"}
+    elif args.cmd == "optimize":
+        storage = {"compression": args.compression, "level": args.level, "drop_symbol": args.drop_symbol,
+                   "float32": [s.strip() for s in args.float32.split(",") if s.strip()]}
+        out = optimize_storage(storage, args.symbol, args.dry_run)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,588 @@
+# backend/app/modules/coinlab/services/candle_store.py
+# /data/{SYMBOL}/{tf}/{year}.parquet 캔들 로더 + 요청 단위 캔들 공급자(재사용/리샘플)
+# + 프로세스 공용 parquet LRU 캐시 (백테스트/차트/조건검색/데이터 점검이 모두 여기로 읽는다)
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import calendar, datetime as _dt, json, os, threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATA_DIR = Path("/data")
+CANDLE_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+# tf → 봉 길이(초). 빗썸 일봉은 KST 00:00(UTC 15:00) 시작 → 1d 버킷은 +9h 기준으로 자른다
+TF_SECONDS = {"1m": 60, "3m": 180, "5m": 300, "10m": 600, "15m": 900, "30m": 1800,
+              "1h": 3600, "1d": 86400}
+KST_OFFSET_SEC = 9 * 3600
+
+# 정규 저장 스키마(수집 시 기록): time int64(epoch-sec) + OHLCV float64, time 오름차순·중복 없음.
+# 파일 메타데이터에 버전 키가 있으면 로더는 정규화 없이 바로 쓴다.
+SCHEMA_VERSION = "1"
+SCHEMA_META_KEY = b"coinlab.schema"
+# row group = UTC 달력 월 1개 (time min/max 통계로 구간/꼬리 읽기가 해당 월만 디코딩)
+LAYOUT_VERSION = "month-rg"
+LAYOUT_META_KEY = b"coinlab.layout"
+
+# 저장 인코딩 (수집 기본값, 환경변수). optimize 명령이 적용한 값은 STORAGE_CONFIG에 저장되어
+# 이후 수집/재기록(write_candles_parquet)에서 환경변수 기본값보다 우선한다.
+# - compression: parquet 코덱 (zstd 권장, level은 zstd/gzip/brotli만 의미)
+# - drop_symbol: 경로({SYMBOL}/...)와 중복되는 symbol 컬럼 생략
+# - float32: 가격(OHLC)을 float32로 저장할 interval 목록 (읽을 때 float64로 복원)
+STORAGE_DEFAULTS = {
+    "compression": os.getenv("CANDLE_PARQUET_COMPRESSION", "snappy"),
+    "level": int(os.getenv("CANDLE_PARQUET_LEVEL")) if os.getenv("CANDLE_PARQUET_LEVEL") else None,
+    "drop_symbol": os.getenv("CANDLE_DROP_SYMBOL", "0") in ("1", "true", "True"),
+    "float32": [s.strip() for s in os.getenv("CANDLE_FLOAT32_INTERVALS", "").split(",") if s.strip()],
+}
+STORAGE_CONFIG = DATA_DIR / "coinlab_storage.json"
+_PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+_storage_cache: Tuple[Optional[tuple], Dict[str, object]] = (None, {})
+
+
+def saved_storage() -> Dict[str, object]:
+    """optimize로 저장된 인코딩 설정 (파일 없거나 깨졌으면 {}). 파일 stat이 같으면 다시 읽지 않음."""
+    global _storage_cache
+    try:
+        st = STORAGE_CONFIG.stat()
+    except OSError:
+        return {}
+    key = (st.st_mtime_ns, st.st_size)
+    if _storage_cache[0] != key:
+        try:
+            data = json.loads(STORAGE_CONFIG.read_text())
+            data = {k: v for k, v in data.items() if k in STORAGE_DEFAULTS} if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            data = {}
+        _storage_cache = (key, data)
+    return dict(_storage_cache[1])
+
+
+def save_storage(storage: Dict[str, object]) -> Path:
+    """인코딩 설정 저장 (임시 파일 → 교체). 이후 write_candles_parquet 기본값이 된다."""
+    data = {k: v for k, v in storage.items() if k in STORAGE_DEFAULTS}
+    STORAGE_CONFIG.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STORAGE_CONFIG.with_name(STORAGE_CONFIG.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2))
+    os.replace(tmp, STORAGE_CONFIG)
+    return STORAGE_CONFIG
+
+CANDLE_CACHE_MAX_BYTES = int(float(os.getenv("CANDLE_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+
+class ParquetLRU:
+    """
+    (path, mtime_ns, size) 키 parquet DataFrame LRU. 파일이 바뀌면 키가 달라져 자동 무효화.
+    용량은 DataFrame 메모리(deep) 합으로 제한. 반환값은 얕은 복사본이므로
+    컬럼 추가/교체는 안전하지만 값의 제자리 수정(df.loc[...] = ...)은 하지 말 것.
+    """
+
+    def __init__(self, max_bytes: int = CANDLE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[tuple, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._by_path: Dict[str, tuple] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def read(self, path, columns: Optional[List[str]] = None,
+             row_groups: Optional[List[int]] = None) -> pd.DataFrame:
+        p = Path(path)
+        st = p.stat()   # 파일 없으면 FileNotFoundError (pd.read_parquet과 동일하게 호출부에서 처리)
+        cols = tuple(columns) if columns else None
+        rgs = tuple(row_groups) if row_groups is not None else None
+        key = (str(p), st.st_mtime_ns, st.st_size, cols, rgs)
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return hit[0].copy(deep=False)
+            self.misses += 1
+        if rgs is not None:
+            df = pq.ParquetFile(p).read_row_groups(list(rgs), columns=list(cols) if cols else None).to_pandas()
+        else:
+            df = pd.read_parquet(p, columns=list(cols) if cols else None)
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            # 같은 경로의 이전 버전(mtime/size 다름)은 즉시 제거
+            old = self._by_path.get((str(p), cols, rgs))
+            if old is not None and old != key and old in self._items:
+                self.bytes -= self._items.pop(old)[1]
+            if size <= self.max_bytes:
+                self._items[key] = (df, size)
+                self._by_path[(str(p), cols, rgs)] = key
+                self.bytes += size
+                while self.bytes > self.max_bytes and self._items:
+                    k, (_, sz) = self._items.popitem(last=False)
+                    self._by_path.pop((k[0], k[3], k[4]), None)
+                    self.bytes -= sz
+                    self.evictions += 1
+        return df.copy(deep=False)
+
+    def invalidate(self, path) -> None:
+        sp = str(Path(path))
+        with self._lock:
+            for k in [k for k in self._items if k[0] == sp]:
+                self.bytes -= self._items.pop(k)[1]
+                self._by_path.pop((k[0], k[3], k[4]), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self.bytes, "maxBytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+PARQUET_CACHE = ParquetLRU()
+
+
+def read_parquet_cached(path, columns: Optional[List[str]] = None,
+                        row_groups: Optional[List[int]] = None) -> pd.DataFrame:
+    """pd.read_parquet 대체: 같은 파일(경로+mtime+크기)은 메모리에서 반환"""
+    return PARQUET_CACHE.read(path, columns, row_groups)
+
+
+# ── 파일 메타(스키마 + time 컬럼 row group 통계) 캐시: 푸터만 읽음
+_META_CACHE: Dict[tuple, dict] = {}
+_META_LOCK = threading.Lock()
+_TIME_COLS = ("time", "timestamp")
+_VOLUME_COLS = ("volume", "vol", "Volume")
+
+
+def _stat_to_sec(v, unit_div: int) -> Optional[int]:
+    if v is None:
+        return None
+    if isinstance(v, _dt.datetime):
+        if v.tzinfo is not None:
+            v = v.astimezone(_dt.timezone.utc).replace(tzinfo=None)
+        return calendar.timegm(v.timetuple())
+    if isinstance(v, (int, np.integer)):
+        return int(v) // unit_div
+    return None   # 문자열 등: 통계로 판단 불가
+
+
+def _file_meta(p: Path) -> dict:
+    """{"names": [...], "tcol": str|None, "rg": [(min_s, max_s)|None, ...]}"""
+    st = p.stat()
+    key = (str(p), st.st_mtime_ns, st.st_size)
+    with _META_LOCK:
+        hit = _META_CACHE.get(key)
+    if hit is not None:
+        return hit
+    md = pq.ParquetFile(p).metadata
+    names = [md.schema.column(i).name for i in range(md.num_columns)]
+    tcol = next((c for c in _TIME_COLS if c in names), None)
+    rg = []
+    rg_rows = [md.row_group(r).num_rows for r in range(md.num_row_groups)]
+    if tcol is not None:
+        ci = names.index(tcol)
+        for r in range(md.num_row_groups):
+            stt = md.row_group(r).column(ci).statistics
+            if stt is None or not stt.has_min_max:
+                rg.append(None)
+                continue
+            mx = stt.max
+            # 숫자 time은 로더와 같은 기준으로 us/ms/s 추정
+            div = (1_000_000 if isinstance(mx, (int, np.integer)) and mx > 10**14
+                   else 1_000 if isinstance(mx, (int, np.integer)) and mx > 10**12 else 1)
+            lo, hi = _stat_to_sec(stt.min, div), _stat_to_sec(mx, div)
+            rg.append((lo, hi) if lo is not None and hi is not None else None)
+    kv = md.metadata or {}
+    schema, layout = kv.get(SCHEMA_META_KEY), kv.get(LAYOUT_META_KEY)
+    meta = {"names": names, "tcol": tcol, "rg": rg, "rg_rows": rg_rows, "num_row_groups": md.num_row_groups,
+            "num_rows": md.num_rows,
+            "schema": schema.decode() if schema else None, "layout": layout.decode() if layout else None}
+    with _META_LOCK:
+        _META_CACHE[key] = meta
+    return meta
+
+
+def parquet_schema_version(path) -> Optional[str]:
+    """파일 메타데이터의 정규 스키마 버전 (구형 파일이면 None, 푸터만 읽음)"""
+    return _file_meta(Path(path))["schema"]
+
+
+def parquet_footer_summary(path) -> Dict[str, object]:
+    """푸터만으로 파일 요약: 행 수, time min/max(epoch-sec, 통계 없으면 None), 스키마 버전"""
+    meta = _file_meta(Path(path))
+    spans = [mm for mm in meta["rg"] if mm is not None]
+    full = bool(spans) and len(spans) == len(meta["rg"])
+    return {"rows": int(meta["num_rows"]), "hasTime": meta["tcol"] is not None,
+            "minTime": min(mm[0] for mm in spans) if full else None,
+            "maxTime": max(mm[1] for mm in spans) if full else None,
+            "schema": meta["schema"]}
+
+
+def parquet_layout_version(path) -> Optional[str]:
+    """row group 배치 버전 (월 단위 row group으로 기록된 파일이면 LAYOUT_VERSION)"""
+    return _file_meta(Path(path))["layout"]
+
+
+def read_parquet_tail(path, rows: int) -> pd.DataFrame:
+    """마지막 rows행 이상을 담은 끝쪽 row group만 읽기 (단일 row group 파일은 전체)"""
+    p = Path(path)
+    meta = _file_meta(p)
+    n, acc = meta["num_row_groups"], 0
+    first = n
+    while first > 0 and acc < rows:
+        first -= 1
+        acc += meta["rg_rows"][first]
+    if first <= 0:
+        return read_parquet_cached(p)
+    return read_parquet_cached(p, None, list(range(first, n)))
+
+
+def _year_outside(p: Path, start_ts: int, end_ts: Optional[int]) -> bool:
+    """{year}.parquet(UTC 연도 분할)이 요청 구간과 겹치지 않으면 True"""
+    try:
+        year = int(p.stem)
+    except ValueError:
+        return False
+    if start_ts and year < _dt.datetime.utcfromtimestamp(start_ts).year:
+        return True
+    if end_ts and year > _dt.datetime.utcfromtimestamp(end_ts).year:
+        return True
+    return False
+
+
+def _projected_read(p: Path, start_ts: int, end_ts: Optional[int]) -> Optional[pd.DataFrame]:
+    """필요 컬럼만 + 구간과 겹치는 row group만 읽기. 구간 밖이면 None"""
+    meta = _file_meta(p)
+    names = meta["names"]
+    if meta["schema"] == SCHEMA_VERSION:
+        cols = list(CANDLE_COLUMNS)
+    else:
+        cols = [c for c in (meta["tcol"], "open", "high", "low", "close") if c and c in names]
+        vcol = next((c for c in _VOLUME_COLS if c in names), None)
+        if vcol:
+            cols.append(vcol)
+    row_groups = None
+    if (start_ts or end_ts) and meta["rg"]:
+        keep = [i for i, mm in enumerate(meta["rg"])
+                if mm is None or not ((start_ts and mm[1] < start_ts) or (end_ts and mm[0] > end_ts))]
+        if not keep:
+            return None
+        if len(keep) < meta["num_row_groups"]:
+            row_groups = keep
+    return read_parquet_cached(p, cols if meta["tcol"] else None, row_groups)
+
+
+def candle_cache_stats() -> Dict[str, int]:
+    return PARQUET_CACHE.stats()
+
+
+def list_parquets(symbol: str, interval: str) -> List[Path]:
+    base = DATA_DIR / symbol / interval
+    if not base.exists(): return []
+    return sorted(base.glob("*.parquet"))
+
+def _time_to_sec(ts: pd.Series) -> pd.Series:
+    """datetime/숫자(us·ms·s 추정)/문자열 시간 컬럼 → epoch-sec int64"""
+    # 1) datetime 타입
+    if pd.api.types.is_datetime64_any_dtype(ts):
+        if pd.api.types.is_datetime64tz_dtype(ts.dtype):
+            ts = ts.dt.tz_convert('UTC').dt.tz_localize(None)
+        return (ts.astype("int64", copy=False) // 1_000_000_000).astype("int64", copy=False)
+    # 2) 숫자 타입 (us/ms/s 추정)
+    if pd.api.types.is_numeric_dtype(ts):
+        ts_num = ts.astype("int64", copy=False)
+        if ts_num.max() > 10**14:         # us → s
+            return (ts_num // 1_000_000).astype("int64", copy=False)
+        if ts_num.max() > 10**12:         # ms → s
+            return (ts_num // 1_000).astype("int64", copy=False)
+        return ts_num.astype("int64", copy=False)
+    # 3) 문자열 등 → 파싱
+    parsed = pd.to_datetime(ts, errors="coerce", utc=True)
+    # tz-aware → tz-naive 로 바꾼 뒤 int 변환
+    if pd.api.types.is_datetime64tz_dtype(parsed.dtype):
+        parsed = parsed.dt.tz_convert('UTC').dt.tz_localize(None)
+    return (parsed.astype("int64", copy=False) // 1_000_000_000).astype("int64", copy=False)
+
+
+def _normalize_columns(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    구형 파일 정규화: 'timestamp'도 허용하고 time이 datetime/ms여도 epoch-sec로,
+    volume 명칭 통일. 필수 컬럼이 없으면 None.
+    """
+    if "time" in df:
+        if pd.api.types.is_datetime64_any_dtype(df["time"]):
+            df["time"] = _time_to_sec(df["time"])
+    elif "timestamp" in df:
+        df["time"] = _time_to_sec(df["timestamp"])
+    else:
+        return None
+    if "volume" not in df and "vol" in df:
+        df = df.rename(columns={"vol": "volume"})
+    if "volume" not in df and "Volume" in df:
+        df = df.rename(columns={"Volume": "volume"})
+    if not all(col in df.columns for col in CANDLE_COLUMNS):
+        return None
+    return df[CANDLE_COLUMNS]
+
+
+def canonicalize_candles(df: pd.DataFrame, symbol: Optional[str] = None) -> pd.DataFrame:
+    """
+    수집/구형 프레임 → 정규 스키마 (time, OHLCV[, value][, symbol]).
+    결측 봉 제거, time 중복은 뒤의 행(새로 받은 값) 유지, 오름차순 정렬.
+    """
+    extra = {}
+    if "value" in df.columns:
+        extra["value"] = pd.to_numeric(df["value"], errors="coerce").astype("float64")
+    out = _normalize_columns(df.copy())
+    if out is None:
+        raise ValueError(f"캔들 필수 컬럼 없음: {list(df.columns)}")
+    out = out.astype({"time": "int64", "open": "float64", "high": "float64",
+                      "low": "float64", "close": "float64", "volume": "float64"})
+    for k, v in extra.items():
+        out[k] = v
+    if symbol is not None:
+        out["symbol"] = symbol
+    elif "symbol" in df.columns:
+        out["symbol"] = df["symbol"].astype(str)
+    out = out.dropna(subset=CANDLE_COLUMNS)
+    out = out.drop_duplicates(subset=["time"], keep="last").sort_values("time", kind="stable")
+    return out.reset_index(drop=True)
+
+
+def write_candles_parquet(df: pd.DataFrame, path, symbol: Optional[str] = None,
+                          storage: Optional[Dict[str, object]] = None) -> int:
+    """
+    정규 스키마로 변환해 원자적으로 저장(임시 파일 → 교체) + 캐시 무효화. 저장 행 수 반환.
+    storage: 바꿀 인코딩 항목 (없는 항목은 저장된 optimize 설정 → STORAGE_DEFAULTS 순). time은 DELTA_BINARY_PACKED(증가 정수),
+    가격/거래량은 BYTE_STREAM_SPLIT(부동소수 바이트 분리 → 압축률 향상)로 기록.
+    """
+    opts = {**STORAGE_DEFAULTS, **saved_storage(), **(storage or {})}
+    p = Path(path)
+    out = canonicalize_candles(df, symbol)
+    if opts["drop_symbol"] and "symbol" in out.columns:
+        out = out.drop(columns=["symbol"])
+    if p.parent.name in (opts["float32"] or []):
+        out = out.astype({c: "float32" for c in _PRICE_COLUMNS})
+    table = pa.Table.from_pandas(out, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           SCHEMA_META_KEY: SCHEMA_VERSION.encode(),
+                                           LAYOUT_META_KEY: LAYOUT_VERSION.encode()})
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + ".tmp")
+    # 월 경계마다 row group을 나눠 기록 (통계는 기본 활성)
+    month = pd.to_datetime(out["time"], unit="s").dt.to_period("M").to_numpy()
+    cuts = [0] + (np.flatnonzero(month[1:] != month[:-1]) + 1).tolist() + [len(out)]
+    floats = [c for c in out.columns if c in _PRICE_COLUMNS or c in ("volume", "value")]
+    encoding = {"time": "DELTA_BINARY_PACKED", **{c: "BYTE_STREAM_SPLIT" for c in floats}}
+    dict_cols = [c for c in out.columns if c not in encoding]   # symbol 등 문자열만 사전 인코딩
+    with pq.ParquetWriter(tmp, table.schema, compression=opts["compression"],
+                          compression_level=opts["level"], use_dictionary=dict_cols or False,
+                          column_encoding=encoding) as w:
+        for a, b in zip(cuts[:-1], cuts[1:]):
+            if b > a:
+                w.write_table(table.slice(a, b - a))
+    os.replace(tmp, p)
+    PARQUET_CACHE.invalidate(p)
+    return len(out)
+
+
+# ── 리샘플 캐시: 저장되지 않은 tf는 더 짧은 저장 tf에서 만들어 (symbol, tf, 원본 tf, 원본 서명) 키로 보관
+RESAMPLE_CACHE_MAX = int(os.getenv("RESAMPLE_CACHE_MAX", "64"))
+_RESAMPLED: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_RESAMPLE_LOCK = threading.Lock()
+
+
+def resample_source(symbol: str, tf: str) -> Optional[str]:
+    """tf 파일이 없을 때 리샘플 원본이 될 저장 tf (tf를 나누어떨어지게 하는 것 중 가장 긴 것), 없으면 None"""
+    period = TF_SECONDS.get(tf)
+    if period is None or list_parquets(symbol, tf):
+        return None
+    finer = sorted((s for s, sec in TF_SECONDS.items() if sec < period and period % sec == 0),
+                   key=lambda s: -TF_SECONDS[s])
+    for src in finer:
+        if list_parquets(symbol, src):
+            return src
+    return None
+
+
+def source_files(symbol: str, tf: str) -> Tuple[str, List[Path]]:
+    """(실제로 읽을 tf, 그 tf의 연도 파일들) — 저장된 tf면 자기 자신, 아니면 리샘플 원본"""
+    files = list_parquets(symbol, tf)
+    if files:
+        return tf, files
+    src = resample_source(symbol, tf)
+    return (src, list_parquets(symbol, src)) if src else (tf, [])
+
+
+def _files_signature(files: List[Path]) -> tuple:
+    sig = []
+    for p in files:
+        try:
+            st = p.stat()
+            sig.append((p.name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+    return tuple(sig)
+
+
+def _resampled_full(symbol: str, tf: str, src: str) -> pd.DataFrame:
+    """원본 tf 전체 → tf 리샘플 (원본 파일이 바뀌면 키가 달라져 다시 만든다)"""
+    key = (symbol, tf, src, _files_signature(list_parquets(symbol, src)))
+    with _RESAMPLE_LOCK:
+        df = _RESAMPLED.get(key)
+        if df is not None:
+            _RESAMPLED.move_to_end(key)
+            return df
+    df = resample_candles(_load_stored(symbol, src), tf)
+    with _RESAMPLE_LOCK:
+        for k in [k for k in _RESAMPLED if k[:3] == key[:3]]:   # 같은 (symbol, tf, src)의 옛 버전 제거
+            del _RESAMPLED[k]
+        _RESAMPLED[key] = df
+        while len(_RESAMPLED) > RESAMPLE_CACHE_MAX:
+            _RESAMPLED.popitem(last=False)
+    return df
+
+
+def load_candles(symbol: str, interval: str, start_ts: int = 0, end_ts: int | None = None) -> pd.DataFrame:
+    """
+    저장된 interval 파일에서 읽고, 없으면 더 짧은 저장 tf에서 리샘플(캐시)해 같은 형태로 반환.
+    리샘플은 전체 구간에서 만든 뒤 [start_ts, end_ts]로 자른다 (경계 봉이 잘리지 않도록).
+    """
+    src = resample_source(symbol, interval)
+    if src is None:
+        return _load_stored(symbol, interval, start_ts, end_ts)
+    df = _resampled_full(symbol, interval, src)
+    if df.empty:
+        return df.copy()
+    t = df["time"].to_numpy(dtype="int64")
+    lo = int(np.searchsorted(t, start_ts, side="left")) if start_ts else 0
+    hi = int(np.searchsorted(t, end_ts, side="right")) if end_ts else len(t)
+    return df.iloc[lo:hi].reset_index(drop=True)
+
+
+def _load_stored(symbol: str, interval: str, start_ts: int = 0, end_ts: int | None = None) -> pd.DataFrame:
+    files = list_parquets(symbol, interval)
+    if not files:
+        return pd.DataFrame(columns=["time","open","high","low","close","volume"])
+    dfs, canonical = [], []
+    for p in files:
+        # 연도 파일 단위로 구간 밖이면 열지도 않음
+        if _year_outside(p, start_ts, end_ts):
+            continue
+        try:
+            df = _projected_read(p, start_ts, end_ts)
+            if df is None:
+                continue
+            if _file_meta(p)["schema"] == SCHEMA_VERSION:
+                # float32 가격 파일은 정규 dtype(float64)으로 복원
+                narrow = [c for c in _PRICE_COLUMNS if df[c].dtype != np.float64]
+                if narrow:
+                    df = df.astype({c: "float64" for c in narrow})
+                canonical.append(True)
+                dfs.append(df)
+                continue
+            df = _normalize_columns(df)
+            if df is None:
+                continue
+            canonical.append(False)
+            dfs.append(df)
+        except Exception:
+            continue
+    if not dfs:
+        return pd.DataFrame(columns=["time","open","high","low","close","volume"])
+    df = pd.concat(dfs, ignore_index=True)
+    # 정규 스키마 파일만이고 파일 간 경계도 오름차순이면 정리 생략 (연도 파일은 서로 겹치지 않음)
+    t = df["time"].to_numpy()
+    if not (all(canonical) and (len(t) < 2 or bool((t[1:] > t[:-1]).all()))):
+        df = df.dropna().drop_duplicates(subset=["time"]).sort_values("time")
+    if start_ts:
+        df = df[df["time"] >= start_ts]
+    if end_ts:
+        df = df[df["time"] <= end_ts]
+    return df.reset_index(drop=True)
+
+
+def resample_candles(df: pd.DataFrame, tf: str) -> pd.DataFrame:
+    """
+    더 짧은 봉 → tf 봉 (open=first, high=max, low=min, close=last, volume=sum).
+    time은 버킷 시작(epoch-sec). 1d는 KST 자정 기준. 마지막 버킷은 진행 중일 수 있음.
+    """
+    period = TF_SECONDS.get(tf)
+    if period is None or df is None or df.empty:
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+    t = df["time"].to_numpy(dtype="int64")
+    offset = KST_OFFSET_SEC if period >= 86400 else 0
+    bucket = ((t + offset) // period) * period - offset
+
+    # time 정렬 상태 → 버킷 경계만 찾아 reduceat
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+    o = df["open"].to_numpy(dtype="float64")
+    h = df["high"].to_numpy(dtype="float64")
+    l = df["low"].to_numpy(dtype="float64")
+    c = df["close"].to_numpy(dtype="float64")
+    v = df["volume"].to_numpy(dtype="float64")
+    return pd.DataFrame({
+        "time": bucket[starts],
+        "open": o[starts],
+        "high": np.maximum.reduceat(h, starts),
+        "low": np.minimum.reduceat(l, starts),
+        "close": c[ends],
+        "volume": np.add.reduceat(v, starts),
+    })
+
+
+class CandleProvider:
+    """
+    요청(시나리오 1회) 단위 캔들 공급자.
+    - (symbol, tf)는 요청된 가장 이른 start_ts부터 1회만 읽고(load_candles 구간 푸시다운),
+      같거나 늦은 start_ts/end_ts는 슬라이스로 응답. 더 이른 구간이 오면 그 범위로 다시 읽는다.
+    - hot tier 매핑 사본이 있으면 그걸 쓴다(메모리 매핑이라 힙 복사 없음)
+    - tf 파일이 없으면 load_candles가 보유한 더 짧은 TF(가장 긴 것 우선)에서 리샘플 (프로세스 캐시)
+    - 심볼 처리가 끝나면 drop(symbol)으로 그 심볼 프레임을 버린다
+    """
+
+    def __init__(self):
+        self._frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._times: Dict[Tuple[str, str], np.ndarray] = {}
+        self._starts: Dict[Tuple[str, str], int] = {}   # 읽은 구간 시작 (0 = 전체)
+        self.resampled: Dict[Tuple[str, str], str] = {}   # (symbol, tf) → 원본 tf
+
+    def _range(self, symbol: str, tf: str, start_ts: int = 0) -> pd.DataFrame:
+        key = (symbol, tf)
+        df = self._frames.get(key)
+        if df is not None and self._starts[key] <= (start_ts or 0):
+            return df
+        from .hot_tier import get_hot   # 순환 import 방지 (hot_tier → candle_store)
+        df, loaded_from = get_hot(symbol, tf), 0
+        if df is None:
+            df, loaded_from = load_candles(symbol, tf, start_ts or 0), (start_ts or 0)
+        src = resample_source(symbol, tf)
+        if src is not None and not df.empty:
+            self.resampled[key] = src
+        self._frames[key] = df
+        self._starts[key] = loaded_from
+        self._times[key] = df["time"].to_numpy(dtype="int64") if not df.empty else np.empty(0, dtype="int64")
+        return df
+
+    def get(self, symbol: str, tf: str, start_ts: int = 0, end_ts: Optional[int] = None) -> pd.DataFrame:
+        """load_candles(symbol, tf, start_ts, end_ts)와 같은 결과 (0부터 재인덱스된 복사본)"""
+        df = self._range(symbol, tf, start_ts)
+        if df.empty:
+            return df.copy()
+        times = self._times[(symbol, tf)]
+        lo = int(np.searchsorted(times, start_ts, side="left")) if start_ts else 0
+        hi = int(np.searchsorted(times, end_ts, side="right")) if end_ts else len(times)
+        out = df.iloc[lo:hi].reset_index(drop=True)
+        if len(out):
+            # 신호 캐시(signal_store)가 원본 프레임을 식별하는 표식 (슬라이스는 행 수/첫·끝 봉이 달라 제외됨)
+            out.attrs = {"candle_key": (symbol, tf), "rows": len(out),
+                         "first": int(out["time"].iloc[0]), "last": int(out["time"].iloc[-1])}
+        return out
+
+    def drop(self, symbol: str) -> None:
+        """심볼 처리 완료 후 호출: 그 심볼의 모든 tf 프레임 해제"""
+        for key in [k for k in self._frames if k[0] == symbol]:
+            self._frames.pop(key, None)
+            self._times.pop(key, None)
+            self._starts.pop(key, None)
@@ -7,6 +7,7 @@ import requests
 import shutil
 import pandas as pd
 from ..routers.coin_data import update_coin_data
+from .data_catalog import catalog_remove
 
 BASE_DIR = "/data"
 LOG_DIR = "/logs/backend"
@@ -59,6 +60,7 @@ def delete_coin_data(symbol: str, interval: str = "1d", year: str = "2024"):
         file_path = Path(BASE_DIR) / symbol / interval / f"{year}.parquet"
         if file_path.exists():
             file_path.unlink()
+            catalog_remove(symbol, interval, year)
             log_and_record(symbol, interval, year, "DELETE", "SUCCESS")
             return True
         else:
@@ -165,5 +167,6 @@ def delete_coin_all_data(symbol: str):
     folder = Path("/data") / symbol
     if folder.exists() and folder.is_dir():
         shutil.rmtree(folder)
+        catalog_remove(symbol)
         return True
     return False
\ No newline at end of file
@@ -0,0 +1,206 @@
+# backend/app/modules/coinlab/services/data_catalog.py
+# 캔들 파일 카탈로그 (SQLite): (symbol, interval, year)당 1행 — 행 수, time min/max, 바이트, 스키마 버전, 체크섬
+# 수집/삭제 시 트랜잭션으로 갱신, 값은 parquet 푸터에서만 읽는다. scan으로 전체 재구축 가능.
+# 데이터 목록/상태/용량 API는 디렉터리 순회 대신 여기서 응답한다.
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import hashlib, sqlite3, threading, time
+from .candle_store import DATA_DIR, parquet_footer_summary
+
+CATALOG_DB = DATA_DIR / "coinlab_catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candle_files (
+    symbol          TEXT NOT NULL,
+    interval        TEXT NOT NULL,
+    year            TEXT NOT NULL,
+    rows            INTEGER NOT NULL,
+    has_time        INTEGER NOT NULL,
+    min_time        INTEGER,
+    max_time        INTEGER,
+    bytes           INTEGER NOT NULL,
+    schema_version  TEXT,
+    checksum        TEXT NOT NULL,
+    mtime_ns        INTEGER NOT NULL,
+    updated_at      INTEGER NOT NULL,
+    PRIMARY KEY (symbol, interval, year)
+);
+CREATE INDEX IF NOT EXISTS ix_files_interval_year ON candle_files (interval, year);
+"""
+
+
+def file_checksum(p: Path) -> str:
+    """
+    parquet 푸터(메타데이터: 스키마, row group 통계/오프셋) + 크기 + mtime_ns 해시.
+    파일 끝만 읽으므로 재구축 비용이 데이터 크기와 무관하다. parquet이 아니면 파일 끝 64KB로 대신.
+    """
+    st = p.stat()
+    h = hashlib.blake2b(f"{st.st_size}:{st.st_mtime_ns}".encode(), digest_size=16)
+    with open(p, "rb") as f:
+        tail = min(st.st_size, 8)
+        f.seek(st.st_size - tail)
+        end = f.read(tail)
+        n = int.from_bytes(end[:4], "little") + 8 if len(end) == 8 and end[4:] == b"PAR1" else 1 << 16
+        f.seek(max(0, st.st_size - n))
+        h.update(f.read(n))
+    return h.hexdigest()
+
+
+def _entry(symbol: str, interval: str, year: str, p: Path) -> tuple:
+    st = p.stat()
+    s = parquet_footer_summary(p)
+    return (symbol, interval, str(year), int(s["rows"]), int(bool(s["hasTime"])), s["minTime"], s["maxTime"],
+            int(st.st_size), s["schema"], file_checksum(p), int(st.st_mtime_ns), int(time.time()))
+
+
+def _scan(root: Path):
+    """/data/{SYMBOL}/{interval}/{year}.parquet (숫자 연도 파일만) → (symbol, interval, year, path)"""
+    if not root.exists():
+        return
+    for sym_dir in sorted(root.iterdir()):
+        if not sym_dir.is_dir() or sym_dir.name.startswith((".", "_")):
+            continue
+        for tf_dir in sorted(sym_dir.iterdir()):
+            if not tf_dir.is_dir():
+                continue
+            for p in sorted(tf_dir.glob("*.parquet")):
+                if p.stem.isdigit():
+                    yield sym_dir.name, tf_dir.name, p.stem, p
+
+
+class CandleCatalog:
+    """프로세스 공용 SQLite 카탈로그 (스레드 간 연결 공유 → 락으로 직렬화)"""
+
+    def __init__(self, path: Path = CATALOG_DB, root: Path = DATA_DIR):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    # ── 갱신
+    def upsert(self, symbol: str, interval: str, year, path: Optional[Path] = None) -> None:
+        """파일 기록 직후 호출. 파일이 없으면 행 삭제."""
+        p = Path(path) if path else self.root / symbol / interval / f"{year}.parquet"
+        if not p.exists():
+            self.remove(symbol, interval, year)
+            return
+        row = _entry(symbol, interval, year, p)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO candle_files VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", row)
+
+    def remove(self, symbol: str, interval: Optional[str] = None, year=None) -> int:
+        where, args = ["symbol = ?"], [symbol]
+        if interval:
+            where.append("interval = ?")
+            args.append(interval)
+        if year is not None:
+            where.append("year = ?")
+            args.append(str(year))
+        with self._lock, self._conn:
+            cur = self._conn.execute(f"DELETE FROM candle_files WHERE {' AND '.join(where)}", args)
+        return cur.rowcount
+
+    def rebuild(self) -> Dict[str, Any]:
+        """디렉터리 전체 스캔(푸터만) → 한 트랜잭션으로 교체"""
+        rows, failed = [], []
+        for sym, tf, year, p in _scan(self.root):
+            try:
+                rows.append(_entry(sym, tf, year, p))
+            except Exception as e:
+                failed.append({"path": str(p), "error": str(e)})
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM candle_files")
+            self._conn.executemany("INSERT INTO candle_files VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+        return {"files": len(rows), "failed": failed}
+
+    def ensure_built(self) -> None:
+        """카탈로그가 비어 있으면(최초 배포) 1회 재구축"""
+        with self._lock:
+            n = self._conn.execute("SELECT COUNT(*) FROM candle_files").fetchone()[0]
+        if n == 0:
+            self.rebuild()
+
+    # ── 조회
+    def symbols(self, interval: str, year) -> List[str]:
+        """해당 interval/year 파일이 유효(시간 컬럼 + 1행 이상)한 심볼"""
+        self.ensure_built()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT symbol FROM candle_files WHERE interval = ? AND year = ? AND rows > 0 AND has_time = 1 "
+                "ORDER BY symbol", (interval, str(year))).fetchall()
+        return [r[0] for r in rows]
+
+    def state(self) -> Dict[str, Dict[str, Dict[str, bool]]]:
+        """{symbol: {interval: {year: True}}}"""
+        self.ensure_built()
+        with self._lock:
+            rows = self._conn.execute("SELECT symbol, interval, year FROM candle_files").fetchall()
+        out: Dict[str, Dict[str, Dict[str, bool]]] = {}
+        for sym, tf, year in rows:
+            out.setdefault(sym, {}).setdefault(tf, {})[year] = True
+        return out
+
+    def total_bytes(self) -> int:
+        self.ensure_built()
+        with self._lock:
+            return int(self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM candle_files").fetchone()[0])
+
+    def last_time(self, symbol: str, interval: str) -> Optional[int]:
+        """저장된 마지막 봉 time (epoch-sec, 없으면 None)"""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(max_time) FROM candle_files WHERE symbol = ? AND interval = ?",
+                                     (symbol, interval)).fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+    def entries(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, args = [], []
+        for col, val in (("symbol", symbol), ("interval", interval)):
+            if val:
+                where.append(f"{col} = ?")
+                args.append(val)
+        cond = ("WHERE " + " AND ".join(where)) if where else ""
+        with self._lock:
+            cur = self._conn.execute(f"SELECT * FROM candle_files {cond} ORDER BY symbol, interval, year", args)
+            names = [d[0] for d in cur.description]
+            return [dict(zip(names, r)) for r in cur.fetchall()]
+
+
+_CATALOG: Optional[CandleCatalog] = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_catalog() -> Optional[CandleCatalog]:
+    """공용 카탈로그 (열 수 없으면 None → 호출부는 디렉터리 순회로 대체)"""
+    global _CATALOG
+    if _CATALOG is None:
+        with _CATALOG_LOCK:
+            if _CATALOG is None:
+                try:
+                    _CATALOG = CandleCatalog()
+                except Exception:
+                    return None
+    return _CATALOG
+
+
+def catalog_upsert(symbol: str, interval: str, year, path: Optional[Path] = None) -> None:
+    """수집/변환 경로용: 카탈로그 갱신 실패가 저장 자체를 실패시키지 않게"""
+    cat = get_catalog()
+    if cat is None:
+        return
+    try:
+        cat.upsert(symbol, interval, year, path)
+    except Exception:
+        pass
+
+
+def catalog_remove(symbol: str, interval: Optional[str] = None, year=None) -> None:
+    cat = get_catalog()
+    if cat is None:
+        return
+    try:
+        cat.remove(symbol, interval, year)
+    except Exception:
+        pass
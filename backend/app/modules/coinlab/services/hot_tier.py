@@ -0,0 +1,162 @@
+# backend/app/modules/coinlab/services/hot_tier.py
+# 자주 쓰는 (symbol, tf) 전체 시계열의 비압축 Arrow IPC 사본: /data/_hot/{SYMBOL}__{tf}.arrow
+# 메모리 매핑으로 열어 uvicorn 워커들이 같은 OS 페이지 캐시를 공유하고, 숫자 컬럼은 복사 없는
+# (읽기 전용) NumPy 뷰로 받는다. 원본 parquet 서명(파일명·mtime·크기)이 바뀌면 자동 무효.
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import json, os, threading
+import pandas as pd
+import pyarrow as pa
+from .candle_store import DATA_DIR, load_candles, source_files
+
+HOT_DIR = DATA_DIR / "_hot"
+HOT_TIER_ENABLED = os.getenv("HOT_TIER_ENABLED", "1") not in ("0", "false", "False")
+HOT_TIER_MAX_BYTES = int(float(os.getenv("HOT_TIER_MAX_MB", "1024")) * 1024 * 1024)
+HOT_TIER_MIN_LOADS = int(os.getenv("HOT_TIER_MIN_LOADS", "3"))   # 워커 내 이 횟수 이상 읽히면 승격
+HOT_TIER_MAPPED_MAX = int(os.getenv("HOT_TIER_MAPPED_MAX", "32"))  # 워커당 열어 둘 매핑 수 (LRU)
+SOURCE_META_KEY = b"coinlab.source"
+
+_lock = threading.Lock()
+_loads: Dict[Tuple[str, str], int] = {}
+_mapped: "OrderedDict[Tuple[str, str], Tuple[str, pd.DataFrame]]" = OrderedDict()   # (symbol, tf) → (서명, 매핑 프레임)
+_stats = {"hits": 0, "misses": 0, "materialized": 0, "stale": 0, "evicted": 0}
+
+
+def _hot_path(symbol: str, tf: str) -> Path:
+    return HOT_DIR / f"{symbol}__{tf}.arrow"
+
+
+def _key_of(p: Path) -> Optional[Tuple[str, str]]:
+    symbol, sep, tf = p.stem.partition("__")
+    return (symbol, tf) if sep else None
+
+
+def source_signature(symbol: str, tf: str) -> str:
+    """원본 연도 parquet들의 (tf, 이름, mtime_ns, 크기) → 문자열 (stat만, 읽지 않음). 리샘플 tf는 원본 tf 파일 기준."""
+    src, files = source_files(symbol, tf)
+    sig = [src]
+    for p in files:
+        try:
+            st = p.stat()
+            sig.append([p.name, st.st_mtime_ns, st.st_size])
+        except OSError:
+            continue
+    return json.dumps(sig, separators=(",", ":"))
+
+
+def _open(p: Path) -> Tuple[Optional[str], pa.Table]:
+    table = pa.ipc.open_file(pa.memory_map(str(p), "r")).read_all()
+    sig = (table.schema.metadata or {}).get(SOURCE_META_KEY)
+    return (sig.decode() if sig else None), table
+
+
+def materialize(symbol: str, tf: str) -> bool:
+    """parquet → 비압축 IPC 파일 (임시 파일 → 교체). 데이터가 없으면 False."""
+    sig = source_signature(symbol, tf)
+    df = load_candles(symbol, tf)
+    if df.empty:
+        return False
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_META_KEY: sig.encode()})
+    p = _hot_path(symbol, tf)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as f:
+        with pa.ipc.new_file(f, table.schema) as w:
+            w.write_table(table)
+    os.replace(tmp, p)   # 이미 매핑한 워커는 기존 inode를 계속 읽는다
+    with _lock:
+        _mapped.pop((symbol, tf), None)
+        _stats["materialized"] += 1
+    _evict_if_needed(keep=p)
+    return True
+
+
+def _evict_if_needed(keep: Optional[Path] = None) -> None:
+    """용량 상한 초과 시 최근 사용(mtime) 오래된 파일부터 삭제"""
+    files = []
+    for p in HOT_DIR.glob("*.arrow"):
+        try:
+            st = p.stat()
+            files.append((st.st_mtime, st.st_size, p))
+        except OSError:
+            pass
+    total = sum(f[1] for f in files)
+    for _, size, p in sorted(files):
+        if total <= HOT_TIER_MAX_BYTES:
+            break
+        if keep is not None and p == keep:
+            continue
+        try:
+            p.unlink()
+            total -= size
+            with _lock:
+                _mapped.pop(_key_of(p), None)   # 삭제된 파일의 mmap을 놓는다
+                _stats["evicted"] += 1
+        except OSError:
+            pass
+
+
+def get_hot(symbol: str, tf: str) -> Optional[pd.DataFrame]:
+    """
+    최신 hot 사본이 있으면 매핑 프레임(읽기 전용 뷰) 반환, 없거나 오래됐으면 None.
+    사용 빈도가 HOT_TIER_MIN_LOADS에 닿으면 이 호출에서 승격(materialize).
+    """
+    if not HOT_TIER_ENABLED:
+        return None
+    key = (symbol, tf)
+    sig = source_signature(symbol, tf)
+    p = _hot_path(symbol, tf)
+    alive = p.exists()   # 다른 워커가 축출했으면 이 워커의 매핑도 놓는다
+    with _lock:
+        cached = _mapped.get(key)
+        if cached is not None and cached[0] == sig and alive:
+            _mapped.move_to_end(key)
+            _stats["hits"] += 1
+            return cached[1]
+        if cached is not None:
+            del _mapped[key]   # 원본이 바뀌었거나 파일이 삭제됨 → 옛 매핑 해제
+    if alive:
+        try:
+            file_sig, table = _open(p)
+            if file_sig == sig:
+                df = table.to_pandas(split_blocks=True)   # 숫자 컬럼 zero-copy
+                os.utime(p)   # 최근 사용 표시 (축출 순서)
+                with _lock:
+                    _mapped[key] = (sig, df)
+                    _mapped.move_to_end(key)
+                    while len(_mapped) > HOT_TIER_MAPPED_MAX:
+                        _mapped.popitem(last=False)
+                    _stats["hits"] += 1
+                return df
+            with _lock:
+                _stats["stale"] += 1
+        except Exception:
+            pass
+    with _lock:
+        _stats["misses"] += 1
+        _loads[key] = n = _loads.get(key, 0) + 1
+    if n >= HOT_TIER_MIN_LOADS:
+        try:
+            if materialize(symbol, tf):
+                return get_hot(symbol, tf)
+        except Exception:
+            return None
+    return None
+
+
+def refresh_hot(symbol: str, tf: str) -> bool:
+    """수집 후 호출: 이미 hot인 (symbol, tf)만 다시 만든다"""
+    if not HOT_TIER_ENABLED or not _hot_path(symbol, tf).exists():
+        return False
+    try:
+        return materialize(symbol, tf)
+    except Exception:
+        return False
+
+
+def hot_tier_stats() -> Dict[str, Any]:
+    files = list(HOT_DIR.glob("*.arrow")) if HOT_DIR.exists() else []
+    return {**_stats, "files": len(files), "bytes": sum(p.stat().st_size for p in files),
+            "maxBytes": HOT_TIER_MAX_BYTES, "mapped": len(_mapped), "mappedMax": HOT_TIER_MAPPED_MAX}
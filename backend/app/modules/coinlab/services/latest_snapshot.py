@@ -0,0 +1,162 @@
+# backend/app/modules/coinlab/services/latest_snapshot.py
+# 유니버스 최신 봉 스냅샷: /data/_snapshot/latest_{interval}.parquet
+# (symbol, interval)별 최신 연도 파일의 마지막 SNAPSHOT_BARS개 봉 + 마지막 봉의 파생값(return, volume_change_rate).
+# 조건검색(오프라인)은 심볼마다 parquet를 여는 대신 이 파일 하나를 읽는다.
+# 심볼별 원본 서명(연도, mtime_ns, 크기)을 함께 저장 → 카탈로그와 다르면 그 심볼만 다시 만든다.
+from typing import Dict, List, Optional, Set
+from pathlib import Path
+import math, os, threading
+import numpy as np
+import pandas as pd
+from .candle_store import DATA_DIR, canonicalize_candles, read_parquet_cached, read_parquet_tail
+from .data_catalog import get_catalog
+
+SNAPSHOT_DIR = DATA_DIR / "_snapshot"
+SNAPSHOT_BARS = int(os.getenv("SNAPSHOT_BARS", "250"))   # MA 200 + 여유
+DERIVED_COLUMNS = ["return", "volume_change_rate"]
+_SRC_COLUMNS = ["src_year", "src_mtime_ns", "src_bytes"]
+
+_lock = threading.Lock()
+
+
+def snapshot_path(interval: str) -> Path:
+    return SNAPSHOT_DIR / f"latest_{interval}.parquet"
+
+
+def _pct(now: float, prev: float) -> Optional[float]:
+    """(now - prev) / prev * 100, 소수 2자리 (계산 불가면 None)"""
+    try:
+        if prev and prev != 0:
+            v = (float(now) - float(prev)) / float(prev) * 100.0
+            return None if math.isnan(v) else round(v, 2)
+    except Exception:
+        pass
+    return None
+
+
+def _latest_sources(interval: str) -> Dict[str, dict]:
+    """카탈로그 기준 심볼별 최신 연도 파일 {symbol: {year, mtime_ns, bytes}}"""
+    cat = get_catalog()
+    out: Dict[str, dict] = {}
+    if cat is None:
+        return out
+    cat.ensure_built()
+    for e in cat.entries(interval=interval):
+        if e["rows"] <= 0 or not e["has_time"]:
+            continue
+        cur = out.get(e["symbol"])
+        if cur is None or int(e["year"]) > int(cur["year"]):
+            out[e["symbol"]] = {"year": e["year"], "mtime_ns": e["mtime_ns"], "bytes": e["bytes"]}
+    return out
+
+
+def _symbol_rows(symbol: str, interval: str, src: dict) -> pd.DataFrame:
+    """최신 연도 파일 끝 SNAPSHOT_BARS봉 (정규 스키마) + 파생값 + 원본 서명"""
+    p = DATA_DIR / symbol / interval / f"{src['year']}.parquet"
+    df = canonicalize_candles(read_parquet_tail(p, SNAPSHOT_BARS), symbol).tail(SNAPSHOT_BARS)
+    df = df.reset_index(drop=True)
+    for c in DERIVED_COLUMNS:
+        df[c] = np.nan
+    if len(df) >= 2:
+        last = len(df) - 1
+        ret = _pct(df["close"].iloc[-1], df["close"].iloc[-2])
+        vcr = _pct(df["volume"].iloc[-1], df["volume"].iloc[-2])
+        df.loc[last, "return"] = np.nan if ret is None else ret
+        df.loc[last, "volume_change_rate"] = np.nan if vcr is None else vcr
+    df["src_year"] = str(src["year"])
+    df["src_mtime_ns"] = int(src["mtime_ns"])
+    df["src_bytes"] = int(src["bytes"])
+    return df
+
+
+def _write(interval: str, df: pd.DataFrame) -> None:
+    p = snapshot_path(interval)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + ".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, p)
+
+
+def _read(interval: str) -> Optional[pd.DataFrame]:
+    p = snapshot_path(interval)
+    if not p.exists():
+        return None
+    try:
+        return read_parquet_cached(p)
+    except Exception:
+        return None
+
+
+def refresh_snapshot(interval: str, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    카탈로그와 서명이 다른(또는 없는) 심볼만 다시 만들어 스냅샷 교체.
+    symbols 지정 시 그 심볼만 강제 갱신(수집 직후 호출용). 반환: 최신 스냅샷.
+    """
+    with _lock:
+        sources = _latest_sources(interval)
+        snap = _read(interval)
+        if snap is not None and not snap.empty:
+            sig = snap.groupby("symbol", sort=False)[_SRC_COLUMNS].last()
+        else:
+            snap, sig = None, pd.DataFrame(columns=_SRC_COLUMNS)
+        force = set(symbols or [])
+        stale: Set[str] = set()
+        for sym, src in sources.items():
+            if sym in force or sym not in sig.index:
+                stale.add(sym)
+                continue
+            row = sig.loc[sym]
+            if (str(row["src_year"]) != str(src["year"]) or int(row["src_mtime_ns"]) != int(src["mtime_ns"])
+                    or int(row["src_bytes"]) != int(src["bytes"])):
+                stale.add(sym)
+        gone = set(sig.index) - set(sources)
+        if snap is not None and not stale and not gone:
+            return snap
+        parts = []
+        if snap is not None:
+            parts.append(snap[~snap["symbol"].isin(stale | gone)])
+        for sym in sorted(stale):
+            try:
+                parts.append(_symbol_rows(sym, interval, sources[sym]))
+            except Exception:
+                continue
+        out = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        _write(interval, out)
+        return out
+
+
+def latest_frames(interval: str, symbols_filter: Optional[Set[str]] = None) -> Dict[str, pd.DataFrame]:
+    """{symbol: 최신 봉 DataFrame(정규 스키마 + symbol)} — 파생/서명 컬럼은 제외"""
+    snap = refresh_snapshot(interval)
+    if snap is None or snap.empty:
+        return {}
+    if symbols_filter:
+        snap = snap[snap["symbol"].isin(symbols_filter)]
+    drop = [c for c in DERIVED_COLUMNS + _SRC_COLUMNS if c in snap.columns]
+    frames = {}
+    for sym, g in snap.drop(columns=drop).groupby("symbol", sort=True):
+        frames[sym] = g.reset_index(drop=True)
+    return frames
+
+
+def latest_summary(interval: str, symbols_filter: Optional[Set[str]] = None) -> List[dict]:
+    """심볼당 마지막 봉 1행 + 파생값 (유니버스 스크린용)"""
+    snap = refresh_snapshot(interval)
+    if snap is None or snap.empty:
+        return []
+    last = snap.groupby("symbol", sort=True).tail(1)
+    if symbols_filter:
+        last = last[last["symbol"].isin(symbols_filter)]
+    last = last.drop(columns=[c for c in _SRC_COLUMNS if c in last.columns])
+    last = last.astype(object).where(pd.notna(last), None)
+    return last.to_dict(orient="records")
+
+
+def update_snapshot(symbol: str, interval: str) -> None:
+    """수집 직후 호출: 스냅샷이 이미 있을 때만 해당 심볼 갱신 (실패해도 저장은 유지)"""
+    if not snapshot_path(interval).exists():
+        return
+    try:
+        refresh_snapshot(interval, [symbol])
+    except Exception:
+        pass
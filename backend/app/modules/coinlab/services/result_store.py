@@ -0,0 +1,133 @@
+# backend/app/modules/coinlab/services/result_store.py
+# 후보 파라미터 평가 결과 영구 저장소 (SQLite)
+# 키 = (데이터 지문, 전략, 파라미터, 청산/비용 설정, 신호 모드, EoT 포함 여부) → train 지표
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import json, sqlite3, threading, time
+from .candle_store import DATA_DIR
+
+RESULT_DB = DATA_DIR / "coinlab_results.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidate_results (
+    key           TEXT PRIMARY KEY,
+    symbol        TEXT NOT NULL,
+    tf            TEXT NOT NULL,
+    strategy      TEXT NOT NULL,
+    params        TEXT NOT NULL,
+    train_start   INTEGER,
+    train_end     INTEGER,
+    fee_bps       REAL,
+    slippage_bps  REAL,
+    exit_cfg      TEXT,
+    data_fp       TEXT,
+    score         REAL,
+    stats         TEXT NOT NULL,
+    created_at    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_cand_lookup ON candidate_results (symbol, tf, strategy, train_end);
+CREATE INDEX IF NOT EXISTS ix_cand_profile ON candidate_results (symbol, tf, strategy, fee_bps, slippage_bps, exit_cfg, train_end);
+"""
+
+
+class CandidateResultStore:
+    """프로세스 공용 SQLite 저장소 (스레드 간 연결 공유 → 락으로 직렬화)"""
+
+    def __init__(self, path: Path = RESULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT stats FROM candidate_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, meta: Dict[str, Any], params: Dict[str, Any], score: float, stats: Dict[str, Any]) -> None:
+        self.put_many([(key, meta, params, score, stats)])
+
+    def put_many(self, items: List[Tuple[str, Dict[str, Any], Dict[str, Any], float, Dict[str, Any]]]) -> None:
+        """[(key, meta, params, score, stats), ...] 를 한 트랜잭션으로 (폴드당 커밋 1회)"""
+        if not items:
+            return
+        now = int(time.time())
+        rows = [(key, meta.get("symbol"), meta.get("tf"), meta.get("strategy"),
+                 json.dumps(params or {}, sort_keys=True, default=str),
+                 meta.get("train_start"), meta.get("train_end"),
+                 meta.get("fee_bps"), meta.get("slippage_bps"),
+                 json.dumps(meta.get("exit") or {}, sort_keys=True, default=str),
+                 meta.get("data_fp"), float(score), json.dumps(stats, default=str), now)
+                for key, meta, params, score, stats in items]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO candidate_results VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+
+    def best_params(self, symbol: Optional[str] = None, tf: Optional[str] = None,
+                    strategy: Optional[str] = None, fee_bps: Optional[float] = None,
+                    slippage_bps: Optional[float] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        (symbol, tf, strategy, 비용 프로파일, 청산 설정)별 가장 최근 train 구간(train_end 최대)에서
+        score 최고 후보 → 다른 수수료/청산 조건으로 튜닝된 결과끼리 섞이지 않는다.
+        fee_bps/slippage_bps로 특정 비용 프로파일만 조회. 재실행 없이 저장된 평가만 조회한다.
+        """
+        where, args = [], []
+        for col, val in (("symbol", symbol), ("tf", tf), ("strategy", strategy),
+                         ("fee_bps", fee_bps), ("slippage_bps", slippage_bps)):
+            if val is not None and val != "":
+                where.append(f"{col} = ?")
+                args.append(val)
+        cond = ("WHERE " + " AND ".join(where)) if where else ""
+        sql = f"""
+            WITH latest AS (
+                SELECT symbol, tf, strategy, fee_bps, slippage_bps, exit_cfg, MAX(train_end) AS train_end
+                FROM candidate_results {cond}
+                GROUP BY symbol, tf, strategy, fee_bps, slippage_bps, exit_cfg
+            ), ranked AS (
+                SELECT r.*, ROW_NUMBER() OVER (
+                    PARTITION BY r.symbol, r.tf, r.strategy, r.fee_bps, r.slippage_bps, r.exit_cfg
+                    ORDER BY r.score DESC, r.created_at DESC) AS rn
+                FROM candidate_results r
+                JOIN latest l ON r.symbol = l.symbol AND r.tf = l.tf AND r.strategy = l.strategy
+                             AND r.fee_bps IS l.fee_bps AND r.slippage_bps IS l.slippage_bps
+                             AND r.exit_cfg IS l.exit_cfg AND r.train_end IS l.train_end
+            )
+            SELECT symbol, tf, strategy, params, train_start, train_end, fee_bps, slippage_bps,
+                   exit_cfg, score, stats, created_at
+            FROM ranked WHERE rn = 1 ORDER BY symbol, tf, strategy, fee_bps, slippage_bps, exit_cfg LIMIT ?
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, (*args, int(limit))).fetchall()
+        out = []
+        for (sym, tf_, strat, params, tr_s, tr_e, fee, slp, exit_cfg, score, stats, created) in rows:
+            out.append({
+                "symbol": sym, "tf": tf_, "strategy": strat,
+                "bestParams": json.loads(params), "trainWindow": [tr_s, tr_e],
+                "feeBps": fee, "slippageBps": slp, "exit": json.loads(exit_cfg or "{}"),
+                "score": score, "trainStats": json.loads(stats), "evaluatedAt": created,
+            })
+        return out
+
+
+_STORE: Optional[CandidateResultStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_result_store() -> Optional[CandidateResultStore]:
+    """공용 저장소 (열 수 없으면 None → 저장 없이 계산)"""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                try:
+                    _STORE = CandidateResultStore()
+                except Exception:
+                    return None
+    return _STORE
@@ -0,0 +1,124 @@
+# backend/app/modules/coinlab/services/results_table.py
+# 시나리오 결과를 (step, tf, symbol, profile, fold, 지표...) 평면 컬럼 테이블로 보관하고
+# 테마/tf/step 등 임의 키로 pandas groupby 집계
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ["step", "tf", "symbol", "profile", "fold"]
+METRIC_COLUMNS = ["trades", "winRate", "pf", "expectancy", "mdd", "cagr", "avgWinPct", "avgLossPct"]
+DEFAULT_GROUP_METRICS = ["pf", "winRate", "mdd"]
+UNCLASSIFIED = "(unclassified)"
+
+
+class ResultsTable:
+    """폴드 단위 결과를 컬럼별 리스트로 누적 (trades 본문은 담지 않음)"""
+
+    def __init__(self):
+        self.cols: Dict[str, list] = {c: [] for c in KEY_COLUMNS + METRIC_COLUMNS}
+
+    def add_run(self, step_index: int, sym_out: Dict[str, Any]) -> None:
+        seen = set()
+        for prof in sym_out.get("profiles") or []:
+            name = prof.get("name")
+            if name in seen:   # 같은 프로파일이 중복 기재된 경우 첫 항목만
+                continue
+            seen.add(name)
+            for fold_i, r in enumerate(prof.get("runs") or []):
+                stats = r.get("stats") or {}
+                self.cols["step"].append(step_index)
+                self.cols["tf"].append(sym_out.get("tf"))
+                self.cols["symbol"].append(sym_out.get("symbol"))
+                self.cols["profile"].append(name)
+                self.cols["fold"].append(fold_i)
+                for m in METRIC_COLUMNS:
+                    v = stats.get(m) if stats else None
+                    # 빈 stats(데이터 부족 폴드)는 NaN → 평균에서 제외
+                    self.cols[m].append(float(v) if isinstance(v, (int, float)) else (0.0 if stats else np.nan))
+
+    def __len__(self):
+        return len(self.cols["symbol"])
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.cols)
+
+    def to_columns(self) -> Dict[str, list]:
+        """응답용 컬럼 dict (NaN → None)"""
+        out = {}
+        for k, v in self.cols.items():
+            out[k] = [None if isinstance(x, float) and np.isnan(x) else x for x in v]
+        return out
+
+
+def explode_theme_map(the_map: Dict[str, List[str]]) -> pd.DataFrame:
+    """
+    테마 매핑 → (symbol, theme) 행 테이블.
+    { "BTC_KRW": ["AI", ...] }(심볼→테마)와 { "AI": ["BTC_KRW", ...] }(테마→심볼) 형식 모두 허용.
+    """
+    rows = []
+    if the_map:
+        sym_keyed = any(str(k).upper().endswith("KRW") for k in the_map.keys())
+        for k, vals in the_map.items():
+            for v in (vals if isinstance(vals, list) else [vals]):
+                rows.append((k, v) if sym_keyed else (v, k))
+    return pd.DataFrame(rows, columns=["symbol", "theme"]).drop_duplicates()
+
+
+def per_symbol_stats(frame: pd.DataFrame,
+                     profile: Optional[str] = None,
+                     metrics: Optional[List[str]] = None) -> pd.DataFrame:
+    """(step, tf, symbol)별 폴드 평균 — 유효 폴드가 없으면 0.0"""
+    metrics = [m for m in (metrics or DEFAULT_GROUP_METRICS) if m in METRIC_COLUMNS]
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=["step", "tf", "symbol"] + metrics)
+    df = frame if profile is None else frame[frame["profile"] == profile]
+    return (df.groupby(["step", "tf", "symbol"], sort=False)[metrics]
+              .mean()
+              .fillna(0.0)
+              .reset_index())
+
+
+def group_stats(frame: pd.DataFrame,
+                by: str,
+                profile: Optional[str] = None,
+                metrics: Optional[List[str]] = None,
+                theme_pairs: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    (step, symbol)별 폴드 평균 → by(theme|tf|step|symbol) 단위 평균.
+    반환: { key: {"count", "symbols", "avg": {metric: mean}} }  (키 순서 = 첫 등장 순)
+    """
+    metrics = [m for m in (metrics or DEFAULT_GROUP_METRICS) if m in METRIC_COLUMNS]
+    if frame is None or frame.empty:
+        return {}
+    df = frame if profile is None else frame[frame["profile"] == profile]
+    if df.empty:
+        return {}
+
+    # 1) 심볼(단계)별 폴드 평균 — 유효 폴드가 없으면 0.0
+    per_sym = per_symbol_stats(df, None, metrics)
+
+    # 2) 그룹 키 부여
+    if by == "theme":
+        pairs = theme_pairs if theme_pairs is not None else pd.DataFrame(columns=["symbol", "theme"])
+        per_sym = per_sym.merge(pairs, on="symbol", how="left")
+        per_sym["theme"] = per_sym["theme"].fillna(UNCLASSIFIED)
+        key = "theme"
+    elif by in ("tf", "step", "symbol"):
+        key = by
+    else:
+        return {}
+
+    # 3) 그룹 집계 한 번에
+    g = per_sym.groupby(key, sort=False)
+    means = g[metrics].mean()
+    counts = g.size()
+    members = g["symbol"].agg(list)
+
+    out: Dict[str, Any] = {}
+    for k in means.index:
+        out[str(k)] = {
+            "count": int(counts.loc[k]),
+            "symbols": members.loc[k],
+            "avg": {m: float(means.loc[k, m]) for m in metrics},
+        }
+    return out
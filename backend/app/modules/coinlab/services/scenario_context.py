@@ -0,0 +1,194 @@
+# backend/app/modules/coinlab/services/scenario_context.py
+# 시나리오 실행 간 공유 작업 메모 (배치 실행 시 캔들 로드/신호 계산을 고유 작업 1회로)
+# + 요청 간 단계 노드 캐시 (candles → signals → masks → engine/metrics, 입력 해시 키, MB 상한 LRU)
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
+import hashlib, json, os, sys, threading, time
+import numpy as np
+import pandas as pd
+from .candle_store import CandleProvider
+
+NODE_CACHE_MAX_BYTES = int(float(os.getenv("NODE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+
+def approx_bytes(val: Any) -> int:
+    """노드 값의 대략적 메모리 (ndarray/Series/DataFrame은 버퍼 크기, 컨테이너는 재귀 합)"""
+    if isinstance(val, pd.DataFrame):
+        return int(val.memory_usage(index=True, deep=False).sum())
+    if isinstance(val, pd.Series):
+        return int(val.memory_usage(index=True, deep=False))
+    if isinstance(val, np.ndarray):
+        return int(val.nbytes)
+    if isinstance(val, dict):
+        return sys.getsizeof(val) + sum(approx_bytes(k) + approx_bytes(v) for k, v in val.items())
+    if isinstance(val, (list, tuple, set)):
+        return sys.getsizeof(val) + sum(approx_bytes(v) for v in val)
+    return sys.getsizeof(val)
+
+
+class NodeCache:
+    """
+    단계 노드 LRU: 키 → 결과, 용량은 approx_bytes 합으로 제한. 스레드 간 공유 → 락으로 직렬화.
+    입력(데이터 포함) 해시가 키이므로 같은 키는 같은 결과 → 무효화 불필요.
+    상한보다 큰 값 하나는 저장하지 않는다(계산 결과는 그대로 반환).
+    """
+
+    def __init__(self, max_bytes: int = NODE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None:
+                return False, None
+            self._items.move_to_end(key)
+            return True, hit[0]
+
+    def put(self, key: str, val: Any) -> None:
+        size = approx_bytes(val)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (val, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._items:
+                _, (_, sz) = self._items.popitem(last=False)
+                self.bytes -= sz
+                self.evictions += 1
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._items), "bytes": self.bytes, "maxBytes": self.max_bytes,
+                "evictions": self.evictions}
+
+
+# 프로세스 수명 노드 캐시 (요청 간 재사용, NODE_CACHE_MAX_MB 상한)
+_NODE_CACHE = NodeCache()
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    노드 입력 해시. ndarray/Series/DataFrame은 값 바이트, 그 외는 정렬된 JSON으로.
+    데이터 자체를 해시하므로 parquet 갱신 시 자연히 다른 키가 된다.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        if isinstance(p, pd.DataFrame):
+            for c in p.columns:
+                h.update(str(c).encode())
+                h.update(np.ascontiguousarray(p[c].to_numpy()).tobytes())
+        elif isinstance(p, pd.Series):
+            h.update(np.ascontiguousarray(p.to_numpy()).tobytes())
+        elif isinstance(p, np.ndarray):
+            h.update(str(p.dtype).encode())
+            h.update(np.ascontiguousarray(p).tobytes())
+        else:
+            h.update(json.dumps(p, sort_keys=True, default=str).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+def clear_node_cache() -> None:
+    _NODE_CACHE.clear()
+
+
+class ScenarioContext:
+    """
+    한 번의 요청(단일 또는 배치 시나리오) 동안 유지되는 공유 캐시.
+    - candles : (symbol, tf) 캔들 요청 구간 1회 로드 + 슬라이스/리샘플
+    - memo    : (kind, key...) → 계산 결과. kind별 요청 수/고유 계산 수를 센다
+    키에는 (symbol, tf, start_ts)와 전략/파라미터 등 결과를 결정하는 입력이 모두 들어가야 한다.
+    now_ts는 컨텍스트 생성 시각으로 고정 → 같은 periodKey는 시나리오 간 같은 start_ts가 된다.
+    node()는 요청 간에도 유지되는 노드 캐시(reuse=False면 이 요청 안에서만)를 사용한다.
+    심볼 레코드를 내보낸 뒤 release(symbol)로 그 심볼의 메모/요청 전용 노드를 버린다
+    → 요청 중 메모리는 유니버스 크기가 아니라 처리 중인 심볼 수에 비례.
+    retain_symbols: 배치에서 뒤 시나리오가 다시 쓸 심볼 (release해도 유지)
+    """
+
+    def __init__(self, reuse: bool = True):
+        self.now_ts = int(time.time())
+        self.reuse = reuse
+        self._nodes: NodeCache = _NODE_CACHE if reuse else NodeCache()
+        self._node_hits: Dict[str, int] = {}
+        self._node_runs: Dict[str, int] = {}
+        self.candles = CandleProvider()
+        self._memo: Dict[tuple, Any] = {}
+        self._requests: Dict[str, int] = {}
+        self._computed: Dict[str, int] = {}
+        self._owned: Dict[str, List[str]] = {}   # symbol → 요청 전용 노드 키 (reuse=False)
+        self.retain_symbols: Set[str] = set()
+
+    def memo(self, kind: str, key: tuple, fn: Callable[[], Any]) -> Any:
+        self._requests[kind] = self._requests.get(kind, 0) + 1
+        k = (kind,) + tuple(key)
+        if k in self._memo:
+            return self._memo[k]
+        self._computed[kind] = self._computed.get(kind, 0) + 1
+        val = fn()
+        self._memo[k] = val
+        return val
+
+    def node(self, kind: str, key: str, fn: Callable[[], Any], owner: Optional[str] = None) -> Any:
+        """
+        key = fingerprint(입력...). 적중 시 fn을 실행하지 않는다(하위 노드만 재실행).
+        owner: 노드를 만든 심볼 — 요청 전용 노드는 release(owner) 때 함께 버린다
+        """
+        k = kind + ":" + key
+        if owner is not None and not self.reuse:
+            self._owned.setdefault(owner, []).append(k)
+        hit, val = self._nodes.get(k)
+        if hit:
+            self._node_hits[kind] = self._node_hits.get(kind, 0) + 1
+            return val
+        self._node_runs[kind] = self._node_runs.get(kind, 0) + 1
+        val = fn()
+        self._nodes.put(k, val)
+        return val
+
+    def discard(self, kind: str, key: str) -> None:
+        self._nodes.pop(kind + ":" + key)
+
+    def release(self, symbol: str) -> None:
+        """심볼 처리가 끝나면 호출: 그 심볼의 캔들 프레임, 메모(폴드/후보 신호), 요청 전용 노드 제거"""
+        if symbol in self.retain_symbols:
+            return
+        self.candles.drop(symbol)
+        for k in [k for k in self._memo if len(k) > 1 and k[1] == symbol]:
+            del self._memo[k]
+        for k in self._owned.pop(symbol, []):
+            self._nodes.pop(k)
+
+    def shared_dict(self, kind: str, key: tuple) -> dict:
+        """후보 신호 캐시처럼 호출부가 직접 채우는 dict를 키별로 공유"""
+        return self.memo(kind, key, dict)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "candleFrames": len(self.candles._frames),
+            "resampled": len(self.candles.resampled),
+            "requested": dict(self._requests),
+            "computed": dict(self._computed),
+            "nodeHits": dict(self._node_hits),
+            "nodeRuns": dict(self._node_runs),
+            "nodeCache": self._nodes.stats(),
+        }
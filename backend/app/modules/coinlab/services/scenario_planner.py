@@ -0,0 +1,190 @@
+# backend/app/modules/coinlab/services/scenario_planner.py
+# 시나리오 실행 전 작업량 추정 + 예산(admission) 검사 + 실측 처리량 보정
+# 작업 단위(workUnits) = 엔진이 시뮬레이션할 봉 수 (심볼 × 봉 × 후보 × 폴드 × 비용 프로파일)
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import calendar, json, math, os, threading, time
+import pyarrow.parquet as pq
+from .candle_store import DATA_DIR, TF_SECONDS, list_parquets
+
+THROUGHPUT_FILE = DATA_DIR / "scenario_throughput.json"
+DEFAULT_BARS_PER_SEC = 1_500_000.0   # 보정 전 초기값 (numpy 엔진 루프 실측 근사)
+EWMA_ALPHA = 0.3
+# 예산 기본값: 환경변수로 조정, payload.maxWorkUnits / maxSeconds로 요청별 하향 가능
+DEFAULT_MAX_UNITS = float(os.getenv("SCENARIO_MAX_WORK_UNITS", "2e9"))
+DEFAULT_MAX_SECONDS = float(os.getenv("SCENARIO_MAX_SECONDS", "600"))
+
+_ROWS_CACHE: Dict[tuple, int] = {}
+
+
+class ScenarioBudgetExceeded(Exception):
+    """추정 작업량이 예산을 넘는 시나리오 (라우터에서 413으로 변환)"""
+
+    def __init__(self, estimate: Dict[str, Any], reason: str):
+        super().__init__(reason)
+        self.estimate = estimate
+        self.reason = reason
+
+
+def _file_rows(p: Path) -> int:
+    """parquet 푸터 메타데이터의 행 수 (데이터는 읽지 않음, (path, mtime, size)로 캐시)"""
+    try:
+        st = p.stat()
+        key = (str(p), st.st_mtime_ns, st.st_size)
+        n = _ROWS_CACHE.get(key)
+        if n is None:
+            n = int(pq.read_metadata(p).num_rows)
+            _ROWS_CACHE[key] = n
+        return n
+    except Exception:
+        return 0
+
+
+def estimate_bars(symbol: str, tf: str, start_ts: int = 0) -> int:
+    """start_ts 이후 봉 수 추정. 연도 파일 단위 행 수 + 시작 연도는 남은 비율만큼."""
+    files = list_parquets(symbol, tf)
+    scale = 1.0
+    if not files and tf in TF_SECONDS:
+        # 상위 TF 파일이 없으면 더 짧은 TF를 리샘플하므로 그 행 수 / 배율
+        for src in sorted(TF_SECONDS, key=lambda s: -TF_SECONDS[s]):
+            sec = TF_SECONDS[src]
+            if sec < TF_SECONDS[tf] and TF_SECONDS[tf] % sec == 0 and list_parquets(symbol, src):
+                files = list_parquets(symbol, src)
+                scale = sec / TF_SECONDS[tf]
+                break
+    start_year = time.gmtime(start_ts).tm_year if start_ts else 0
+    total = 0.0
+    for p in files:
+        try:
+            year = int(p.stem)
+        except ValueError:
+            year = None
+        rows = _file_rows(p)
+        if year is None or not start_ts or year > start_year:
+            total += rows
+        elif year == start_year:
+            y0 = calendar.timegm((year, 1, 1, 0, 0, 0))
+            y1 = calendar.timegm((year + 1, 1, 1, 0, 0, 0))
+            total += rows * min(1.0, max(0.0, (y1 - start_ts) / (y1 - y0)))
+    bars = total * scale
+    if start_ts and tf in TF_SECONDS:
+        bars = min(bars, max(0.0, (time.time() - start_ts) / TF_SECONDS[tf]))
+    return int(bars)
+
+
+def _effective_candidates(n_cand: int, search_cfg: Dict[str, Any]) -> float:
+    """halving: 라운드마다 (후보 C/eta^r) × (구간 min_fraction·eta^r) ≈ C·min_fraction"""
+    if str(search_cfg.get("mode") or "grid").strip().lower() != "halving" or n_cand <= 1:
+        return float(n_cand)
+    eta = max(float(search_cfg.get("eta", 3) or 3), 2.0)
+    min_fraction = min(max(float(search_cfg.get("minFraction", 0.25) or 0.25), 1e-3), 1.0)
+    rounds = int(math.ceil(math.log(1.0 / min_fraction, eta))) + 1
+    return min(float(n_cand), n_cand * min_fraction * rounds)
+
+
+def step_work_units(bars: int, n_profiles: int, n_cand: int, folds: int, scheme: str,
+                    incremental: bool, search_cfg: Dict[str, Any]) -> float:
+    """(단계, 심볼) 1건의 엔진 봉 수. 기존 폴드 루프 2회(최적화 + 레거시 test 루프) 포함."""
+    if folds <= 0:
+        return float(n_profiles * 2 * bars)
+    folds = max(folds, 2)
+    c_eff = _effective_candidates(n_cand, search_cfg) if n_cand > 0 else 0.0
+    if str(scheme).lower() == "anchored":
+        test_bars = bars * (folds - 1) / folds
+        train_bars = bars if incremental else bars * (folds - 1) / 2.0
+    else:
+        test_bars = bars * 0.3
+        train_bars = bars * 0.7
+    return float(n_profiles * (c_eff * train_bars + 2 * test_bars))
+
+
+def load_throughput() -> float:
+    try:
+        v = float(json.loads(THROUGHPUT_FILE.read_text("utf-8")).get("barsPerSec") or 0)
+        return v if v > 0 else DEFAULT_BARS_PER_SEC
+    except Exception:
+        return DEFAULT_BARS_PER_SEC
+
+
+def record_throughput(work_units: float, seconds: float) -> Optional[float]:
+    """실측 (작업량, 소요시간)으로 처리량 EWMA 갱신. 너무 짧은 실행은 노이즈라 무시."""
+    if work_units <= 0 or seconds < 0.5:
+        return None
+    prev = load_throughput()
+    cur = work_units / seconds
+    new = prev * (1 - EWMA_ALPHA) + cur * EWMA_ALPHA
+    # 임시 파일 → 교체 (동시 실행이 잘린 파일을 남기지 않게, 임시 파일명은 프로세스/스레드별)
+    tmp = THROUGHPUT_FILE.with_name(f"{THROUGHPUT_FILE.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_text(json.dumps({"barsPerSec": new, "updatedAt": int(time.time())}), "utf-8")
+        os.replace(tmp, THROUGHPUT_FILE)
+    except Exception:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+    return new
+
+
+def estimate_work(steps: List[Dict[str, Any]], symbols: List[str], start_ts_list: List[int],
+                  profiles: List[Dict[str, Any]], wf: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    steps[i]의 start_ts는 start_ts_list[i]. 반환:
+    {"workUnits", "estSeconds", "barsPerSec", "symbols", "bars", "steps": [{tf, bars, candidates, workUnits}]}
+    """
+    folds = int(wf.get("folds", 0) or 0)
+    scheme = str(wf.get("scheme") or "rolling")
+    incremental = scheme.strip().lower() == "anchored" and bool(wf.get("incremental", False))
+    n_prof = max(1, len(profiles or []))
+
+    total_units, total_bars, per_step = 0.0, 0, []
+    for step, start_ts in zip(steps, start_ts_list):
+        tf = step.get("tf", "1d")
+        grid = step.get("strategyParamsGrid") or []
+        n_cand = len(grid) if (step.get("strategyCode") and grid and folds > 0) else 0
+        search_cfg = step.get("strategyParamsSearch") or {}
+        units, bars_sum = 0.0, 0
+        for sym in symbols:
+            b = estimate_bars(sym, tf, start_ts)
+            if b < 50:
+                continue
+            bars_sum += b
+            units += step_work_units(b, n_prof, n_cand, folds, scheme,
+                                     incremental and search_cfg.get("mode") != "halving", search_cfg)
+        per_step.append({"tf": tf, "bars": bars_sum, "candidates": max(n_cand, 1), "workUnits": int(units)})
+        total_units += units
+        total_bars += bars_sum
+
+    bps = load_throughput()
+    return {
+        "workUnits": int(total_units),
+        "estSeconds": round(total_units / bps, 2),
+        "barsPerSec": round(bps, 1),
+        "symbols": len(symbols),
+        "bars": total_bars,
+        "steps": per_step,
+    }
+
+
+def check_budget(estimate: Dict[str, Any], payload: Dict[str, Any]) -> None:
+    """예산 초과 시 ScenarioBudgetExceeded. payload 값은 서버 기본값보다 클 수 없다."""
+    max_units = DEFAULT_MAX_UNITS
+    max_secs = DEFAULT_MAX_SECONDS
+    try:
+        if payload.get("maxWorkUnits") is not None:
+            max_units = min(max_units, float(payload["maxWorkUnits"]))
+        if payload.get("maxSeconds") is not None:
+            max_secs = min(max_secs, float(payload["maxSeconds"]))
+    except (TypeError, ValueError):
+        pass
+    if estimate["workUnits"] > max_units:
+        raise ScenarioBudgetExceeded(estimate, f"estimated workUnits {estimate['workUnits']} > budget {int(max_units)}")
+    # deadlineMs가 예산 안이면 실행 시간은 마감으로 제한되므로 시간 예산은 검사하지 않음
+    try:
+        deadline_ms = float(payload.get("deadlineMs") or 0)
+    except (TypeError, ValueError):
+        deadline_ms = 0.0
+    if 0 < deadline_ms <= max_secs * 1000:
+        return
+    if estimate["estSeconds"] > max_secs:
+        raise ScenarioBudgetExceeded(estimate, f"estimated {estimate['estSeconds']}s > budget {max_secs}s")
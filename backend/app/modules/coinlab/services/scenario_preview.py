@@ -0,0 +1,133 @@
+# backend/app/modules/coinlab/services/scenario_preview.py
+# preview 모드: 테마 × 유동성 층화 표본 추출 + 층화 추정(평균, 신뢰구간)
+from typing import Any, Dict, List
+from statistics import NormalDist
+import math, os
+import numpy as np
+import pandas as pd
+from .results_table import UNCLASSIFIED
+
+LIQ_BUCKETS = 3   # 유동성 층: 상/중/하 (분위)
+PREVIEW_MAX_SAMPLE = int(os.getenv("PREVIEW_MAX_SAMPLE", "100"))   # 표본 심볼 수 절대 상한
+MERGED_THEME = "*"   # 합쳐진 층의 테마 자리 ("*|L0" = 작은 테마들의 상위 유동성 층)
+
+
+def build_strata(symbols: List[str],
+                 theme_pairs: pd.DataFrame,
+                 liquidity: Dict[str, float]) -> Dict[str, List[str]]:
+    """
+    심볼 → 층 키 "테마|L{0..2}". 테마는 매핑의 첫 테마(없으면 미분류),
+    유동성은 유니버스 내 분위(0=상위). 층 안은 유동성 내림차순.
+    """
+    first_theme: Dict[str, str] = {}
+    if theme_pairs is not None and not theme_pairs.empty:
+        for sym, theme in theme_pairs[["symbol", "theme"]].itertuples(index=False):
+            first_theme.setdefault(str(sym), str(theme))
+    ranked = sorted(symbols, key=lambda s: -liquidity.get(s, 0.0))
+    n = max(1, len(ranked))
+    strata: Dict[str, List[str]] = {}
+    for i, sym in enumerate(ranked):
+        bucket = min(LIQ_BUCKETS - 1, i * LIQ_BUCKETS // n)
+        key = f"{first_theme.get(sym, UNCLASSIFIED)}|L{bucket}"
+        strata.setdefault(key, []).append(sym)
+    return strata
+
+
+def merge_strata(strata: Dict[str, List[str]], max_strata: int) -> Dict[str, List[str]]:
+    """
+    층 수가 max_strata(= 표본 크기)를 넘으면 큰 층은 유지하고 나머지 작은 층들을
+    같은 유동성 층끼리 "*|L{b}"로 합친다. 유동성 층 수보다도 작으면 전체를 한 층("*")으로.
+    → 층마다 최소 1개를 뽑아도 표본이 요청 크기를 넘지 않는다.
+    """
+    if max_strata <= 0 or len(strata) <= max_strata:
+        return strata
+    keys = sorted(strata, key=lambda k: -len(strata[k]))
+    for keep in range(max_strata, -1, -1):
+        pooled = {k.rsplit("|", 1)[-1] for k in keys[keep:]}
+        if keep + len(pooled) <= max_strata:
+            out = {k: list(strata[k]) for k in keys[:keep]}
+            for k in keys[keep:]:
+                out.setdefault(f"{MERGED_THEME}|{k.rsplit('|', 1)[-1]}", []).extend(strata[k])
+            return out
+    return {MERGED_THEME: [s for k in keys for s in strata[k]]}
+
+
+def stratified_sample(strata: Dict[str, List[str]], size: int, seed: int = 0) -> Dict[str, List[str]]:
+    """
+    비례 배분(최소 1개/층, 표본이 층 수보다 작으면 큰 층부터) 후 층 내 무작위 추출.
+    반환: 층 키 → 표본 심볼
+    """
+    total = sum(len(v) for v in strata.values())
+    if total == 0 or size <= 0:
+        return {}
+    size = min(size, total)
+    keys = sorted(strata, key=lambda k: -len(strata[k]))
+    alloc = {k: 0 for k in keys}
+    if size >= len(keys):
+        for k in keys:
+            alloc[k] = 1
+        rest = size - len(keys)
+        # 남은 표본은 층 크기 비례(최대 잉여 방식)
+        quotas = {k: rest * len(strata[k]) / total for k in keys}
+        for k in keys:
+            alloc[k] += min(int(quotas[k]), len(strata[k]) - alloc[k])
+        left = size - sum(alloc.values())
+        for k in sorted(keys, key=lambda k: -(quotas[k] - int(quotas[k]))):
+            if left <= 0:
+                break
+            if alloc[k] < len(strata[k]):
+                alloc[k] += 1
+                left -= 1
+        for k in keys:   # 반올림 뒤 남은 몫은 여유 있는 층부터
+            while left > 0 and alloc[k] < len(strata[k]):
+                alloc[k] += 1
+                left -= 1
+    else:
+        for k in keys[:size]:
+            alloc[k] = 1
+
+    rng = np.random.default_rng(seed)
+    out: Dict[str, List[str]] = {}
+    for k in keys:
+        if alloc[k] <= 0:
+            continue
+        members = strata[k]
+        pick = sorted(rng.choice(len(members), size=alloc[k], replace=False).tolist())
+        out[k] = [members[i] for i in pick]
+    return out
+
+
+def stratified_estimate(per_symbol: pd.DataFrame,
+                        strata: Dict[str, List[str]],
+                        sample: Dict[str, List[str]],
+                        metrics: List[str],
+                        confidence: float = 0.95) -> Dict[str, Any]:
+    """
+    층화 평균 ȳ = Σ W_h ȳ_h,  Var = Σ W_h² (1 - n_h/N_h) s_h² / n_h  (W_h = N_h / N)
+    표본 1개뿐인 층의 s_h²는 전체 표본 분산으로 대체. 표본이 없는 층은 가중치 재정규화.
+    per_symbol: symbol 컬럼 + metrics 컬럼 (심볼당 1행)
+    """
+    z = NormalDist().inv_cdf(0.5 + float(confidence) / 2.0)
+    vals = per_symbol.set_index("symbol")
+    covered = {k: [s for s in v if s in vals.index] for k, v in sample.items()}
+    covered = {k: v for k, v in covered.items() if v}
+    pop = sum(len(strata[k]) for k in covered)
+    out: Dict[str, Any] = {}
+    if not covered or pop == 0:
+        return out
+    for m in metrics:
+        pooled_var = float(vals.loc[[s for v in covered.values() for s in v], m].var(ddof=1)) \
+            if sum(len(v) for v in covered.values()) > 1 else 0.0
+        mean, var = 0.0, 0.0
+        for k, syms in covered.items():
+            n_h, N_h = len(syms), len(strata[k])
+            w = N_h / pop
+            y = vals.loc[syms, m].astype(float)
+            s2 = float(y.var(ddof=1)) if n_h > 1 else pooled_var
+            if math.isnan(s2):
+                s2 = 0.0
+            mean += w * float(y.mean())
+            var += (w ** 2) * (1.0 - n_h / N_h) * s2 / n_h
+        se = math.sqrt(max(var, 0.0))
+        out[m] = {"mean": mean, "stderr": se, "ci": [mean - z * se, mean + z * se]}
+    return out
@@ -0,0 +1,251 @@
+# backend/app/modules/coinlab/services/signal_store.py
+# 전략 신호 영구 캐시: /data/{SYMBOL}/{tf}/_signals/{전략}__{파라미터해시}__{키}.npz
+# entry/opp 0/1 배열을 np.packbits로 비트 압축(봉당 1bit) 저장. 두 가지 모드:
+# - frame(기본): 요청 프레임 그대로 계산 → 결과가 캐시 없을 때와 같다. 키 = 프레임 첫 봉,
+#   프레임 지문(time 포함)이 같으면 적중, 같은 시작에서 뒤에 봉만 붙었으면 꼬리 구간만 재계산.
+# - history(선택, step.signalWarmup="history"): 저장 시계열 전체에서 계산해 요청 구간만 잘라 반환
+#   → 지표가 구간 시작에서 이미 워밍업된 상태. (symbol, tf, 전략, 파라미터)당 파일 1개, 원본 서명으로 적중.
+#   구간 밖 봉에 영향을 받는 비인과적 전략은 history 모드에서 캐시하지 않는다.
+from typing import Any, Callable, Dict, Optional, Tuple
+from pathlib import Path
+import hashlib, json, os, threading
+import numpy as np
+import pandas as pd
+from .candle_store import DATA_DIR, load_candles
+from .scenario_context import fingerprint
+
+SIGNAL_DIR_NAME = "_signals"
+SIGNAL_CACHE_MAX_BYTES = int(float(os.getenv("SIGNAL_CACHE_MAX_MB", "256")) * 1024 * 1024)
+TAIL_WARMUP_MIN = 1000      # 꼬리 재계산 시 앞쪽 워밍업 봉 수(최소)
+TAIL_WARMUP_PER_PARAM = 20  # 정수 파라미터(기간)의 배수만큼 워밍업
+TAIL_CHECK_BARS = 200       # 워밍업 뒤 기존 신호와 일치해야 하는 겹침 구간
+
+_size_lock = threading.Lock()
+_total_bytes: Optional[int] = None   # 전체 캐시 크기 (최초 1회 스캔 후 증감 추적)
+
+_stats = {"hits": 0, "tail": 0, "full": 0, "evicted": 0}
+
+
+def frame_identity(df: pd.DataFrame) -> Optional[Tuple[str, str]]:
+    """
+    CandleProvider가 돌려준 원본 프레임인지 확인 → (symbol, tf). 폴드 슬라이스 등은 None.
+    (pandas attrs는 슬라이스에도 전파되므로 행 수/첫·끝 봉까지 비교)
+    """
+    a = getattr(df, "attrs", None) or {}
+    key = a.get("candle_key")
+    if not key or len(df) != a.get("rows") or len(df) == 0:
+        return None
+    t = df["time"]
+    if int(t.iloc[0]) != a.get("first") or int(t.iloc[-1]) != a.get("last"):
+        return None
+    return key
+
+
+def _path(symbol: str, tf: str, code: str, params: Dict[str, Any], tag: str) -> Path:
+    ph = hashlib.blake2b(json.dumps(params or {}, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+    safe = "".join(ch if (ch.isalnum() or ch in "-_") else "_" for ch in str(code))
+    return DATA_DIR / symbol / tf / SIGNAL_DIR_NAME / f"{safe}__{ph}__{tag}.npz"
+
+
+def _pack(arr: Optional[np.ndarray]) -> np.ndarray:
+    return np.packbits(np.asarray(arr, dtype=bool)) if arr is not None else np.zeros(0, dtype=np.uint8)
+
+
+def _unpack(bits: np.ndarray, n: int) -> np.ndarray:
+    return np.unpackbits(bits, count=n).astype(bool)
+
+
+def _read(p: Path):
+    """→ (n, 서명(frame: 프레임 지문, history: 원본 서명), 마지막 봉 제외 데이터 지문, time 배열, entry, opp) 또는 None"""
+    try:
+        with np.load(p, allow_pickle=False) as z:
+            n = int(z["n"])
+            times = np.concatenate([z["t0"], int(z["t0"][0]) + np.cumsum(z["dt"])]) if n else np.empty(0, "int64")
+            entry = _unpack(z["entry"], n)
+            opp = _unpack(z["opp"], n) if bool(z["has_opp"]) else None
+            return n, str(z["sig"]), str(z["fp_head"]), times, entry, opp
+    except Exception:
+        return None
+
+
+def _scan_total() -> int:
+    total = 0
+    for p in DATA_DIR.glob(f"*/*/{SIGNAL_DIR_NAME}/*.npz"):
+        try:
+            total += p.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def _evict_if_needed() -> None:
+    """크기 상한 초과 시 오래 쓰지 않은 파일(mtime 순)부터 삭제 → 상한의 90%까지"""
+    global _total_bytes
+    with _size_lock:
+        if _total_bytes is None:
+            _total_bytes = _scan_total()
+        if _total_bytes <= SIGNAL_CACHE_MAX_BYTES:
+            return
+        files = []
+        for p in DATA_DIR.glob(f"*/*/{SIGNAL_DIR_NAME}/*.npz"):
+            try:
+                st = p.stat()
+                files.append((st.st_mtime, st.st_size, p))
+            except OSError:
+                pass
+        files.sort()
+        _total_bytes = sum(f[1] for f in files)
+        target = int(SIGNAL_CACHE_MAX_BYTES * 0.9)
+        for _, size, p in files:
+            if _total_bytes <= target:
+                break
+            try:
+                p.unlink()
+                _total_bytes -= size
+                _stats["evicted"] += 1
+            except OSError:
+                pass
+
+
+def _write(p: Path, sig: str, fp_head: str, times: np.ndarray, entry: np.ndarray, opp: Optional[np.ndarray]) -> None:
+    global _total_bytes
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        old = p.stat().st_size if p.exists() else 0
+        tmp = p.with_name(p.name + ".tmp.npz")
+        # time은 첫 봉 + 간격(대부분 상수)으로 저장 → 압축 후 거의 0바이트
+        np.savez_compressed(tmp, n=np.int64(len(times)), sig=np.str_(sig), fp_head=np.str_(fp_head),
+                            t0=times[:1].astype("int64"), dt=np.diff(times).astype("int64"),
+                            entry=_pack(entry), opp=_pack(opp), has_opp=np.bool_(opp is not None))
+        os.replace(tmp, p)   # 원자적 교체 (동시 읽기 보호)
+        with _size_lock:
+            if _total_bytes is not None:
+                _total_bytes += p.stat().st_size - old
+    except OSError:
+        return
+    _evict_if_needed()
+
+
+def _to_arrays(df: pd.DataFrame, entry, opp) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    e = entry.reindex(df.index).fillna(0).to_numpy() > 0 if entry is not None else np.zeros(len(df), dtype=bool)
+    o = (opp.reindex(df.index).fillna(0).to_numpy() > 0) if opp is not None else None
+    return e, o
+
+
+def _warmup_bars(params: Dict[str, Any]) -> int:
+    periods = [int(v) for v in (params or {}).values() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    return max(TAIL_WARMUP_MIN, TAIL_WARMUP_PER_PARAM * max(periods or [0]))
+
+
+def _full_series(symbol: str, tf: str) -> pd.DataFrame:
+    """저장 시계열 전체 (hot tier 매핑 사본 우선, 없으면 load_candles — 미저장 tf는 리샘플)"""
+    from .hot_tier import get_hot
+    df = get_hot(symbol, tf)
+    return df if df is not None else load_candles(symbol, tf)
+
+
+def _slice(df: pd.DataFrame, times: np.ndarray, e: np.ndarray, o: Optional[np.ndarray]):
+    """전체 시계열 신호 → 요청 프레임 구간 (int 0/1 Series, df.index). time이 정확히 맞지 않으면 None"""
+    t = df["time"].to_numpy(dtype="int64")
+    lo = int(np.searchsorted(times, t[0], side="left"))
+    hi = lo + len(t)
+    if hi > len(times) or not np.array_equal(times[lo:hi], t):
+        return None
+    return (pd.Series(e[lo:hi].astype(int), index=df.index),
+            pd.Series(o[lo:hi].astype(int), index=df.index) if o is not None else None)
+
+
+def _touch(p: Path) -> None:
+    try:
+        os.utime(p)   # 최근 사용 표시 (축출 순서)
+    except OSError:
+        pass
+
+
+def _extend(df: pd.DataFrame, stored, params: Dict[str, Any], compute: Callable[[pd.DataFrame], tuple]):
+    """
+    저장본이 df의 앞부분이면(time 일치 + 마지막 봉 제외 지문 일치) 마지막 저장 봉(진행 중이었을 수 있음)부터
+    워밍업 창과 함께 재계산해 이어 붙인다. 겹침 구간이 기존과 다르면 None (전체 재계산).
+    """
+    n_old, _, fp_old, t_old, e_old, o_old = stored
+    last = n_old - 1
+    times = df["time"].to_numpy(dtype="int64")
+    if not (0 < last < len(df) and np.array_equal(times[:n_old], t_old) and fingerprint(df.iloc[:last]) == fp_old):
+        return None
+    w0 = max(0, last - _warmup_bars(params))
+    e_t, o_t = _to_arrays(df.iloc[w0:], *compute(df.iloc[w0:]))
+    chk = max(w0, last - TAIL_CHECK_BARS)
+    if not (np.array_equal(e_t[chk - w0:last - w0], e_old[chk:last]) and (o_old is None) == (o_t is None)):
+        return None
+    if o_old is not None and not np.array_equal(o_t[chk - w0:last - w0], o_old[chk:last]):
+        return None
+    return (np.concatenate([e_old[:last], e_t[last - w0:]]),
+            np.concatenate([o_old[:last], o_t[last - w0:]]) if o_old is not None else None)
+
+
+def _signals_for(df: pd.DataFrame, stored, params: Dict[str, Any], compute: Callable[[pd.DataFrame], tuple]):
+    """df 전체 신호 배열: 저장본에 꼬리만 이어 붙일 수 있으면 그렇게, 아니면 전체 계산"""
+    out = _extend(df, stored, params, compute) if stored is not None else None
+    if out is not None:
+        _stats["tail"] += 1
+        return out
+    _stats["full"] += 1
+    return _to_arrays(df, *compute(df))
+
+
+def _series(df: pd.DataFrame, e: np.ndarray, o: Optional[np.ndarray]):
+    return (pd.Series(e.astype(int), index=df.index),
+            pd.Series(o.astype(int), index=df.index) if o is not None else None)
+
+
+def cached_signals(df: pd.DataFrame, code: str, params: Dict[str, Any],
+                   compute: Callable[[pd.DataFrame], tuple], causal: bool = True, warmup: str = "frame"):
+    """
+    compute(df) → (entry Series, opp Series|None) 를 디스크 캐시로 감싼다. df는 CandleProvider 프레임.
+    warmup="frame"(기본): df 그대로 계산 — 캐시 유무와 결과가 같다. 꼬리 재계산은 인과적 전략만.
+    warmup="history": 저장 시계열 전체 신호의 df 구간 (모듈 설명 참고). 인과적 전략만 해당.
+    반환 형태는 compute와 동일 (int 0/1 Series, df.index)
+    """
+    ident = frame_identity(df)
+    if ident is None:
+        return compute(df)
+    if warmup == "history":
+        return _history_signals(df, ident, code, params, compute) if causal else compute(df)
+    symbol, tf = ident
+    p = _path(symbol, tf, code, params, str(int(df["time"].iloc[0])))
+    fp = fingerprint(df)
+    stored = _read(p) if p.exists() else None
+    if stored is not None and stored[0] == len(df) and stored[1] == fp:
+        _stats["hits"] += 1
+        _touch(p)
+        return _series(df, stored[4], stored[5])
+    e, o = _signals_for(df, stored if causal else None, params, compute)
+    _write(p, fp, fingerprint(df.iloc[:len(df) - 1]), df["time"].to_numpy(dtype="int64"), e, o)
+    return _series(df, e, o)
+
+
+def _history_signals(df: pd.DataFrame, ident: Tuple[str, str], code: str, params: Dict[str, Any],
+                     compute: Callable[[pd.DataFrame], tuple]):
+    from .hot_tier import source_signature   # 순환 import 방지 (hot_tier → candle_store)
+    symbol, tf = ident
+    p = _path(symbol, tf, code, params, "history")
+    sig = source_signature(symbol, tf)
+    stored = _read(p) if p.exists() else None
+    if stored is not None and stored[1] == sig:
+        out = _slice(df, stored[3], stored[4], stored[5])
+        if out is not None:
+            _stats["hits"] += 1
+            _touch(p)
+            return out
+    full = _full_series(symbol, tf)
+    if len(full) == 0:
+        return compute(df)
+    times = full["time"].to_numpy(dtype="int64")
+    e, o = _signals_for(full, stored, params, compute)
+    _write(p, sig, fingerprint(full.iloc[:len(full) - 1]), times, e, o)
+    out = _slice(df, times, e, o)
+    return out if out is not None else compute(df)
+
+
+def signal_cache_stats() -> Dict[str, Any]:
+    return {**_stats, "bytes": _total_bytes, "maxBytes": SIGNAL_CACHE_MAX_BYTES}
@@ -98,6 +98,13 @@ def _pattern_entry(df: pd.DataFrame, name: str):
         return _detect_lower_highs_reversal_core(df), None
     return None, None
 
+# 패턴 감지기 중 전체 구간(tail/최근 피크)을 보고 판정하는 것들 → 인과적이지 않음
+_NON_CAUSAL_PATTERNS = {"pattern_cup_handle", "cup_handle", "pattern_lh_reversal", "lower_highs_reversal"}
+
+def is_causal_strategy(name: str) -> bool:
+    """i번째 봉의 신호가 i 이전 봉만으로 결정되는지(전체 시계열 1회 계산 후 슬라이스 가능 여부)"""
+    return (name or "").lower() not in _NON_CAUSAL_PATTERNS
+
 def _to_bool_int(sr: pd.Series) -> pd.Series:
     return sr.fillna(False).astype(int)
 
@@ -253,11 +260,23 @@ def list_strategies() -> Dict[str, Dict[str, Any]]:
     return {k: {"defaults": v.defaults, "desc": v.desc} for k, v in STRATEGY_REGISTRY.items()}
 
 # === [REPLACE] 기존 resolve_signals_for_combo → 파라미터 지원 버전 ===
-def resolve_signals_for_combo(df: pd.DataFrame, combo_name: str, params: Optional[Dict[str, Any]] = None):
+def resolve_signals_for_combo(df: pd.DataFrame, combo_name: str, params: Optional[Dict[str, Any]] = None,
+                              warmup: str = "frame"):
     """
     반환: (entry_series[int 0/1], opp_exit_series[int 0/1] | None)
     - params에 거래량 필터(min_volume, volume_sma_n+volume_sma_mult, min_volume_change_pct) 등 전달 가능
+    - CandleProvider 원본 프레임이면 디스크 신호 캐시(signal_store)를 거친다 (꼬리만 재계산)
+    - warmup="history": 저장 시계열 전체에서 계산한 신호의 df 구간 (지표 워밍업 포함, 원본 프레임만)
     """
+    from .signal_store import cached_signals, frame_identity
+    if frame_identity(df) is None:
+        return _resolve_signals_uncached(df, combo_name, params)
+    return cached_signals(df, str(combo_name or ""), params or {},
+                          lambda d: _resolve_signals_uncached(d, combo_name, params),
+                          causal=is_causal_strategy(combo_name), warmup=warmup)
+
+
+def _resolve_signals_uncached(df: pd.DataFrame, combo_name: str, params: Optional[Dict[str, Any]] = None):
     # 1) 패턴류(컵핸들 등)를 먼저 체크 (기존 함수 재사용)
     e, x = _pattern_entry(df, combo_name)
     if e is not None:
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+# backend/ 를 import 경로에 추가 → `app.modules...` 로 import (uvicorn 실행 위치와 동일)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
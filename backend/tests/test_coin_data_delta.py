@@ -0,0 +1,73 @@
+# backend/tests/test_coin_data_delta.py
+# 증분 수집(update_coin_data_delta): 받은 최근 구간이 마지막 저장 봉과 이어질 때만 병합,
+# 사이가 비면(gap) 병합하지 않고 update_coin_data가 연도 전체 수집으로 넘어가는지 검사 (네트워크/디스크 없이)
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.modules.coinlab.routers import coin_data
+
+HOUR = 3600
+YEAR = datetime.utcnow().year
+T0 = int(pd.Timestamp(f"{YEAR}-01-01").value // 10**9)
+
+
+def _rows(start_ts, n):
+    # 빗썸 candlestick 행 [ts(ms), open, close, high, low, volume]
+    return [[(start_ts + i * HOUR) * 1000, "100", "101", "102", "99", "5"] for i in range(n)]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    calls = {"merged": [], "full": [], "written": []}
+    state = {"last": None, "recent": None}
+
+    monkeypatch.setattr(coin_data, "_last_stored_time", lambda s, i: state["last"])
+    monkeypatch.setattr(coin_data, "fetch_recent_bithumb",
+                        lambda s, i: coin_data._bithumb_frame(state["recent"], s) if state["recent"] else None)
+    monkeypatch.setattr(coin_data, "save_and_merge", lambda s, i, y, part: calls["merged"].append((y, part)))
+
+    def fetch_full(s, i, y):
+        calls["full"].append(y)
+        return coin_data._bithumb_frame(_rows(T0, 3), s)
+
+    monkeypatch.setattr(coin_data, "fetch_ohlcv_bithumb", fetch_full)
+    monkeypatch.setattr(coin_data, "write_candles_parquet", lambda df, p, s: calls["written"].append((p, len(df))))
+    for name in ("catalog_upsert", "refresh_hot", "update_snapshot"):
+        monkeypatch.setattr(coin_data, name, lambda *a, **k: None)
+    return state, calls
+
+
+def test_delta_merges_contiguous_tail(fake):
+    state, calls = fake
+    state["last"] = T0 + 10 * HOUR
+    state["recent"] = _rows(T0 + 5 * HOUR, 10)   # 5..14시: 마지막 저장 봉(10시) 포함
+
+    res = coin_data.update_coin_data_delta("BTC_KRW", "1h")
+
+    assert res == {"appended": 4, "years": [YEAR]}
+    (year, part), = calls["merged"]
+    assert year == str(YEAR)
+    assert int(part["time"].iloc[0]) == state["last"]   # 진행 중이었을 수 있는 마지막 봉부터 덮어씀
+
+
+def test_delta_gap_returns_none_without_merging(fake):
+    state, calls = fake
+    state["last"] = T0 + 10 * HOUR
+    state["recent"] = _rows(T0 + 20 * HOUR, 5)   # 11..19시 누락
+
+    assert coin_data.update_coin_data_delta("BTC_KRW", "1h") is None
+    assert calls["merged"] == []
+
+
+def test_update_falls_back_to_full_year_on_gap(fake):
+    state, calls = fake
+    state["last"] = T0 - 30 * 24 * HOUR          # 지난해 파일만 있음
+    state["recent"] = _rows(T0 + 20 * HOUR, 5)
+
+    assert coin_data.update_coin_data("BTC_KRW", "1h", str(YEAR)) is True
+    assert calls["merged"] == []
+    assert calls["full"] == [str(YEAR)]
+    (path, rows), = calls["written"]
+    assert path.name == f"{YEAR}.parquet" and rows == 3
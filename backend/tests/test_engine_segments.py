@@ -0,0 +1,81 @@
+# backend/tests/test_engine_segments.py
+# 구간 분할 실행(run_segment/finalize_state) ↔ 한 번에 실행(backtest_single) 일치 검사
+# 구간 경계에 미체결 진입/청산이 걸리는 경우 + 무작위 시계열/청산 설정/분할 위치
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.modules.coinlab.services.backtest_engine import (EngineState, ExitConfig, backtest_single,
+                                                          finalize_state, run_segment)
+
+
+def _frame(n, seed):
+    rng = np.random.default_rng(seed)
+    p = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({"time": 1_700_000_000 + np.arange(n, dtype="int64") * 60,
+                         "open": p * (1 + rng.normal(0, 0.01, n)), "high": p * 1.02, "low": p * 0.98,
+                         "close": p, "volume": 1.0})
+
+
+def _segmented(df, entry, opp, cfg, cuts, fill_next_bar=True):
+    state, prev = EngineState(), 0
+    for c in list(cuts) + [len(df)]:
+        state = run_segment(df.iloc[prev:c], entry[prev:c], None if opp is None else opp[prev:c],
+                            cfg, state, fill_next_bar=fill_next_bar)
+        prev = c
+    return finalize_state(state, cfg)
+
+
+def _equity(result):
+    return np.cumprod([1 + t["pnlPct"] / 100.0 for t in result["trades"]]).tolist()
+
+
+def test_pending_entry_and_exit_across_boundaries():
+    df = _frame(40, seed=3)
+    entry = np.zeros(40, dtype=int)
+    opp = np.zeros(40, dtype=int)
+    entry[9] = 1    # 첫 구간 마지막 봉 진입 신호 → 다음 구간 첫 봉 시가 체결
+    opp[19] = 1     # 둘째 구간 마지막 봉 반대신호 → 다음 구간 첫 봉 시가 청산
+    entry[29] = 1
+    opp[34] = 1
+    cfg = ExitConfig(use_opposite=True)
+    cuts = [10, 20, 30, 35]
+
+    # 경계마다 미체결 상태가 실제로 걸리는지 먼저 확인
+    state, prev, pending = EngineState(), 0, []
+    for c in cuts:
+        state = run_segment(df.iloc[prev:c], entry[prev:c], opp[prev:c], cfg, state)
+        pending.append((state.pending_entry, bool(state.pending_exit)))
+        prev = c
+    assert pending == [(True, False), (False, True), (True, False), (False, True)]
+
+    whole = backtest_single(df, pd.Series(entry), pd.Series(opp), cfg)
+    split = _segmented(df, entry, opp, cfg, cuts)
+
+    assert [(t["entryTime"], t["exitTime"]) for t in whole["trades"]] == [
+        (int(df["time"].iloc[10]), int(df["time"].iloc[20])), (int(df["time"].iloc[30]), int(df["time"].iloc[35]))]
+    assert split == whole
+    assert _equity(split) == _equity(whole)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_segments_match_single_pass(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 250))
+    df = _frame(n, seed)
+    entry = (rng.random(n) < rng.uniform(0.01, 0.3)).astype(int)
+    opp = (rng.random(n) < rng.uniform(0.01, 0.3)).astype(int) if seed % 3 else None
+    cfg = ExitConfig(use_opposite=bool(rng.integers(0, 2)),
+                     stop_loss_pct=[None, 2.0][rng.integers(0, 2)],
+                     take_profit_pct=[None, 3.0][rng.integers(0, 2)],
+                     time_limit_bars=[None, 1, 5][rng.integers(0, 3)],
+                     trailing_pct=[None, 1.5][rng.integers(0, 2)])
+    fill_next_bar = bool(rng.integers(0, 2)) if seed % 5 == 0 else True
+    cuts = sorted(set(rng.integers(1, n, size=4).tolist())) if n > 1 else []
+
+    whole = backtest_single(df, pd.Series(entry), None if opp is None else pd.Series(opp), cfg,
+                            fill_next_bar=fill_next_bar)
+    split = _segmented(df, entry, opp, cfg, cuts, fill_next_bar=fill_next_bar)
+
+    assert split == whole
+    assert _equity(split) == _equity(whole)
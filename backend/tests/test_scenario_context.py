@@ -0,0 +1,71 @@
+# backend/tests/test_scenario_context.py
+# 노드 캐시(NodeCache) 바이트 상한 축출 + 노드 키(fingerprint) 안정성 검사
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.modules.coinlab.services.scenario_context import NodeCache, approx_bytes, fingerprint
+
+
+def _candles(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({"time": 1_700_000_000 + np.arange(n, dtype="int64") * 300,
+                         "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                         "volume": rng.uniform(500, 1500, n)})
+
+
+def test_node_cache_evicts_oldest_by_bytes():
+    one = np.zeros(1000)                       # 8000 bytes
+    cache = NodeCache(max_bytes=approx_bytes(one) * 3)
+    for k in "abc":
+        cache.put(k, np.zeros(1000))
+    assert cache.stats()["entries"] == 3
+
+    assert cache.get("a")[0]                   # a 최근 사용 → b가 가장 오래됨
+    cache.put("d", np.zeros(1000))
+
+    assert not cache.get("b")[0]
+    assert all(cache.get(k)[0] for k in "acd")
+    s = cache.stats()
+    assert s["evictions"] == 1 and s["bytes"] == approx_bytes(one) * 3 <= s["maxBytes"]
+
+
+def test_node_cache_skips_value_larger_than_cap():
+    cache = NodeCache(max_bytes=4000)
+    cache.put("small", np.zeros(100))
+    cache.put("big", np.zeros(1000))           # 상한 초과 → 저장 안 함, 기존 항목 유지
+
+    assert not cache.get("big")[0]
+    assert cache.get("small")[0]
+    assert cache.stats()["evictions"] == 0
+
+
+def test_node_cache_replace_keeps_byte_total():
+    cache = NodeCache(max_bytes=1 << 20)
+    cache.put("k", np.zeros(1000))
+    cache.put("k", np.zeros(10))
+    assert cache.stats()["bytes"] == approx_bytes(np.zeros(10))
+
+
+def test_fingerprint_stable_for_equal_frames():
+    a, b = _candles(), _candles()
+    assert a is not b
+    assert fingerprint("BTC_KRW", "5m", a) == fingerprint("BTC_KRW", "5m", b)
+    assert fingerprint(a, {"fast": 5, "slow": 20}) == fingerprint(b, {"slow": 20, "fast": 5})
+
+
+@pytest.mark.parametrize("col", ["time", "open", "high", "low", "close", "volume"])
+def test_fingerprint_changes_when_any_candle_changes(col):
+    base = _candles()
+    ref = fingerprint(base)
+    for row in (0, 97, len(base) - 1):
+        df = base.copy()
+        df.loc[row, col] = df.loc[row, col] + 1
+        assert fingerprint(df) != ref, (col, row)
+
+
+def test_fingerprint_changes_with_length_and_other_parts():
+    df = _candles()
+    assert fingerprint(df.iloc[:-1]) != fingerprint(df)
+    assert fingerprint("BTC_KRW", "5m", df) != fingerprint("BTC_KRW", "1h", df)
@@ -0,0 +1,50 @@
+# backend/tests/test_scenario_reuse.py
+# 시나리오 단계 간 재사용: 같은 (symbol, tf)를 쓰는 단계가 여러 개여도 캔들은 심볼당 1회만 읽는지,
+# 실행이 끝나면 심볼 프레임이 해제되는지 검사 (합성 캔들, 디스크/네트워크 없이)
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.modules.coinlab.services import backtest_service, candle_store, hot_tier, signal_store
+from app.modules.coinlab.services.scenario_context import ScenarioContext
+
+
+def _candles(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({"time": 1_700_000_000 + np.arange(n, dtype="int64") * 3600,
+                         "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                         "volume": rng.uniform(500, 1500, n)})
+
+
+@pytest.fixture
+def loads(monkeypatch, tmp_path):
+    counts = {}
+
+    def fake_load(symbol, tf, start_ts=0, end_ts=None):
+        counts[(symbol, tf)] = counts.get((symbol, tf), 0) + 1
+        return _candles(seed=len(symbol))
+
+    monkeypatch.setattr(candle_store, "load_candles", fake_load)
+    monkeypatch.setattr(candle_store, "resample_source", lambda symbol, tf: None)
+    monkeypatch.setattr(hot_tier, "get_hot", lambda symbol, tf: None)
+    monkeypatch.setattr(signal_store, "DATA_DIR", tmp_path)   # 신호 캐시 파일은 임시 디렉터리로
+    return counts
+
+
+def _step(params):
+    return {"tf": "1h", "periodKey": "all", "strategyCode": "MA_CROSS", "strategyParams": params}
+
+
+def test_steps_sharing_tf_load_candles_once(loads):
+    payload = {"symbols": ["AAA_KRW", "BB_KRW"], "scope": "watchlist", "resultStore": False, "reuse": False,
+               "steps": [_step({"fast": 5, "slow": 20}), _step({"fast": 10, "slow": 40})]}
+    ctx = ScenarioContext(reuse=False)
+
+    records = list(backtest_service.iter_scenario_records(payload, ctx=ctx))
+
+    runs = [r for r in records if r["type"] == "run"]
+    assert sorted((r["stepIndex"], r["run"]["symbol"]) for r in runs) == [
+        (0, "AAA_KRW"), (0, "BB_KRW"), (1, "AAA_KRW"), (1, "BB_KRW")]
+    assert loads == {("AAA_KRW", "1h"): 1, ("BB_KRW", "1h"): 1}
+    assert ctx.stats()["candleFrames"] == 0   # 마지막 단계 후 해제
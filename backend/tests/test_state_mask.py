@@ -0,0 +1,59 @@
+# backend/tests/test_state_mask.py
+# 벡터화 레짐 마스크(_build_state_mask) ↔ 기존 봉 단위 루프 구현 일치 검사 (무작위 시계열/파라미터)
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.modules.coinlab.services.backtest_service import _build_state_mask
+
+
+def _build_state_mask_loop(entry_sr, opp_exit_sr=None, time_limit_bars=None):
+    # 벡터화 이전 구현 그대로 (기준값)
+    idx = entry_sr.index
+    entry = entry_sr.fillna(0).astype(int).to_numpy()
+    oppx = None if opp_exit_sr is None else opp_exit_sr.fillna(0).astype(int).to_numpy()
+    tl = int(time_limit_bars) if time_limit_bars else None
+
+    open_flag = False
+    start_i = -1
+    out = np.zeros(len(entry), dtype=bool)
+
+    for i in range(len(entry)):
+        if entry[i] > 0:
+            open_flag = True
+            start_i = i
+        if open_flag:
+            out[i] = True
+            if oppx is not None and oppx[i] > 0:
+                open_flag = False
+                start_i = -1
+            elif tl is not None and start_i >= 0 and (i - start_i + 1) >= tl:
+                open_flag = False
+                start_i = -1
+    return pd.Series(out, index=idx)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_state_mask_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(400):
+        n = int(rng.integers(0, 80))
+        index = pd.RangeIndex(n) if rng.random() < 0.5 else pd.RangeIndex(100, 100 + n)
+        entry = pd.Series((rng.random(n) < rng.random() * 0.5).astype(int), index=index)
+        opp = pd.Series((rng.random(n) < rng.random() * 0.5).astype(float), index=index)
+        if n:
+            opp.iloc[rng.integers(0, n)] = np.nan   # 결측은 0으로 취급
+        tl = rng.choice([None, 0, 1, 2, 3, 5, 17, -1])
+        for opp_sr in (None, opp):
+            expected = _build_state_mask_loop(entry, opp_sr, tl)
+            got = _build_state_mask(entry, opp_sr, tl)
+            pd.testing.assert_series_equal(got, expected)
+
+
+def test_state_mask_long_series():
+    rng = np.random.default_rng(42)
+    n = 20_000
+    entry = pd.Series((rng.random(n) < 0.01).astype(int))
+    opp = pd.Series((rng.random(n) < 0.01).astype(int))
+    for tl in (None, 50):
+        pd.testing.assert_series_equal(_build_state_mask(entry, opp, tl), _build_state_mask_loop(entry, opp, tl))